@@ -0,0 +1,276 @@
+"""ASGI entry point for serving the quiz API from an event loop.
+
+The busiest routes are answered natively here:
+
+    GET  /api/questions               pre-encoded payload, no thread needed
+    GET  /api/scores                  in-memory leaderboard, no thread needed
+    POST /api/submit-quiz             graded and queued on the database thread pool
+    GET  /api/player-scores/<name>    page read on the database thread pool
+    GET  /api/leaderboard/stream      SSE; idle subscribers cost a coroutine, not a thread
+
+Every other route goes to the unchanged Flask app in server.py through
+asgiref's WSGI adapter. Run it with serve.py, or directly with any ASGI
+server:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import contextvars
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.http import parse_accept_header, parse_etags
+
+import server
+
+# This is the production entry point; never serve the debugger from here
+server.app.config['DEBUG'] = False
+
+ASYNC_CONFIG = {
+    # Threads for blocking database work; sized to the MySQL pool, since more couldn't all get a connection
+    'db_threads': server.POOL_CONFIG['mysql_pool_size'],
+    'max_body': 1024 * 1024  # Largest request body accepted by the native routes
+}
+
+class AsyncDatabase:
+    """Async front for the blocking database layer in server.py.
+
+    mysql.connector and sqlite3 only have blocking drivers, so calls run on a
+    small dedicated thread pool and the event loop awaits them. Connections
+    still come from server.db_pool, so the pool, circuit breaker and SQLite
+    fallback all behave exactly as they do under Flask.
+    """
+
+    def __init__(self, threads):
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='async-db')
+
+    async def run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    async def submit_quiz(self, data):
+        # Grading is cheap but storing waits on the fsynced ingest log
+        return await self.run(server.process_submission, data)
+
+    async def player_page(self, player_name, after, limit):
+        # A page is at most PLAYER_SCORES_MAX_PAGE_SIZE rows, so it is encoded in one go
+        return await self.run(self._player_page, player_name, after, limit)
+
+    @staticmethod
+    def _player_page(player_name, after, limit):
+        rows = server.open_player_rows(player_name, after, limit)
+        return ''.join(server.stream_score_page(rows, limit)).encode('utf-8')
+
+database = AsyncDatabase(ASYNC_CONFIG['db_threads'])
+
+class LeaderboardWaiters:
+    """Wake every async stream subscriber when the broadcaster publishes.
+
+    One listener is registered with server.leaderboard_broadcaster; it swaps
+    in a fresh asyncio.Event and sets the old one, so all waiting streams
+    resume together on the loop thread.
+    """
+
+    def __init__(self, broadcaster):
+        self.broadcaster = broadcaster
+        self.loop = None
+        self.event = None
+
+    def attach(self, loop):
+        if self.loop is not None:
+            return
+        self.loop = loop
+        self.event = asyncio.Event()
+        self.broadcaster.listeners.append(lambda: loop.call_soon_threadsafe(self._wake))
+
+    def _wake(self):
+        event, self.event = self.event, asyncio.Event()
+        event.set()
+
+    async def wait(self, version, timeout):
+        event = self.event
+        if self.broadcaster.version != version:
+            return
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+leaderboard_waiters = LeaderboardWaiters(server.leaderboard_broadcaster)
+
+def header(scope, name):
+    for key, value in scope['headers']:
+        if key == name:
+            return value.decode('latin-1')
+    return ''
+
+async def read_body(receive, limit):
+    """Read the whole request body, or return None if it is larger than limit."""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        size += len(chunks[-1])
+        if size > limit:
+            return None
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+async def send_response(send, status, body, content_type='application/json', headers=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type.encode('latin-1')),
+                    (b'content-length', str(len(body)).encode('latin-1')),
+                    (b'access-control-allow-origin', b'*')] + list(headers)
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+async def send_json(send, status, data):
+    await send_response(send, status, json.dumps(data).encode('utf-8'))
+
+async def get_questions(scope, receive, send):
+    payload, encoding, etag = server.negotiate_question_payload(parse_accept_header(header(scope, b'accept-encoding')))
+    headers = [(b'etag', f'"{etag}"'.encode('latin-1')),
+               (b'vary', b'Accept-Encoding'),
+               (b'cache-control', b'no-cache')]
+    if parse_etags(header(scope, b'if-none-match')).contains(etag):
+        await send({'type': 'http.response.start', 'status': 304, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    if encoding != 'identity':
+        headers.append((b'content-encoding', encoding.encode('latin-1')))
+    await send_response(send, 200, server.question_payloads.body(payload, encoding), headers=headers)
+
+async def get_scores(scope, receive, send):
+    await send_json(send, 200, server.leaderboard_cache.top())
+
+async def submit_quiz(scope, receive, send):
+    body = await read_body(receive, ASYNC_CONFIG['max_body'])
+    if body is None:
+        await send_json(send, 413, {'error': 'Request body too large'})
+        return
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        data = None
+    result, status = await database.submit_quiz(data)
+    await send_json(send, status, result)
+
+async def get_player_scores(scope, receive, send, player_name):
+    args = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    try:
+        limit = int(args.get('limit', [server.PLAYER_SCORES_PAGE_SIZE])[0])
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        await send_json(send, 400, {'error': 'limit must be a positive integer'})
+        return
+    limit = min(limit, server.PLAYER_SCORES_MAX_PAGE_SIZE)
+    after = None
+    if args.get('cursor'):
+        try:
+            after = server.decode_score_cursor(args['cursor'][0])
+        except ValueError as e:
+            await send_json(send, 400, {'error': str(e)})
+            return
+    try:
+        page = await database.player_page(player_name, after, limit)
+    except Exception as e:
+        server.log.error("Error getting player scores: %s", e)
+        await send_json(send, 500, {'scores': [], 'nextCursor': None})
+        return
+    await send_response(send, 200, page)
+
+async def leaderboard_stream(scope, receive, send):
+    broadcaster = server.leaderboard_broadcaster
+    leaderboard_waiters.attach(asyncio.get_running_loop())
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'text/event-stream; charset=utf-8'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),
+                    (b'access-control-allow-origin', b'*')]
+    })
+
+    disconnected = asyncio.Event()
+
+    async def watch_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        disconnected.set()
+
+    watcher = asyncio.ensure_future(watch_disconnect())
+    try:
+        version, message = broadcaster.snapshot_message()
+        await send({'type': 'http.response.body', 'body': message, 'more_body': True})
+        while not disconnected.is_set():
+            await leaderboard_waiters.wait(version, broadcaster.config['heartbeat'])
+            if disconnected.is_set():
+                break
+            version, messages = broadcaster.messages_since(version)
+            body = b''.join(messages) if messages else b': keep-alive\n\n'
+            await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+    except OSError:
+        # The client went away mid-write
+        pass
+    finally:
+        watcher.cancel()
+
+flask_app = WsgiToAsgi(server.app)
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            # Flush queued scores before the worker exits
+            await database.run(server.score_ingest.stop)
+            database.executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+def timed_send(send, method, route, started):
+    """Wrap send to record request metrics when the response starts, like the Flask hooks do."""
+    async def wrapped(message):
+        if message['type'] == 'http.response.start':
+            server.http_request_seconds.observe(time.perf_counter() - started, method, route)
+            server.http_requests.inc(method, route, message['status'])
+        await send(message)
+    return wrapped
+
+async def app(scope, receive, send):
+    """ASGI application: native handlers for the hot routes, Flask for the rest."""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    started = time.perf_counter()
+    path = scope['path']
+    method = scope['method']
+    # Native routes are timed under the same route labels as the Flask rules
+    if method == 'GET':
+        if path == '/api/questions':
+            return await get_questions(scope, receive, timed_send(send, method, path, started))
+        if path == '/api/scores':
+            return await get_scores(scope, receive, timed_send(send, method, path, started))
+        if path == '/api/leaderboard/stream':
+            return await leaderboard_stream(scope, receive, timed_send(send, method, path, started))
+        if path.startswith('/api/player-scores/'):
+            # scope['path'] is already percent-decoded; like Flask's route, the name can't contain '/'
+            player_name = path[len('/api/player-scores/'):]
+            if player_name and '/' not in player_name:
+                send = timed_send(send, method, '/api/player-scores/<player_name>', started)
+                return await get_player_scores(scope, receive, send, player_name)
+    elif method == 'POST' and path == '/api/submit-quiz':
+        return await submit_quiz(scope, receive, timed_send(send, method, path, started))
+    # asgiref finds its worker-thread executor through a context variable, and
+    # uvicorn can start the next request on a keep-alive connection inside the
+    # context of the previous one, whose executor has already shut down. Give
+    # each Flask request a clean context so it doesn't pick that one up.
+    await contextvars.Context().run(asyncio.ensure_future, flask_app(scope, receive, send))
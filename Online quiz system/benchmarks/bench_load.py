@@ -0,0 +1,249 @@
+"""Throughput and latency of the quiz API under a realistic request mix.
+
+By default the app runs in-process against a fresh SQLite file. The file is
+seeded with synthetic players, scores and questions, and --concurrency
+threads each drive their own test client. With --url the same mix is sent
+over HTTP to a server that is already running (python server.py, or
+serve.py for the ASGI server); seeding is then up to that server.
+
+A "quiz" is what the browser does: POST /api/quiz-session, then POST
+/api/submit-quiz with that session's answers. The two requests are timed
+separately. Results include requests/sec and p50/p95/p99 latency per route.
+Save them with --output and line up two branches with compare.py:
+
+    python benchmarks/bench_load.py --seconds 20 --output load-main.json
+    python benchmarks/bench_load.py --mix scores=1,quiz=1 --concurrency 16
+    python benchmarks/bench_load.py --url http://127.0.0.1:5000 --output load-asgi.json
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+import results
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+# Importing server initializes a database in the working directory, so do it somewhere disposable
+os.chdir(tempfile.mkdtemp(prefix='quiz-bench-'))
+os.environ.setdefault('QUIZ_LOG_LEVEL', 'WARNING')
+import server  # noqa: E402
+
+DEFAULT_MIX = 'questions=20,quiz=20,scores=30,leaderboard=10,player_scores=20'
+QUIZ_LENGTH = 10
+
+class InProcessClient:
+    """One Flask test client per worker thread; no sockets involved."""
+
+    def __init__(self):
+        self.client = server.app.test_client()
+
+    def request(self, method, path, body=None):
+        response = self.client.open(path, method=method, json=body, headers={'Accept-Encoding': 'gzip'})
+        return response.status_code, response.get_data()
+
+class HttpClient:
+    """One keep-alive HTTP connection per worker thread."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.connection = None
+
+    def request(self, method, path, body=None):
+        headers = {'Accept-Encoding': 'gzip'}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            try:
+                self.connection.request(method, path, body=data, headers=headers)
+                response = self.connection.getresponse()
+                return response.status, response.read()
+            except (OSError, http.client.HTTPException):
+                # The server closed an idle keep-alive connection; reconnect once
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f'unknown operation {name!r}; choose from {", ".join(OPERATIONS)}')
+        mix[name] = float(weight or 1)
+    return mix
+
+def timed(samples, route, call):
+    started = time.perf_counter()
+    try:
+        status, body = call()
+    except Exception:
+        status, body = None, b''
+    samples.append((route, time.perf_counter() - started, status is not None and status < 400))
+    return status, body
+
+def op_questions(client, players, samples):
+    timed(samples, 'GET /api/questions', lambda: client.request('GET', '/api/questions'))
+
+def op_quiz(client, players, samples):
+    status, body = timed(samples, 'POST /api/quiz-session',
+                         lambda: client.request('POST', '/api/quiz-session', {'count': QUIZ_LENGTH}))
+    if status != 200:
+        return
+    session = json.loads(body)
+    submission = {
+        'playerName': random.choice(players),
+        'answers': [random.randrange(len(q['options'])) for q in session['questions']],
+        'timeTaken': random.randrange(30, 600),
+        'sessionId': session['sessionId']
+    }
+    timed(samples, 'POST /api/submit-quiz', lambda: client.request('POST', '/api/submit-quiz', submission))
+
+def op_scores(client, players, samples):
+    timed(samples, 'GET /api/scores', lambda: client.request('GET', '/api/scores'))
+
+def op_leaderboard(client, players, samples):
+    timed(samples, 'GET /leaderboard', lambda: client.request('GET', '/leaderboard'))
+
+def op_player_scores(client, players, samples):
+    path = f'/api/player-scores/{quote(random.choice(players))}?limit=50'
+    timed(samples, 'GET /api/player-scores', lambda: client.request('GET', path))
+
+OPERATIONS = {
+    'questions': op_questions,
+    'quiz': op_quiz,
+    'scores': op_scores,
+    'leaderboard': op_leaderboard,
+    'player_scores': op_player_scores
+}
+
+def make_question(i):
+    return {
+        'question': f'Synthetic question {i}?',
+        'options': [f'Answer {i}-{j}' for j in range(4)],
+        'correctAnswer': random.randrange(4),
+        'explanation': f'Explanation {i}.',
+        'tags': [f'topic{i % 20}']
+    }
+
+def seed(args, players):
+    """Fill the in-process server's fresh database with questions and scores."""
+    server.question_store.add_many([make_question(i) for i in range(args.questions)])
+    conn = sqlite3.connect(server.SQLITE_DB)
+    answers = json.dumps([0] * QUIZ_LENGTH)
+    for start in range(0, args.scores, 10000):
+        conn.executemany(server.SCORE_SQL['insert'], [(
+            random.choice(players),
+            random.randrange(0, QUIZ_LENGTH + 1) * server.POINTS_PER_QUESTION,
+            QUIZ_LENGTH,
+            random.randrange(30, 600),
+            f'2025-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}T{random.randint(0, 23):02d}:00:00',
+            answers,
+            None
+        ) for _ in range(min(10000, args.scores - start))])
+    conn.commit()
+    conn.close()
+    server.refresh_leaderboard()
+
+def run(args, mix, players):
+    make_client = (lambda: HttpClient(args.url)) if args.url else InProcessClient
+    names, weights = list(mix), list(mix.values())
+    per_thread = []
+    start_barrier = threading.Barrier(args.concurrency + 1)
+    timing = {}
+
+    def worker():
+        client = make_client()
+        samples = []
+        per_thread.append(samples)
+        start_barrier.wait()
+        while time.perf_counter() < timing['warm_until']:
+            OPERATIONS[random.choices(names, weights)[0]](client, players, [])
+        while time.perf_counter() < timing['stop_at']:
+            OPERATIONS[random.choices(names, weights)[0]](client, players, samples)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    timing['warm_until'] = time.perf_counter() + args.warmup
+    timing['stop_at'] = timing['warm_until'] + args.seconds
+    start_barrier.wait()
+    for t in threads:
+        t.join()
+
+    by_route = {}
+    for samples in per_thread:
+        for route, elapsed, ok in samples:
+            durations, errors = by_route.setdefault(route, ([], [0]))
+            durations.append(elapsed)
+            errors[0] += not ok
+
+    routes = {}
+    for route, (durations, errors) in sorted(by_route.items()):
+        routes[route] = dict(results.latency_summary(durations),
+                             requests_per_sec=round(len(durations) / args.seconds, 1),
+                             errors=errors[0])
+    total = sum(r['count'] for r in routes.values())
+    return {
+        'requests': total,
+        'requests_per_sec': round(total / args.seconds, 1),
+        'errors': sum(r['errors'] for r in routes.values()),
+        'latency': results.latency_summary([d for durations, _ in by_route.values() for d in durations]),
+        'routes': routes
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='benchmark a running server instead of an in-process app')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help=f'operation=weight list (default {DEFAULT_MIX})')
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads')
+    parser.add_argument('--seconds', type=float, default=10, help='measured duration')
+    parser.add_argument('--warmup', type=float, default=2, help='unmeasured seconds before measuring')
+    parser.add_argument('--players', type=int, default=1000)
+    parser.add_argument('--questions', type=int, default=200, help='synthetic questions added (in-process only)')
+    parser.add_argument('--scores', type=int, default=100000, help='scores seeded before the run (in-process only)')
+    parser.add_argument('--seed', type=int, default=1, help='random seed for the synthetic data and request mix')
+    parser.add_argument('--output', help='also write the JSON results to this file')
+    args = parser.parse_args()
+    mix = args.mix
+
+    random.seed(args.seed)
+    players = [f'player{i:05d}' for i in range(args.players)]
+    report = {
+        'benchmark': 'load',
+        'environment': results.environment(None if args.url else server),
+        'config': {
+            'target': args.url or 'in-process',
+            'mix': mix,
+            'concurrency': args.concurrency,
+            'seconds': args.seconds,
+            'warmup': args.warmup,
+            'players': args.players,
+            'questions': None if args.url else len(server.question_bank) + args.questions,
+            'seeded_scores': None if args.url else args.scores
+        }
+    }
+    if not args.url:
+        seed(args, players)
+    report['results'] = run(args, mix, players)
+    if not args.url:
+        server.score_ingest.stop()
+    results.emit(report, args.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""Micro-benchmarks for score grading and the leaderboard query.
+
+calculate_score is timed for a 10-question session, a 100-question session
+and a whole-bank submission, plus one 1,000-submission grade_batch call for
+the vectorised path. The leaderboard query (server.SCORE_SQL['top']) runs
+against a SQLite file with the real schema and indexes. The file grows
+through each --rows size in turn, and the cached Leaderboard.top() that
+/api/scores serves is timed alongside for comparison.
+
+    python benchmarks/bench_micro.py --output micro-main.json
+    python benchmarks/bench_micro.py --rows 10000,1000000 --skip-grading
+
+Seeding 10M rows takes about ten minutes and 2 GB of disk in the temp directory.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import results
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+# Importing server initializes a database in the working directory, so do it somewhere disposable
+os.chdir(tempfile.mkdtemp(prefix='quiz-bench-'))
+os.environ.setdefault('QUIZ_LOG_LEVEL', 'WARNING')
+import server  # noqa: E402
+
+def sample(fn, repeats, batch=1):
+    """Time fn repeats times (batch calls per timing) and return per-call durations."""
+    durations = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(batch):
+            fn()
+        durations.append((time.perf_counter() - started) / batch)
+    return durations
+
+def grading_benchmarks(args):
+    random.seed(args.seed)
+    server.question_bank.load([{
+        'id': i + 1,
+        'question': f'Question {i}?',
+        'options': ['a', 'b', 'c', 'd'],
+        'correctAnswer': random.randrange(4)
+    } for i in range(args.bank)])
+    ids = [q['id'] for q in server.question_bank.snapshot()]
+    cases = {
+        'calculate_score_10': (lambda a=[random.randrange(4) for _ in range(10)], q=random.sample(ids, 10):
+                               server.calculate_score(a, q)),
+        'calculate_score_100': (lambda a=[random.randrange(4) for _ in range(100)], q=random.sample(ids, 100):
+                                server.calculate_score(a, q)),
+        f'calculate_score_whole_bank_{args.bank}': (lambda a=[random.randrange(4) for _ in ids]:
+                                                    server.calculate_score(a))
+    }
+    report = {}
+    for name, fn in cases.items():
+        fn()  # Builds the answer key once, outside the timings
+        report[name] = results.latency_summary(sample(fn, args.repeats, batch=20))
+
+    batch = [[random.randrange(4) for _ in range(10)] for _ in range(1000)]
+    batch_ids = [random.sample(ids, 10) for _ in range(1000)]
+    durations = sample(lambda: server.grading_engine.grade_batch(batch, batch_ids), max(args.repeats // 10, 5))
+    report['grade_batch_1000x10'] = dict(results.latency_summary(durations),
+                                         submissions_per_sec=round(1000 / (sum(durations) / len(durations))))
+    return report
+
+def create_scores_db(path):
+    """An empty quiz_scores table with the schema and indexes init_db would create."""
+    conn = server.open_sqlite_connection(path)
+    conn.execute('''
+        CREATE TABLE quiz_scores (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            player_name TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            total_questions INTEGER NOT NULL,
+            time_taken INTEGER NOT NULL,
+            date_taken TEXT NOT NULL,
+            answers TEXT NOT NULL
+        )
+    ''')
+    conn.commit()
+    server.run_migrations(conn, 'sqlite')
+    return conn
+
+def grow(conn, rows, target, players):
+    answers = '[0, 1, 2, 3, 0, 1, 2, 3, 0, 1]'
+    while rows < target:
+        count = min(50000, target - rows)
+        conn.executemany(server.SCORE_SQL['insert'], [(
+            random.choice(players),
+            random.randrange(0, 11) * server.POINTS_PER_QUESTION,
+            10,
+            random.randrange(30, 1800),
+            f'2025-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}T{random.randint(0, 23):02d}:00:00',
+            answers,
+            '[1, 2, 3, 4, 5, 6, 7, 8, 9, 10]'
+        ) for _ in range(count)])
+        conn.commit()
+        rows += count
+    return rows
+
+def leaderboard_benchmarks(args):
+    random.seed(args.seed)
+    path = os.path.join(tempfile.mkdtemp(prefix='quiz-bench-'), 'scores.db')
+    conn = create_scores_db(path)
+    players = [f'player{i:06d}' for i in range(100000)]
+    report = {}
+    rows = 0
+    for target in args.rows:
+        started = time.perf_counter()
+        rows = grow(conn, rows, target, players)
+        seed_seconds = time.perf_counter() - started
+
+        # A fresh connection, as a new worker would have after a restart
+        reader = server.open_sqlite_connection(path)
+        query = server.SCORE_SQL['top']
+        started = time.perf_counter()
+        top = reader.execute(query, (server.LEADERBOARD_SIZE,)).fetchall()
+        first = time.perf_counter() - started
+        durations = sample(lambda: reader.execute(query, (server.LEADERBOARD_SIZE,)).fetchall(), args.repeats)
+        plan = ' / '.join(row[-1] for row in reader.execute('EXPLAIN QUERY PLAN ' + query, (server.LEADERBOARD_SIZE,)))
+        reader.close()
+
+        board = server.Leaderboard(server.LEADERBOARD_SIZE)
+        board.replace([{'playerName': p, 'score': s, 'totalQuestions': t, 'timeTaken': tt, 'dateTaken': d}
+                       for p, s, t, tt, d in top])
+        report[str(target)] = {
+            'seed_seconds': round(seed_seconds, 1),
+            # The file is in WAL mode, so recent pages may still be in the -wal file
+            'db_size_mb': round(sum(os.path.getsize(p) for p in (path, path + '-wal') if os.path.exists(p)) / 1e6, 1),
+            'query_plan': plan,
+            'top_query_first_ms': round(first * 1000, 3),
+            'top_query': results.latency_summary(durations),
+            'cached_top': results.latency_summary(sample(board.top, args.repeats, batch=100))
+        }
+        print(f'{target} rows: top query p50 {report[str(target)]["top_query"]["p50_ms"]} ms', file=sys.stderr)
+    conn.close()
+    for leftover in (path, path + '-wal', path + '-shm'):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=lambda s: sorted(int(n) for n in s.split(',')),
+                        default='10000,1000000,10000000', help='comma-separated table sizes for the leaderboard query')
+    parser.add_argument('--bank', type=int, default=1000, help='questions in the bank for the grading benchmarks')
+    parser.add_argument('--repeats', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--skip-grading', action='store_true')
+    parser.add_argument('--skip-leaderboard', action='store_true')
+    parser.add_argument('--output', help='also write the JSON results to this file')
+    args = parser.parse_args()
+
+    report = {
+        'benchmark': 'micro',
+        'environment': results.environment(server),
+        'config': {'rows': args.rows, 'bank': args.bank, 'repeats': args.repeats}
+    }
+    if not args.skip_grading:
+        report['grading'] = grading_benchmarks(args)
+    if not args.skip_leaderboard:
+        report['leaderboard_query'] = leaderboard_benchmarks(args)
+    results.emit(report, args.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Throughput of the bulk question import and export endpoints.
+
+Generates a synthetic bank, uploads it through POST /api/import/questions as
+NDJSON and as CSV (into a fresh SQLite database each time), then streams it
+back out through GET /api/export/questions. For comparison it also times the
+same number of single-question /api/add-question calls on a smaller sample.
+
+    python benchmarks/bench_question_import.py --questions 20000
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+# Importing server initializes a database in the working directory, so do it somewhere disposable
+os.chdir(tempfile.mkdtemp(prefix='quiz-bench-'))
+os.environ.setdefault('QUIZ_LOG_LEVEL', 'WARNING')
+import server  # noqa: E402
+
+def make_questions(count):
+    words = ['planet', 'river', 'element', 'capital', 'mammal', 'ocean', 'language', 'composer']
+    return [{
+        'question': f'Which {random.choice(words)} is number {i}?',
+        'options': [f'Option {i}-{j}' for j in range(4)],
+        'correctAnswer': random.randrange(4),
+        'explanation': f'Because of fact {i}.',
+        'tags': random.sample(words, 2)
+    } for i in range(count)]
+
+def to_ndjson(questions):
+    return ''.join(json.dumps(q) + '\n' for q in questions).encode('utf-8')
+
+def to_csv(questions):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(server.QUESTION_CSV_COLUMNS)
+    for q in questions:
+        writer.writerow([q['question']] + q['options'] + [q['correctAnswer'], q['explanation'], '|'.join(q['tags'])])
+    return buffer.getvalue().encode('utf-8')
+
+def fresh_database():
+    """Point the server at an empty database and an empty bank."""
+    server.SQLITE_DB = os.path.join(tempfile.mkdtemp(prefix='quiz-bench-'), 'bench.db')
+    # Close the pooled connections to the previous file
+    while not server.db_pool.sqlite_idle.empty():
+        server.db_pool.sqlite_idle.get_nowait().close()
+    server.init_db()
+    server.question_bank.load([])
+    server.question_store.start()
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', type=int, default=20000)
+    parser.add_argument('--single', type=int, default=500, help='questions added one request at a time for comparison')
+    args = parser.parse_args()
+
+    client = server.app.test_client()
+    questions = make_questions(args.questions)
+    results = {'questions': args.questions}
+
+    for fmt, body, content_type in (('ndjson', to_ndjson(questions), 'application/x-ndjson'),
+                                    ('csv', to_csv(questions), 'text/csv')):
+        fresh_database()
+        response, elapsed = timed(lambda: client.post(f'/api/import/questions?format={fmt}', data=body,
+                                                      content_type=content_type))
+        assert response.get_json()['imported'] == args.questions, response.get_json()
+        results[f'import_{fmt}'] = {
+            'seconds': round(elapsed, 3),
+            'questions_per_sec': round(args.questions / elapsed),
+            'mb_per_sec': round(len(body) / elapsed / 1e6, 2)
+        }
+
+        response, elapsed = timed(lambda: client.get(f'/api/export/questions?format={fmt}').get_data())
+        results[f'export_{fmt}'] = {
+            'seconds': round(elapsed, 3),
+            'questions_per_sec': round(len(server.question_bank) / elapsed)
+        }
+
+    fresh_database()
+    sample = questions[:args.single]
+    _, elapsed = timed(lambda: [client.post('/api/add-question', json=q) for q in sample])
+    results['add_question_one_by_one'] = {
+        'seconds': round(elapsed, 3),
+        'questions_per_sec': round(len(sample) / elapsed)
+    }
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Latency of the admin question search on a large synthetic bank.
+
+Builds a bank whose words follow a Zipf distribution (so some words appear in
+most questions, like real filler words), then times a mix of rare, common,
+multi-word and partial-word queries. "cold" is the first run of a query after
+the index last changed; "warm" is a repeat, as when paging or refining.
+
+    python benchmarks/bench_question_search.py --questions 100000
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+# Importing server initializes a database in the working directory, so do it somewhere disposable
+os.chdir(tempfile.mkdtemp(prefix='quiz-bench-'))
+os.environ.setdefault('QUIZ_LOG_LEVEL', 'WARNING')
+import server  # noqa: E402
+
+def make_bank(count, vocabulary_size):
+    random.seed(1)
+    vocabulary = [''.join(random.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(random.randint(3, 9)))
+                  for _ in range(vocabulary_size)]
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(vocabulary_size)))
+
+    def words(n):
+        return ' '.join(random.choices(vocabulary, cum_weights=cumulative, k=n))
+
+    questions = [{
+        'id': i + 1,
+        'question': f'What is {words(8)}?',
+        'options': [words(2) for _ in range(4)],
+        'correctAnswer': random.randrange(4),
+        'explanation': words(12),
+        'tags': [random.choice(vocabulary[:50])]
+    } for i in range(count)]
+    return vocabulary, questions
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', type=int, default=100000)
+    parser.add_argument('--vocabulary', type=int, default=30000)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    vocabulary, questions = make_bank(args.questions, args.vocabulary)
+    server.question_bank.load(questions)
+    started = time.perf_counter()
+    server.question_search._ensure_built()
+    results = {'questions': args.questions, 'index_build_seconds': round(time.perf_counter() - started, 2), 'queries': {}}
+
+    queries = {
+        'rare_word': vocabulary[5000],
+        'mid_word': vocabulary[100],
+        'common_word': vocabulary[0],
+        'two_rare_words': f'{vocabulary[500]} {vocabulary[700]}',
+        'rare_and_common': f'{vocabulary[3000]} {vocabulary[0]}',
+        'two_common_words': f'{vocabulary[1]} {vocabulary[2]}',
+        'partial_word': vocabulary[2000][:3],
+        'words_and_partial': f'{vocabulary[10]} {vocabulary[20]} {vocabulary[30][:3]}'
+    }
+    for name, query in queries.items():
+        started = time.perf_counter()
+        total, _ = server.question_search.search(query)
+        cold = time.perf_counter() - started
+        warm = []
+        for page in range(args.repeats):
+            started = time.perf_counter()
+            server.question_search.search(query, offset=20 * (page % 5))
+            warm.append(time.perf_counter() - started)
+        results['queries'][name] = {
+            'query': query,
+            'matches': total,
+            'cold_ms': round(cold * 1000, 2),
+            'warm_p50_ms': round(percentile(warm, 0.5) * 1000, 3),
+            'warm_p95_ms': round(percentile(warm, 0.95) * 1000, 3)
+        }
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
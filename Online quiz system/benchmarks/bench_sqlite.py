@@ -0,0 +1,124 @@
+"""Concurrent read/write throughput of the SQLite fallback, before and after the tuning profile.
+
+Runs reader threads on the leaderboard query and writer threads on batched
+score inserts, the way the ingest queue writes them (SCORE_SQL['insert_once']
+through executemany, one commit per batch). The fresh database file has the
+real schema, migrations included, and the run is done once with SQLite's
+defaults and once with server.SQLITE_PROFILE.
+
+    python benchmarks/bench_sqlite.py --readers 8 --writers 4 --seconds 5
+"""
+import argparse
+import json
+import os
+import random
+import secrets
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+# Importing server initializes a database in the working directory, so do it somewhere disposable
+os.chdir(tempfile.mkdtemp(prefix='quiz-bench-'))
+os.environ.setdefault('QUIZ_LOG_LEVEL', 'WARNING')
+import server  # noqa: E402
+
+def seed(path, rows):
+    """A quiz_scores table with the schema and indexes init_db would create, plus rows."""
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE quiz_scores (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            player_name TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            total_questions INTEGER NOT NULL,
+            time_taken INTEGER NOT NULL,
+            date_taken TEXT NOT NULL,
+            answers TEXT NOT NULL
+        )
+    ''')
+    conn.commit()
+    server.run_migrations(conn, 'sqlite')
+    conn.executemany(server.SCORE_SQL['insert_once'], [
+        (f'player{i}', random.randrange(0, 110, 10), 10, random.randrange(30, 1800), '2025-01-01T00:00:00', '[]',
+         None, None)
+        for i in range(rows)
+    ])
+    conn.commit()
+    conn.close()
+
+def run(profile, args):
+    path = os.path.join(tempfile.mkdtemp(prefix='quiz-bench-'), 'bench.db')
+    seed(path, args.rows)
+    # Like init_db, open one connection first so the journal mode is switched before the threads start
+    server.open_sqlite_connection(path, profile).close()
+    counts = {'reads': 0, 'writes': 0, 'locked': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.seconds
+
+    def reader():
+        conn = server.open_sqlite_connection(path, profile)
+        done = 0
+        while time.monotonic() < deadline:
+            try:
+                conn.execute(server.SCORE_SQL['top'], (10,)).fetchall()
+                done += 1
+            except sqlite3.OperationalError:
+                with lock:
+                    counts['locked'] += 1
+        with lock:
+            counts['reads'] += done
+
+    def writer():
+        conn = server.open_sqlite_connection(path, profile)
+        done = 0
+        while time.monotonic() < deadline:
+            try:
+                conn.executemany(server.SCORE_SQL['insert_once'], [(
+                    'bench', random.randrange(0, 110, 10), 10, random.randrange(30, 1800),
+                    '2025-01-01T00:00:00', '[0, 1, 2, 3]', '[1, 2, 3, 4]', secrets.token_hex(8)
+                ) for _ in range(args.batch_size)])
+                conn.commit()
+                done += args.batch_size
+            except sqlite3.OperationalError:
+                conn.rollback()
+                with lock:
+                    counts['locked'] += 1
+        with lock:
+            counts['writes'] += done
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer) for _ in range(args.writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return {
+        'reads_per_sec': round(counts['reads'] / args.seconds, 1),
+        'writes_per_sec': round(counts['writes'] / args.seconds, 1),
+        'locked_errors': counts['locked']
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--rows', type=int, default=10000, help='rows seeded before the run')
+    parser.add_argument('--batch-size', type=int, default=server.INGEST_CONFIG['batch_size'],
+                        help='scores per writer transaction (default: the ingest queue batch size)')
+    args = parser.parse_args()
+
+    results = {
+        'default': run({'enabled': False}, args),
+        'tuned': run(server.SQLITE_PROFILE, args)
+    }
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Compare two benchmark result files, e.g. from two branches.
+
+Lines up every latency and throughput figure the two files share and prints
+the change. For latencies a positive change is slower; for throughput it is
+faster.
+
+    git checkout main && python benchmarks/bench_load.py --output main.json
+    git checkout my-branch && python benchmarks/bench_load.py --output branch.json
+    python benchmarks/compare.py main.json branch.json
+"""
+import argparse
+import json
+
+# Leaf keys worth comparing; higher is better for the throughput ones
+LATENCY_KEYS = ('p50_ms', 'p95_ms', 'p99_ms', 'mean_ms', 'cold_ms', 'warm_p50_ms', 'warm_p95_ms', 'seconds')
+THROUGHPUT_KEYS = ('requests_per_sec', 'questions_per_sec', 'submissions_per_sec', 'reads_per_sec', 'writes_per_sec')
+
+def flatten(data, prefix=''):
+    """Yield (dotted path, value) for every numeric leaf."""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from flatten(value, f'{prefix}.{key}' if prefix else key)
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        yield prefix, data
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('base')
+    parser.add_argument('candidate')
+    parser.add_argument('--all', action='store_true', help='also list figures that changed by less than 5%%')
+    args = parser.parse_args()
+
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.candidate, encoding='utf-8') as f:
+        candidate = json.load(f)
+    for name, data in (('base', base), ('candidate', candidate)):
+        env = data.get('environment', {})
+        print(f"{name:>9}: {env.get('git_branch')} {str(env.get('git_commit'))[:10]}"
+              f"{' (dirty)' if env.get('git_dirty') else ''} {env.get('date')}")
+
+    base_values = dict(flatten({k: v for k, v in base.items() if k not in ('environment', 'config')}))
+    rows = []
+    for path, value in flatten({k: v for k, v in candidate.items() if k not in ('environment', 'config')}):
+        key = path.rsplit('.', 1)[-1]
+        if key not in LATENCY_KEYS + THROUGHPUT_KEYS or not base_values.get(path):
+            continue
+        change = (value - base_values[path]) / base_values[path] * 100
+        better = change < 0 if key in LATENCY_KEYS else change > 0
+        if args.all or abs(change) >= 5:
+            verdict = 'better' if better else 'worse'
+            rows.append(f'{path:<60} {base_values[path]:>12g} {value:>12g} {change:>+8.1f}%  {verdict}')
+    print(f"\n{'figure':<60} {'base':>12} {'candidate':>12} {'change':>9}")
+    print('\n'.join(rows) if rows else 'No figure changed by 5% or more.')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Shared result handling for the benchmark scripts.
+
+Every result file records the environment it was measured in (git commit,
+Python, database backend, NumPy) next to the numbers, so files from two
+branches can be lined up with compare.py.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The scripts move into a scratch directory before importing server, so
+# relative --output paths are resolved against where they were started
+LAUNCH_DIR = os.getcwd()
+
+def git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=SERVER_DIR, capture_output=True, text=True,
+                              timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def environment(server=None):
+    """Describe where the numbers came from."""
+    env = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git('rev-parse', 'HEAD'),
+        'git_branch': git('rev-parse', '--abbrev-ref', 'HEAD'),
+        'git_dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count()
+    }
+    if server is not None:
+        env['backend'] = 'mysql' if server.using_mysql else 'sqlite'
+        env['numpy'] = server.NUMPY_AVAILABLE
+    return env
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def latency_summary(seconds):
+    """Summarise a list of durations in seconds as milliseconds."""
+    values = sorted(seconds)
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 4)
+
+    return {
+        'count': len(values),
+        'mean_ms': ms(sum(values) / len(values)) if values else None,
+        'p50_ms': ms(percentile(values, 0.50)),
+        'p95_ms': ms(percentile(values, 0.95)),
+        'p99_ms': ms(percentile(values, 0.99)),
+        'max_ms': ms(values[-1]) if values else None
+    }
+
+def emit(results, output=None):
+    """Print the results as JSON and, with output, also write them to that file."""
+    text = json.dumps(results, indent=2)
+    print(text)
+    if output:
+        output = os.path.join(LAUNCH_DIR, output)
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f'Results written to {output}', file=sys.stderr)
@@ -0,0 +1,62 @@
+"""Export the quiz_scores table as CSV or NDJSON for offline analytics.
+
+Streams rows in fetchmany batches, so memory use doesn't grow with the
+table. Uses the same database settings as server.py (MySQL if available,
+otherwise the SQLite fallback), and works from the script's directory like
+serve.py, so it reads the server's quiz.db wherever it is run from.
+
+    python export_scores.py --format ndjson --from 2025-01-01 --to 2025-02-01 -o january.ndjson
+    python export_scores.py --player Atul --gzip -o atul.csv.gz
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Export quiz scores as CSV or NDJSON.')
+    parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv')
+    parser.add_argument('--from', dest='date_from', help='only scores on or after this ISO date')
+    parser.add_argument('--to', dest='date_to', help='only scores before this ISO date')
+    parser.add_argument('--player', help='only scores for this player')
+    parser.add_argument('--gzip', action='store_true', help='gzip the output')
+    parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    args = parser.parse_args()
+    for value in (args.date_from, args.date_to):
+        if value:
+            try:
+                datetime.fromisoformat(value)
+            except ValueError:
+                parser.error(f'invalid date: {value}')
+    return args
+
+def main():
+    args = parse_args()
+    # Open the output before changing directory so a relative -o is where the caller meant
+    out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+
+    # server.py keeps quiz.db and its state files next to itself
+    os.chdir(HERE)
+    import server
+
+    if not server.db_initialized:
+        print('Database not available', file=sys.stderr)
+        return 1
+    conn = server.get_db_connection()
+    chunks = server.iter_score_export(conn, args.format, args.date_from, args.date_to, args.player)
+    if args.gzip:
+        for data in server.gzip_stream(chunks):
+            out.write(data)
+    else:
+        for chunk in chunks:
+            out.write(chunk.encode('utf-8'))
+
+    out.flush()
+    if args.output:
+        out.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
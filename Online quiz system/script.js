@@ -55,6 +55,8 @@ let isQuizSubmitted = false;
 let playerName = '';
 let startTime = null;
 let quizQuestions = []; // Will hold the questions once loaded
+let quizSessionId = null; // Server-side quiz session the questions came from
+let submissionId = null; // Kept across submit attempts so the server stores the quiz once
 
 // DOM Elements
 const startQuizBtn = document.getElementById('startQuiz');
@@ -141,22 +143,30 @@ function startTimer() {
 
 async function loadQuestions() {
     try {
-        console.log("Attempting to load questions from API...");
+        console.log("Attempting to start a quiz session from API...");
         
         // Get the API URL based on the current hostname
         const apiUrl = window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1' 
-            ? `http://${window.location.hostname}:5000/api/questions`
-            : '/api/questions';
+            ? `http://${window.location.hostname}:5000/api/quiz-session`
+            : '/api/quiz-session';
             
-        console.log(`Fetching questions from: ${apiUrl}`);
+        console.log(`Requesting quiz session from: ${apiUrl}`);
         
-        const response = await fetch(apiUrl);
+        // The server picks the questions and keeps the answers until submission
+        const response = await fetch(apiUrl, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ count: 10 })
+        });
         
         if (!response.ok) {
             throw new Error(`Server responded with ${response.status}: ${response.statusText}`);
         }
         
-        const data = await response.json();
+        const session = await response.json();
+        const data = session && session.questions;
         
         if (!data || !Array.isArray(data) || data.length === 0) {
             throw new Error('Invalid questions data received from server');
@@ -164,9 +174,18 @@ async function loadQuestions() {
         
         console.log(`Successfully loaded ${data.length} questions from API`);
         quizQuestions = data;
+        quizSessionId = session.sessionId;
+        
+        // The server times the quiz from now and refuses late submissions, so follow its clock
+        startTime = Date.now();
+        localStorage.setItem('quizStartTime', startTime);
+        if (session.timeLimit) {
+            quizConfig.timeLimit = session.timeLimit;
+            timeLeft = session.timeLimit;
+        }
         
-        // Update the total questions count based on actual available questions
-        quizConfig.totalQuestions = Math.min(data.length, 10); // Use all questions up to 10 max
+        // Update the total questions count based on the questions in this session
+        quizConfig.totalQuestions = data.length;
         console.log(`Quiz will use ${quizConfig.totalQuestions} questions`);
         
         // Initialize userAnswers array with the correct length
@@ -177,6 +196,7 @@ async function loadQuestions() {
         console.error('Error loading questions from API:', error);
         console.log('Using fallback questions instead');
         quizQuestions = fallbackQuestions;
+        quizSessionId = null;
         quizConfig.totalQuestions = fallbackQuestions.length;
         userAnswers = new Array(quizConfig.totalQuestions).fill(null);
         return fallbackQuestions;
@@ -450,17 +470,38 @@ function showQuizResults(finalScore, message) {
     });
 }
 
+// POST JSON, retrying with a growing delay on network errors and on 409/5xx replies
+async function postWithRetry(url, payload, attempts = 3) {
+    for (let attempt = 1; ; attempt++) {
+        try {
+            const response = await fetch(url, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify(payload)
+            });
+            if ((response.status < 500 && response.status !== 409) || attempt === attempts) {
+                return response;
+            }
+            console.warn(`Submission attempt ${attempt} failed with status ${response.status}, retrying`);
+        } catch (error) {
+            if (attempt === attempts) throw error;
+            console.warn(`Submission attempt ${attempt} failed, retrying:`, error);
+        }
+        await new Promise(resolve => setTimeout(resolve, 500 * 2 ** (attempt - 1)));
+    }
+}
+
 async function submitQuiz() {
     if (isQuizSubmitted) return;
     
     clearInterval(timer);
     isQuizSubmitted = true;
     
-    // Calculate time taken
-    const timeTaken = Math.floor((Date.now() - startTime) / 1000);
-    
-    // Calculate score locally as backup
-    const localScore = calculateLocalScore();
+    // Only the fallback questions carry their answers, so only they can be scored locally;
+    // a session quiz is graded by the server or not at all
+    const localScore = quizSessionId ? null : calculateLocalScore();
     
     // Update UI to show processing
     if (submitQuizBtn) {
@@ -476,17 +517,19 @@ async function submitQuiz() {
             
         console.log(`Submitting quiz to: ${apiUrl}`);
         
+        // One id for every attempt, so the server stores this submission once however often it is retried
+        if (!submissionId) {
+            submissionId = window.crypto && crypto.randomUUID
+                ? crypto.randomUUID()
+                : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+        }
+        
         // Submit score to backend
-        const response = await fetch(apiUrl, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                playerName: playerName,
-                answers: userAnswers,
-                timeTaken: timeTaken
-            })
+        const response = await postWithRetry(apiUrl, {
+            playerName: playerName,
+            answers: userAnswers,
+            sessionId: quizSessionId,
+            submissionId: submissionId
         });
         
         let result;
@@ -496,6 +539,7 @@ async function submitQuiz() {
             result = await response.json();
         } catch (parseError) {
             console.error('Error parsing JSON response:', parseError);
+            if (localScore === null) throw parseError;
             // Use local score instead of throwing an error
             result = {
                 score: localScore,
@@ -505,6 +549,9 @@ async function submitQuiz() {
         
         // Check for errors in the response
         if (!response.ok) {
+            if (localScore === null) {
+                throw new Error(result.error || `Server responded with ${response.status}`);
+            }
             console.warn('Server returned error, using local score instead');
             // Still show results but use local score
             result = {
@@ -513,15 +560,32 @@ async function submitQuiz() {
             };
         }
         
+        // Session questions arrive without answers; fill them in for the review screen
+        if (Array.isArray(result.results)) {
+            result.results.forEach((answerKey, index) => {
+                if (quizQuestions[index] && quizQuestions[index].id === answerKey.id) {
+                    quizQuestions[index].correctAnswer = answerKey.correctAnswer;
+                    quizQuestions[index].explanation = answerKey.explanation;
+                }
+            });
+        }
+        
         // Clear saved data
         localStorage.removeItem('quizStartTime');
         localStorage.removeItem('playerName');
         
         // Show results using server-provided score or local score if there was an error
-        showQuizResults(result.score || localScore, result.message || 'Quiz submitted successfully!');
+        showQuizResults(typeof result.score === 'number' ? result.score : localScore, result.message || 'Quiz submitted successfully!');
     } catch (error) {
         console.error('Error submitting quiz:', error);
         
+        if (localScore === null) {
+            // Nothing to score it with here; keep the answers so the player can submit again
+            isQuizSubmitted = false;
+            alert(`Your quiz could not be submitted (${error.message}). Your answers are kept, press Submit Quiz to try again.`);
+            return;
+        }
+        
         // Show results using local score calculation in case of error
         showQuizResults(localScore, 'An error occurred while submitting the quiz. Please try again later.');
     } finally {
@@ -0,0 +1,42 @@
+"""Production launcher for the quiz server.
+
+Runs asgi.py under uvicorn with debug off. Hot routes are served from the
+event loop and everything else through the Flask app.
+
+    python serve.py --host 0.0.0.0 --port 5000
+
+The server runs as a single process. Quiz sessions, the submission ledger
+and the leaderboard cache live in its memory, so there is no option for
+more worker processes.
+"""
+import argparse
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Serve the quiz API for production.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--log-level', default='warning', choices=['critical', 'error', 'warning', 'info', 'debug'])
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        print('uvicorn is not installed; run: pip install uvicorn asgiref', file=sys.stderr)
+        return 1
+
+    # server.py keeps quiz.db and its logs next to itself
+    os.chdir(HERE)
+    # Apply the level to the quiz server's own log too
+    os.environ.setdefault('QUIZ_LOG_LEVEL', args.log_level.upper())
+    uvicorn.run('asgi:app', host=args.host, port=args.port,
+                log_level=args.log_level, app_dir=HERE, access_log=False)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
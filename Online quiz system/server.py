@@ -1,25 +1,438 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, g, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
+import atexit
+import array
+import base64
+import bisect
+import collections
+import csv
+import gzip
+import hashlib
+import heapq
+import hmac
+import html
+import io
 import json
+import logging
+import math
 from datetime import datetime
 import os
+import queue
+import random
+import re
+import secrets
+import struct
+import sys
+import threading
+import time
+import zlib
 import sqlite3  # Fallback to SQLite if MySQL fails
 
+# Logging: startup and errors at INFO/ERROR, per-request detail at DEBUG.
+# Messages use %-style arguments, which are only formatted if the record is
+# emitted, so a disabled level costs one level check per call.
+LOG_CONFIG = {
+    'level': os.environ.get('QUIZ_LOG_LEVEL', 'INFO').upper(),
+    'format': os.environ.get('QUIZ_LOG_FORMAT', 'text')  # 'text', or 'json' for one object per line
+}
+
+class JsonLogFormatter(logging.Formatter):
+    """Format each record as one JSON object, including any extra= fields."""
+
+    STANDARD_FIELDS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in self.STANDARD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def configure_logging(config):
+    logger = logging.getLogger('quiz')
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        if config['format'] == 'json':
+            handler.setFormatter(JsonLogFormatter())
+        else:
+            handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+        logger.addHandler(handler)
+        # Don't print twice when the host (e.g. uvicorn) configures the root logger
+        logger.propagate = False
+    logger.setLevel(config['level'])
+    return logger
+
+log = configure_logging(LOG_CONFIG)
+
 # Try to import MySQL connector, but handle if it's not available
 try:
     import mysql.connector
     from mysql.connector import Error
     MYSQL_AVAILABLE = True
 except ImportError:
-    print("MySQL connector not available. Will use SQLite as fallback.")
+    log.info("MySQL connector not available. Will use SQLite as fallback.")
     MYSQL_AVAILABLE = False
 
+# NumPy is optional; batch grading falls back to plain Python without it
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Brotli is optional; /api/questions falls back to gzip without it
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# fcntl (POSIX only) lets each process lock its own score log and state files
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
 # Initialize Flask app
 app = Flask(__name__, static_folder='.')
 CORS(app)
 
-# For debugging
-app.config['DEBUG'] = True
+# Latency histogram buckets in seconds, shared by request and query timings
+METRICS_CONFIG = {
+    'buckets': (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+}
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in values)
+    return '{' + ','.join(f'{n}="{v}"' for n, v in zip(names, escaped)) + '}'
+
+class Counter:
+    """A monotonically increasing count per label combination."""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            values = dict(self.values)
+        for label_values, value in sorted(values.items()):
+            yield self.name + format_labels(self.labels, label_values), value
+
+class Histogram:
+    """Bucketed observations per label combination, in the Prometheus layout."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=METRICS_CONFIG['buckets']):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket..., count above the last bucket, sum]
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self.lock:
+            snapshot = {labels: list(series) for labels, series in self.series.items()}
+        names = self.labels + ('le',)
+        for label_values, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series):
+                cumulative += count
+                yield self.name + '_bucket' + format_labels(names, label_values + (bound,)), cumulative
+            yield self.name + '_sum' + format_labels(self.labels, label_values), series[-1]
+            yield self.name + '_count' + format_labels(self.labels, label_values), cumulative
+
+class CallbackMetric:
+    """A gauge or counter read from existing state when /metrics is scraped.
+
+    read() returns a number, or a dict of label value tuples to numbers.
+    """
+
+    def __init__(self, name, help_text, read, kind='gauge', labels=()):
+        self.name = name
+        self.help = help_text
+        self.read = read
+        self.kind = kind
+        self.labels = labels
+
+    def samples(self):
+        value = self.read()
+        if not isinstance(value, dict):
+            value = {(): value}
+        for label_values, number in sorted(value.items()):
+            yield self.name + format_labels(self.labels, label_values), number
+
+class MetricsRegistry:
+    """The metrics served by /metrics, in the Prometheus text format."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            try:
+                lines.extend(f'{name} {value!r}' if isinstance(value, float) else f'{name} {value}'
+                             for name, value in metric.samples())
+            except Exception as e:
+                log.warning("Error reading metric %s: %s", metric.name, e)
+        return '\n'.join(lines) + '\n'
+
+metrics = MetricsRegistry()
+http_request_seconds = metrics.register(Histogram(
+    'quiz_http_request_duration_seconds', 'Time to produce a response (streamed bodies excluded).',
+    ('method', 'route')))
+http_requests = metrics.register(Counter(
+    'quiz_http_requests_total', 'Responses sent, by status code.', ('method', 'route', 'status')))
+db_query_seconds = metrics.register(Histogram(
+    'quiz_db_query_duration_seconds', 'Score and question storage operations, by backend.', ('backend', 'query')))
+fallbacks = metrics.register(Counter(
+    'quiz_fallbacks_total', 'Times a request fell back to a secondary store or the built-in questions.', ('kind',)))
+duplicate_submissions = metrics.register(Counter(
+    'quiz_duplicate_submissions_total', 'Retried submissions answered from an earlier attempt, by where it was found.',
+    ('source',)))
+
+# Opt-in request profiling. Off unless a sample rate or an admin token is set.
+PROFILE_CONFIG = {
+    'sample_rate': float(os.environ.get('QUIZ_PROFILE_SAMPLE_RATE', '0')),  # Fraction of requests to profile
+    'admin_token': os.environ.get('QUIZ_PROFILE_TOKEN'),  # Requests sending "X-Profile: <token>" are always profiled
+    'interval': 0.001,        # Seconds between stack samples of a profiled request
+    'output_dir': 'profiles',
+    'write_interval': 10.0,   # Seconds between rewrites of the output files while profiling
+    'slowest': 20,            # Sampled requests kept for the slowest-requests report
+    'breakdown': 10           # Functions listed per request in that report
+}
+
+# Frames from these packages are request plumbing; the per-request breakdown skips them
+PROFILE_PLUMBING = tuple(os.path.dirname(module.__file__) + os.sep
+                         for module in (sys.modules['flask'], sys.modules['werkzeug']))
+
+def flame_graph_svg(stacks, title, width=1200, row_height=16):
+    """Render collapsed stacks ({'a;b;c': count}) as a static SVG flame graph."""
+    root = {'count': 0, 'children': {}}
+    for stack, count in stacks.items():
+        node = root
+        node['count'] += count
+        for frame in stack.split(';'):
+            node = node['children'].setdefault(frame, {'count': 0, 'children': {}})
+            node['count'] += count
+    total = root['count'] or 1
+    rects = []
+    depth_max = 0
+
+    def place(children, x, depth):
+        nonlocal depth_max
+        for name, node in sorted(children.items()):
+            w = node['count'] / total * width
+            if w >= 0.5:
+                depth_max = max(depth_max, depth)
+                rects.append((x, depth, w, name, node['count']))
+                place(node['children'], x, depth + 1)
+            x += w
+
+    place(root['children'], 0.0, 0)
+    height = (depth_max + 1) * row_height + 30
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="monospace" font-size="11">',
+             f'<text x="4" y="16">{html.escape(title)} ({total} samples)</text>']
+    for x, depth, w, name, count in rects:
+        y = height - (depth + 1) * row_height
+        hue = zlib.crc32(name.encode('utf-8')) % 40
+        label = html.escape(name)
+        chars = int((w - 6) / 6.6)
+        text = html.escape(name[:chars - 2] + '..' if len(name) > chars else name) if chars >= 3 else ''
+        parts.append(f'<g><title>{label} ({count} samples, {count / total:.1%})</title>'
+                     f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{row_height - 1}" fill="hsl({hue + 10},90%,{55 + hue % 10}%)"/>'
+                     f'<text x="{x + 3:.1f}" y="{y + row_height - 4}">{text}</text></g>')
+    parts.append('</svg>')
+    return '\n'.join(parts)
+
+class RequestProfiler:
+    """Sample the Python stacks of selected requests from a background thread.
+
+    While a profiled request runs, a sampler thread reads its stack every
+    'interval' seconds from sys._current_frames(), so the request itself
+    runs uninstrumented. Samples are aggregated per route into collapsed
+    stacks (the flamegraph.pl input format) and SVG flame graphs under
+    'output_dir', and the slowest sampled requests are kept with a
+    breakdown of where their time went.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.active = {}          # thread ident -> Counter of collapsed stacks
+        self.routes = {}          # route -> Counter of collapsed stacks
+        self.requests = {}        # route -> sampled request count
+        self.slowest = []         # min-heap of (duration, seq, report)
+        self.seq = 0
+        self.dirty = False
+        self.labels = {}          # code object -> frame label
+        self.plumbing = set()     # labels of PROFILE_PLUMBING frames
+        self.thread = None
+
+    @property
+    def enabled(self):
+        return self.config['sample_rate'] > 0 or bool(self.config['admin_token'])
+
+    def wants(self, headers):
+        """Decide whether to profile a request."""
+        token = self.config['admin_token']
+        if token and headers.get('X-Profile') == token:
+            return True
+        rate = self.config['sample_rate']
+        return rate > 0 and random.random() < rate
+
+    def begin(self):
+        with self.lock:
+            self.active[threading.get_ident()] = collections.Counter()
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+                self.thread.start()
+        self.wakeup.set()
+
+    def end(self, method, route, duration):
+        with self.lock:
+            stacks = self.active.pop(threading.get_ident(), None)
+        if stacks is None:
+            return
+        key = f'{method} {route}'
+        with self.lock:
+            report = {
+                'route': key,
+                'durationMs': round(duration * 1000, 2),
+                'samples': sum(stacks.values()),
+                'at': datetime.now().isoformat(),
+                'breakdown': self._breakdown(stacks, duration)
+            }
+            self.routes.setdefault(key, collections.Counter()).update(stacks)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.seq += 1
+            entry = (duration, self.seq, report)
+            if len(self.slowest) < self.config['slowest']:
+                heapq.heappush(self.slowest, entry)
+            elif duration > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, entry)
+            self.dirty = True
+
+    def _label(self, code):
+        label = self.labels.get(code)
+        if label is None:
+            name = getattr(code, 'co_qualname', code.co_name)
+            label = self.labels[code] = f'{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+            if code.co_filename.startswith(PROFILE_PLUMBING):
+                self.plumbing.add(label)
+        return label
+
+    def _collapse(self, frame):
+        frames = []
+        while frame is not None:
+            frames.append(frame.f_code)
+            frame = frame.f_back
+        return ';'.join(self._label(code) for code in reversed(frames))
+
+    def _breakdown(self, stacks, duration):
+        """Time per function for one request, counting each function once per sample. Called with the lock held."""
+        total = sum(stacks.values())
+        inclusive = collections.Counter()
+        for stack, count in stacks.items():
+            frames = stack.split(';')
+            # Frames above the first Flask/Werkzeug frame are the server's own loop, not this request
+            start = next((i for i, f in enumerate(frames) if f in self.plumbing), 0)
+            for frame in set(frames[start:]) - self.plumbing:
+                inclusive[frame] += count
+        return [{
+            'function': frame,
+            'ms': round(count / total * duration * 1000, 2),
+            'share': round(count / total, 3)
+        } for frame, count in inclusive.most_common(self.config['breakdown'])]
+
+    def _run(self):
+        next_write = time.monotonic() + self.config['write_interval']
+        while True:
+            if not self.active:
+                self.wakeup.wait(self.config['write_interval'])
+                self.wakeup.clear()
+            else:
+                time.sleep(self.config['interval'])
+            frames = sys._current_frames()
+            with self.lock:
+                for ident, stacks in self.active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        stacks[self._collapse(frame)] += 1
+            del frames
+            if self.dirty and time.monotonic() >= next_write:
+                self.write_files()
+                next_write = time.monotonic() + self.config['write_interval']
+
+    def report(self):
+        with self.lock:
+            slowest = [report for _, _, report in sorted(self.slowest, reverse=True)]
+            routes = {route: {'requests': count, 'samples': sum(self.routes[route].values())}
+                      for route, count in self.requests.items()}
+        return {'routes': routes, 'slowest': slowest}
+
+    def write_files(self):
+        """Write <route>.collapsed, <route>.svg and slowest.json under output_dir."""
+        with self.lock:
+            if not self.dirty:
+                return
+            self.dirty = False
+            routes = {route: dict(stacks) for route, stacks in self.routes.items()}
+        try:
+            os.makedirs(self.config['output_dir'], exist_ok=True)
+            for route, stacks in routes.items():
+                name = re.sub(r'[^A-Za-z0-9_.-]+', '_', route).strip('_')
+                path = os.path.join(self.config['output_dir'], name)
+                with open(path + '.collapsed', 'w', encoding='utf-8') as f:
+                    f.writelines(f'{stack} {count}\n' for stack, count in sorted(stacks.items()))
+                with open(path + '.svg', 'w', encoding='utf-8') as f:
+                    f.write(flame_graph_svg(stacks, route))
+            with open(os.path.join(self.config['output_dir'], 'slowest.json'), 'w', encoding='utf-8') as f:
+                json.dump(self.report()['slowest'], f, indent=2)
+        except Exception as e:
+            log.error("Error writing request profiles: %s", e)
+
+request_profiler = RequestProfiler(PROFILE_CONFIG)
+atexit.register(request_profiler.write_files)
 
 # Database configuration
 DB_CONFIG = {
@@ -32,8 +445,97 @@ DB_CONFIG = {
 # Fallback SQLite database
 SQLITE_DB = 'quiz.db'
 
+# SQLite performance profile applied to every connection we open
+SQLITE_PROFILE = {
+    'enabled': True,
+    'journal_mode': 'WAL',       # Readers no longer block behind writers
+    'synchronous': 'NORMAL',     # Safe with WAL; only the last commits can be lost on power failure
+    'busy_timeout': 5000,        # Milliseconds to wait on a lock instead of failing with "database is locked"
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,        # Negative means KiB, so about 64 MB of page cache
+    'cached_statements': 256     # Per-connection prepared statement cache
+}
+
+def open_sqlite_connection(path=None, profile=None, check_same_thread=True):
+    """Open a SQLite connection with the performance profile applied.
+
+    Pass check_same_thread=False for a connection that will be handed
+    between threads (one at a time), as the pool does.
+    """
+    path = path or SQLITE_DB
+    profile = profile or SQLITE_PROFILE
+    if not profile['enabled']:
+        return sqlite3.connect(path, check_same_thread=check_same_thread)
+    
+    conn = sqlite3.connect(
+        path,
+        timeout=profile['busy_timeout'] / 1000,
+        cached_statements=profile['cached_statements'],
+        check_same_thread=check_same_thread
+    )
+    # Changing the journal mode needs an exclusive lock, so only do it when it differs
+    current_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+    if current_mode.lower() != profile['journal_mode'].lower():
+        conn.execute(f"PRAGMA journal_mode={profile['journal_mode']}")
+    conn.execute(f"PRAGMA synchronous={profile['synchronous']}")
+    conn.execute(f"PRAGMA busy_timeout={int(profile['busy_timeout'])}")
+    conn.execute(f"PRAGMA mmap_size={int(profile['mmap_size'])}")
+    conn.execute(f"PRAGMA cache_size={int(profile['cache_size'])}")
+    return conn
+
+# Fixed score statements. Keeping them constant lets SQLite's per-connection
+# statement cache reuse the compiled statement on every request.
+SCORE_SQL = {
+    'insert': '''
+        INSERT INTO quiz_scores 
+        (player_name, score, total_questions, time_taken, date_taken, answers, question_ids)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''',
+    # A retried submission hits the unique submission_id index and is dropped
+    'insert_once': '''
+        INSERT OR IGNORE INTO quiz_scores
+        (player_name, score, total_questions, time_taken, date_taken, answers, question_ids, submission_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''',
+    'by_submission': '''
+        SELECT score, total_questions, question_ids
+        FROM quiz_scores
+        WHERE submission_id = ?
+    ''',
+    'top': '''
+        SELECT player_name, score, total_questions, time_taken, date_taken
+        FROM quiz_scores
+        ORDER BY score DESC, time_taken IS NULL, time_taken ASC
+        LIMIT ?
+    ''',
+    'player_page': '''
+        SELECT id, score, total_questions, time_taken, date_taken
+        FROM quiz_scores
+        WHERE player_name = ?
+        ORDER BY date_taken DESC, id DESC
+        LIMIT ?
+    ''',
+    'player_page_after': '''
+        SELECT id, score, total_questions, time_taken, date_taken
+        FROM quiz_scores
+        WHERE player_name = ? AND (date_taken < ? OR (date_taken = ? AND id < ?))
+        ORDER BY date_taken DESC, id DESC
+        LIMIT ?
+    '''
+}
+MYSQL_SCORE_SQL = {name: query.replace('?', '%s').replace('INSERT OR IGNORE', 'INSERT IGNORE')
+                   for name, query in SCORE_SQL.items()}
+
+def score_sql(name, backend):
+    """Return the named score statement with the right placeholders for backend ('mysql' or 'sqlite').
+
+    Pass the borrowed connection's .backend rather than reading using_mysql,
+    which follows the circuit breaker and can change while the connection is in use.
+    """
+    return MYSQL_SCORE_SQL[name] if backend == 'mysql' else SCORE_SQL[name]
+
 # Quiz questions
-QUESTIONS = [
+DEFAULT_QUESTIONS = [
     {
         "id": 1,
         "question": "What is the capital of France?",
@@ -71,55 +573,1147 @@ QUESTIONS = [
     }
 ]
 
-# Make sure QUESTIONS is always initialized with at least some questions
-if not QUESTIONS:
-    QUESTIONS = [
-        {
-            "id": 1,
-            "question": "What is the capital of France?",
-            "options": ["London", "Berlin", "Paris", "Madrid"],
-            "correctAnswer": 2,
-            "explanation": "Paris is the capital and largest city of France."
-        },
-        {
-            "id": 2,
-            "question": "Which planet is known as the Red Planet?",
-            "options": ["Venus", "Mars", "Jupiter", "Saturn"],
-            "correctAnswer": 1,
-            "explanation": "Mars is called the Red Planet because of its reddish appearance."
-        }
-    ]
+# Served if the question bank ever ends up empty
+FALLBACK_QUESTIONS = [
+    {
+        "id": 1,
+        "question": "What is the capital of France?",
+        "options": ["London", "Berlin", "Paris", "Madrid"],
+        "correctAnswer": 2,
+        "explanation": "Paris is the capital and largest city of France."
+    },
+    {
+        "id": 2,
+        "question": "Which planet is known as the Red Planet?",
+        "options": ["Venus", "Mars", "Jupiter", "Saturn"],
+        "correctAnswer": 1,
+        "explanation": "Mars is called the Red Planet because of its reddish appearance."
+    }
+]
+
+class QuestionBank:
+    """The quiz questions, keyed by id.
+
+    The id dict keeps insertion order, so it doubles as the ordered view.
+    Writers hold the lock and replace question dicts instead of mutating
+    them; readers use get() or snapshot() without locking. New ids come
+    from a counter that never goes backwards, so deleted ids are not reused.
+    Questions may carry a 'tags' list; each tag keeps an id list for sampling.
+    Secondary indexes in self.indexes are told about every change while the
+    lock is held.
+    """
+
+    def __init__(self, questions=()):
+        self.lock = threading.Lock()
+        self.indexes = []
+        self.questions = {}
+        self.tag_members = {}    # tag -> list of question ids
+        self.tag_positions = {}  # tag -> {question id: index in tag_members[tag]}
+        self.next_id = 1
+        self.version = 0
+        self._snapshot = ()
+        self._snapshot_version = 0
+        self.load(questions)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def _changed(self):
+        """Called with the lock held after every mutation."""
+        self.version += 1
+
+    def _index_tags(self, question):
+        for tag in question.get('tags') or ():
+            positions = self.tag_positions.setdefault(tag, {})
+            if question['id'] not in positions:
+                members = self.tag_members.setdefault(tag, [])
+                positions[question['id']] = len(members)
+                members.append(question['id'])
+
+    def _unindex_tags(self, question):
+        for tag in question.get('tags') or ():
+            positions = self.tag_positions.get(tag)
+            if not positions or question['id'] not in positions:
+                continue
+            # Swap the last id into the removed slot so removal stays O(1)
+            members = self.tag_members[tag]
+            index = positions.pop(question['id'])
+            last = members.pop()
+            if index < len(members):
+                members[index] = last
+                positions[last] = index
+            if not members:
+                del self.tag_members[tag]
+                del self.tag_positions[tag]
+
+    def load(self, questions):
+        """Replace the whole bank. Questions without an id are given one."""
+        with self.lock:
+            self.questions = {}
+            self.tag_members = {}
+            self.tag_positions = {}
+            self.next_id = max([q.get('id', 0) for q in questions if isinstance(q.get('id'), int)] + [0]) + 1
+            for question in questions:
+                question = dict(question)
+                if not isinstance(question.get('id'), int):
+                    question['id'] = self.next_id
+                    self.next_id += 1
+                self.questions[question['id']] = question
+                self._index_tags(question)
+            for index in self.indexes:
+                index.reset()
+            self._changed()
+
+    def snapshot(self):
+        """Return the questions in bank order as a tuple. Rebuilt at most once per change."""
+        if self._snapshot_version != self.version:
+            with self.lock:
+                if self._snapshot_version != self.version:
+                    self._snapshot = tuple(self.questions.values())
+                    self._snapshot_version = self.version
+        return self._snapshot
+
+    def get(self, question_id):
+        """Look up a question by id in constant time."""
+        return self.questions.get(question_id)
+
+    def add(self, fields):
+        """Add a new question and return it with its assigned id.
+
+        fields may already carry an id (e.g. one the shared store assigned).
+        """
+        with self.lock:
+            question = dict(fields)
+            question.setdefault('id', self.next_id)
+            self._put(question)
+            self._changed()
+        return question
+
+    def update(self, question_id, changes):
+        """Apply field changes to a question and return the updated question, or None if it's gone."""
+        with self.lock:
+            current = self.questions.get(question_id)
+            if current is None:
+                return None
+            question = dict(current, **changes)
+            self._put(question)
+            self._changed()
+        return question
+
+    def remove(self, question_id):
+        """Delete a question and return it, or None if it's gone."""
+        with self.lock:
+            if question_id not in self.questions:
+                return None
+            question = self._pop(question_id)
+            self._changed()
+        return question
+
+    def merge(self, questions):
+        """Make the bank match questions, touching only the ones that differ.
+
+        Unlike load() this keeps secondary indexes warm, so picking up
+        an edit made elsewhere costs a comparison pass, not a rebuild.
+        """
+        with self.lock:
+            incoming = {question['id']: question for question in questions}
+            for question_id in [i for i in self.questions if i not in incoming]:
+                self._pop(question_id)
+            for question_id, question in incoming.items():
+                if self.questions.get(question_id) != question:
+                    self._put(dict(question))
+            self._changed()
+
+    def _put(self, question):
+        """Insert or replace a question and its index entries. Called with the lock held."""
+        old_question = self.questions.get(question['id'])
+        self.next_id = max(self.next_id, question['id'] + 1)
+        # Assigning to an existing key keeps the question's position
+        self.questions[question['id']] = question
+        if old_question is not None:
+            self._unindex_tags(old_question)
+        self._index_tags(question)
+        for index in self.indexes:
+            if old_question is not None:
+                index.removed(old_question)
+            index.added(question)
+
+    def _pop(self, question_id):
+        """Remove a question and its index entries. Called with the lock held."""
+        question = self.questions.pop(question_id)
+        self._unindex_tags(question)
+        for index in self.indexes:
+            index.removed(question)
+        return question
+
+    def sample(self, count, tags=None):
+        """Pick up to count random questions without replacement.
+
+        Works on indexes, so the cost is O(count) rather than O(bank size).
+        With tags, the picks are spread evenly over those tags and topped
+        up from the whole bank if the tags run short.
+        """
+        picked = {}
+        if tags:
+            with self.lock:
+                members = {tag: list(self.tag_members.get(tag, ())) for tag in tags}
+            for i, tag in enumerate(tags):
+                want = count // len(tags) + (1 if i < count % len(tags) else 0)
+                ids = members[tag]
+                for index in random.sample(range(len(ids)), min(want, len(ids))):
+                    question = self.questions.get(ids[index])
+                    if question is not None:
+                        picked.setdefault(question['id'], question)
+        
+        questions = self.snapshot()
+        missing = min(count, len(questions)) - len(picked)
+        if missing > 0:
+            # Draw a few extra indexes to cover questions the tags already picked
+            indexes = random.sample(range(len(questions)), min(len(questions), missing + len(picked)))
+            for index in indexes:
+                if len(picked) >= count:
+                    break
+                picked.setdefault(questions[index]['id'], questions[index])
+        return list(picked.values())
+
+question_bank = QuestionBank(DEFAULT_QUESTIONS)
+
+# Full-text question search
+SEARCH_FIELD_WEIGHTS = {'question': 3.0, 'tags': 2.0, 'options': 1.0, 'explanation': 1.0}
+SEARCH_STOPWORDS = frozenset(
+    'a an and are as at be by for from how in is it of on or that the this to was what when where which who why with'.split()
+)
+SEARCH_TOKEN = re.compile(r'\w+')
+SEARCH_MAX_PREFIX_TERMS = 50  # Vocabulary terms a trailing partial word may expand to
+SEARCH_MIN_PREFIX = 3         # Shorter partial words only match whole terms
+SEARCH_COMMON_FRACTION = 0.2  # Words in more of the bank than this filter results but aren't scored
+SEARCH_CACHE_SIZE = 256       # Per-word score tables kept between searches
+
+def search_terms(text):
+    return SEARCH_TOKEN.findall(text.lower()) if isinstance(text, str) else []
+
+class QuestionSearchIndex:
+    """Inverted index over question text, options, explanation and tags.
+
+    postings maps each term to {question id: weight}, where a term's weight
+    in a question is the sum of the field weights it appears in. The bank
+    keeps it current on add/update/remove; a full bank load only marks it
+    stale, and the next search rebuilds it. A sorted vocabulary lets the
+    last query word match as a prefix, for search-as-you-type.
+
+    Searches are AND queries ranked by weight x idf. Each query word's score
+    table, and its ranking once needed, is cached until the index changes,
+    so repeated and refined searches skip straight to intersecting sets.
+    """
+
+    def __init__(self, bank):
+        self.bank = bank
+        self.lock = threading.Lock()
+        self.postings = {}
+        self.vocabulary = []
+        self.generation = 0   # Bumped on every change; invalidates the cache
+        self.cache = {}       # query word -> (generation, {'scores': {id: score}, 'ranked': [ids] or None})
+        self.stale = True
+        bank.indexes.append(self)
+
+    @staticmethod
+    def _weights(question):
+        weights = {}
+        fields = [('question', question.get('question')), ('explanation', question.get('explanation'))]
+        fields += [('options', option) for option in question.get('options') or ()]
+        fields += [('tags', tag) for tag in question.get('tags') or ()]
+        for field, text in fields:
+            for term in search_terms(text):
+                weights[term] = weights.get(term, 0.0) + SEARCH_FIELD_WEIGHTS[field]
+        return weights
+
+    def _add(self, question):
+        for term, weight in self._weights(question).items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                bisect.insort(self.vocabulary, term)
+            posting[question['id']] = weight
+        self.generation += 1
+
+    def _remove(self, question):
+        for term in self._weights(question):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(question['id'], None)
+            if not posting:
+                del self.postings[term]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, term)]
+        self.generation += 1
+
+    # Called by the bank with its lock held
+    def added(self, question):
+        with self.lock:
+            if not self.stale:
+                self._add(question)
+
+    def removed(self, question):
+        with self.lock:
+            if not self.stale:
+                self._remove(question)
+
+    def reset(self):
+        with self.lock:
+            self.stale = True
+            self.postings = {}
+            self.vocabulary = []
+            self.cache = {}
+
+    def _ensure_built(self):
+        if not self.stale:
+            return
+        # Same lock order as the bank's change hooks: bank first, then index
+        with self.bank.lock:
+            with self.lock:
+                if not self.stale:
+                    return
+                started = time.monotonic()
+                self.postings = {}
+                for question in self.bank.questions.values():
+                    for term, weight in self._weights(question).items():
+                        self.postings.setdefault(term, {})[question['id']] = weight
+                self.vocabulary = sorted(self.postings)
+                self.generation += 1
+                self.stale = False
+                log.info("Search index built for %d questions in %.2fs", len(self.bank.questions), time.monotonic() - started)
+
+    def _expand(self, prefix):
+        """Vocabulary terms starting with prefix, up to SEARCH_MAX_PREFIX_TERMS."""
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        terms = []
+        for term in self.vocabulary[start:start + SEARCH_MAX_PREFIX_TERMS]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def _word(self, key, terms):
+        """Score table for one query word (the best of its terms, for a prefix). Called with the lock held."""
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] == self.generation:
+            return cached[1]
+        total_docs = max(len(self.bank.questions), 1)
+        scores = {}
+        for term in terms:
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + total_docs / len(posting))
+            if not scores:
+                scores = {question_id: weight * idf for question_id, weight in posting.items()}
+                continue
+            for question_id, weight in posting.items():
+                if weight * idf > scores.get(question_id, 0.0):
+                    scores[question_id] = weight * idf
+        word = {'scores': scores, 'ranked': None}
+        if len(self.cache) >= SEARCH_CACHE_SIZE:
+            del self.cache[next(iter(self.cache))]
+        self.cache[key] = (self.generation, word)
+        return word
+
+    @staticmethod
+    def _ranked(word):
+        """Question ids by descending score, then id. Scores take few distinct values, so sort by bucket."""
+        if word['ranked'] is None:
+            buckets = {}
+            for question_id, score in word['scores'].items():
+                buckets.setdefault(score, []).append(question_id)
+            word['ranked'] = [question_id for score in sorted(buckets, reverse=True) for question_id in sorted(buckets[score])]
+        return word['ranked']
+
+    def search(self, query, tags=None, limit=20, offset=0):
+        """Rank questions matching every word of query. Returns (total matches, [(score, id)] page).
+
+        The last word also matches as a prefix unless the query ends in a
+        space. tags restricts results to questions with any of those tags.
+        """
+        self._ensure_built()
+        words = search_terms(query)
+        prefix = words.pop() if words and query and not query[-1].isspace() else None
+        if prefix is not None and len(prefix) < SEARCH_MIN_PREFIX:
+            words.append(prefix)
+            prefix = None
+        # Stopwords only count when the query is nothing but stopwords
+        kept = [w for w in words if w not in SEARCH_STOPWORDS]
+        words = kept if kept or prefix else words
+
+        allowed = None
+        if tags:
+            with self.bank.lock:
+                allowed = set()
+                for tag in tags:
+                    allowed.update(self.bank.tag_members.get(tag, ()))
+
+        wanted = offset + limit
+        with self.lock:
+            if not words and not prefix:
+                # No words, just a tag filter: list in id order
+                matches = sorted(allowed) if allowed is not None else list(self.bank.questions)
+                return len(matches), [(0.0, question_id) for question_id in matches[offset:wanted]]
+
+            groups = [self._word(word, [word]) for word in dict.fromkeys(words)]
+            if prefix:
+                groups.append(self._word(prefix + '*', self._expand(prefix)))
+            if not all(group['scores'] for group in groups):
+                return 0, []
+            groups.sort(key=lambda group: len(group['scores']))
+
+            # Matches: the intersection of every word's questions, done on C-level sets
+            # (a keys view & set only iterates the smaller side)
+            matched = None
+            if len(groups) > 1 or allowed is not None:
+                matched = set(groups[0]['scores']) if allowed is None else groups[0]['scores'].keys() & allowed
+                for group in groups[1:]:
+                    matched = group['scores'].keys() & matched
+            total = len(groups[0]['scores']) if matched is None else len(matched)
+
+            # Words in much of the bank barely change the order, so they only filter
+            cutoff = SEARCH_COMMON_FRACTION * len(self.bank.questions)
+            scoring = [group for group in groups if len(group['scores']) <= cutoff] or groups[:1]
+
+            if len(scoring) == 1 and (matched is None or len(matched) * 4 > len(scoring[0]['scores'])):
+                # Walk the word's cached ranking, skipping questions that don't match the rest
+                scores = scoring[0]['scores']
+                page = []
+                for question_id in self._ranked(scoring[0]):
+                    if matched is None or question_id in matched:
+                        page.append((scores[question_id], question_id))
+                        if len(page) == wanted:
+                            break
+                return total, page[offset:]
+
+            results = [(sum(group['scores'][question_id] for group in scoring), question_id) for question_id in matched]
+        page = heapq.nsmallest(wanted, results, key=lambda item: (-item[0], item[1]))[offset:]
+        return total, page
+
+question_search = QuestionSearchIndex(question_bank)
+
+class QuestionPayloadCache:
+    """The serialized /api/questions body, encoded once per question bank version.
+
+    Each entry holds the JSON bytes plus lazily built gzip/brotli copies,
+    and a strong ETag per encoding derived from the version and content hash.
+    """
+
+    def __init__(self, bank):
+        self.bank = bank
+        self.lock = threading.Lock()
+        self.entry = None
+
+    def get(self):
+        entry = self.entry
+        if entry is None or entry['version'] != self.bank.version:
+            with self.lock:
+                entry = self.entry
+                if entry is None or entry['version'] != self.bank.version:
+                    version = self.bank.version
+                    body = json.dumps(list(self.bank.snapshot()), separators=(',', ':')).encode('utf-8')
+                    tag = f"q{version}-{hashlib.sha1(body).hexdigest()[:16]}"
+                    entry = {'version': version, 'tag': tag, 'bodies': {'identity': body}}
+                    self.entry = entry
+        return entry
+
+    def body(self, entry, encoding):
+        """Return the body for an encoding ('identity', 'gzip' or 'br'), compressing on first use."""
+        bodies = entry['bodies']
+        if encoding not in bodies:
+            if encoding == 'br':
+                bodies[encoding] = brotli.compress(bodies['identity'])
+            else:
+                bodies[encoding] = gzip.compress(bodies['identity'], compresslevel=6)
+        return bodies[encoding]
+
+question_payloads = QuestionPayloadCache(question_bank)
+
+# Server-assembled quizzes
+QUIZ_CONFIG = {
+    'questions_per_quiz': 10,   # Default number of questions sampled per session
+    'max_questions': 100,       # Upper bound a client may ask for
+    'time_limit': 30 * 60,      # Seconds a player has from starting a quiz to submitting it
+    'late_grace': 15,           # Extra seconds allowed for the request to arrive after the timer runs out
+    'max_sessions': 100000,     # Quizzes in progress at once
+    'sweep_interval': 60.0,     # Seconds between sweeps for expired sessions
+    'state_path': 'quiz_sessions.state'
+}
+
+class QuizSessionStore:
+    """Quizzes in progress, in a fixed-size slab of slots.
+
+    Each slot holds a start time, a random secret and the packed ids of the
+    questions that session was given. A session id is the slot number plus
+    the secret, so finding a session is an array index, and an old id can't
+    reach a slot that has since been reused. Start times come from the
+    server clock, which makes time_taken the server's measurement and lets a
+    late submission be turned away before it is graded.
+
+    A sweeper thread frees the slots of sessions past the time limit. On
+    shutdown the live sessions are written to a state file (one claimed per
+    process, like the ingest log) and read back on startup, so quizzes in
+    progress survive a restart.
+    """
+
+    SECRET_BYTES = 12
+    RECORD = struct.Struct('<Id12sH')  # slot, started, secret, question count
+
+    def __init__(self, config):
+        self.config = config
+        self.capacity = config['max_sessions']
+        self.started = array.array('d', bytes(8 * self.capacity))  # 0.0 marks a free slot
+        self.secrets = bytearray(self.SECRET_BYTES * self.capacity)
+        self.questions = [None] * self.capacity
+        self.free = array.array('i', range(self.capacity - 1, -1, -1))
+        self.lock = threading.Lock()
+        self.state_file = None
+        self.sweeper = None
+
+    def __len__(self):
+        return self.capacity - len(self.free)
+
+    @property
+    def lifetime(self):
+        return self.config['time_limit'] + self.config['late_grace']
+
+    def create(self, question_ids):
+        """Start a session. Returns (session id, start time), or None if every slot is taken."""
+        secret = secrets.token_bytes(self.SECRET_BYTES)
+        started = time.time()
+        with self.lock:
+            if not self.free:
+                self._sweep_range(0, self.capacity, started - self.lifetime)
+                if not self.free:
+                    return None
+            slot = self.free.pop()
+            self._fill(slot, started, secret, array.array('i', question_ids).tobytes())
+        return self._encode(slot, secret), started
+
+    def _fill(self, slot, started, secret, packed_ids):
+        self.started[slot] = started
+        self.secrets[slot * self.SECRET_BYTES:(slot + 1) * self.SECRET_BYTES] = secret
+        self.questions[slot] = packed_ids
+
+    def _release(self, slot):
+        self.started[slot] = 0.0
+        self.questions[slot] = None
+        self.free.append(slot)
+
+    @staticmethod
+    def _encode(slot, secret):
+        return base64.urlsafe_b64encode(slot.to_bytes(4, 'big') + secret).decode('ascii').rstrip('=')
+
+    def _decode(self, session_id):
+        """Return (slot, secret) for a well-formed id, else None."""
+        try:
+            raw = base64.urlsafe_b64decode(session_id + '=' * (-len(session_id) % 4))
+        except (ValueError, TypeError):
+            return None
+        if len(raw) != 4 + self.SECRET_BYTES:
+            return None
+        slot = int.from_bytes(raw[:4], 'big')
+        return (slot, raw[4:]) if slot < self.capacity else None
+
+    def _find(self, session_id):
+        """Slot of a live session, or None. Called with the lock held."""
+        decoded = self._decode(session_id)
+        if decoded is None:
+            return None
+        slot, secret = decoded
+        stored = self.secrets[slot * self.SECRET_BYTES:(slot + 1) * self.SECRET_BYTES]
+        if not self.started[slot] or not hmac.compare_digest(stored, secret):
+            return None
+        return slot
+
+    def question_count(self, session_id):
+        """How many questions a live session was given, or None if unknown. The session stays."""
+        with self.lock:
+            slot = self._find(session_id)
+            return None if slot is None else len(self.questions[slot]) // 4
+
+    def pop(self, session_id):
+        """Remove and return a session as {'questionIds', 'elapsed', 'late'}, or None if unknown.
+
+        elapsed is the server-measured seconds since the session started.
+        """
+        with self.lock:
+            slot = self._find(session_id)
+            if slot is None:
+                return None
+            started = self.started[slot]
+            packed_ids = self.questions[slot]
+            self._release(slot)
+        elapsed = time.time() - started
+        question_ids = array.array('i')
+        question_ids.frombytes(packed_ids)
+        return {'questionIds': question_ids.tolist(), 'elapsed': elapsed, 'late': elapsed > self.lifetime}
+
+    def _sweep_range(self, start, stop, cutoff):
+        """Free expired slots in [start, stop). Called with the lock held; returns how many."""
+        freed = 0
+        started = self.started
+        for slot in range(start, stop):
+            if 0.0 < started[slot] < cutoff:
+                self._release(slot)
+                freed += 1
+        return freed
+
+    def sweep(self):
+        """Free every expired slot, a chunk at a time so creates aren't held up."""
+        cutoff = time.time() - self.lifetime
+        freed = 0
+        for start in range(0, self.capacity, 10000):
+            with self.lock:
+                freed += self._sweep_range(start, min(start + 10000, self.capacity), cutoff)
+        if freed:
+            log.debug("Swept %d expired quiz sessions", freed)
+        return freed
+
+    def start(self):
+        """Load sessions saved by the last shutdown and start the sweeper thread."""
+        self.load()
+        self.sweeper = threading.Thread(target=self._run_sweeper, name='quiz-session-sweeper', daemon=True)
+        self.sweeper.start()
+
+    def _run_sweeper(self):
+        while True:
+            time.sleep(self.config['sweep_interval'])
+            try:
+                self.sweep()
+            except Exception as e:
+                log.error("Error sweeping quiz sessions: %s", e)
+
+    def load(self):
+        """Take over the live sessions in this process's state file, then empty it."""
+        try:
+            self.state_path, self.state_file = claim_file(self.config['state_path'], 'a+b')
+            self.state_file.seek(0)
+            data = self.state_file.read()
+            # Emptied straight away, so a crash can't bring back sessions submitted since
+            self.state_file.truncate(0)
+        except OSError as e:
+            log.warning("Quiz session state file unavailable, sessions won't survive a restart: %s", e)
+            return
+        cutoff = time.time() - self.lifetime
+        loaded = 0
+        position = 0
+        with self.lock:
+            while position + self.RECORD.size <= len(data):
+                slot, started, secret, count = self.RECORD.unpack_from(data, position)
+                position += self.RECORD.size
+                packed_ids = data[position:position + 4 * count]
+                position += 4 * count
+                if len(packed_ids) < 4 * count:
+                    break
+                if slot >= self.capacity or self.started[slot] or started < cutoff:
+                    continue
+                self._fill(slot, started, secret, packed_ids)
+                loaded += 1
+            self.free = array.array('i', (slot for slot in range(self.capacity - 1, -1, -1) if not self.started[slot]))
+        if loaded:
+            log.info("Restored %d quiz sessions from %s", loaded, self.state_path)
+
+    def save(self):
+        """Write the live sessions to the state file, for the next start to pick up."""
+        if self.state_file is None:
+            return
+        with self.lock:
+            chunks = []
+            for slot in range(self.capacity):
+                if self.started[slot]:
+                    packed_ids = self.questions[slot]
+                    chunks.append(self.RECORD.pack(slot, self.started[slot],
+                                                   bytes(self.secrets[slot * self.SECRET_BYTES:(slot + 1) * self.SECRET_BYTES]),
+                                                   len(packed_ids) // 4))
+                    chunks.append(packed_ids)
+        self.state_file.truncate(0)
+        self.state_file.write(b''.join(chunks))
+        self.state_file.flush()
+        os.fsync(self.state_file.fileno())
+        log.info("Saved %d quiz sessions to %s", len(chunks) // 2, self.state_path)
+
+quiz_sessions = QuizSessionStore(QUIZ_CONFIG)
+
+# Idempotent quiz submissions
+SUBMISSION_CONFIG = {
+    'ttl': 24 * 60 * 60,     # Seconds a submission id is remembered in memory
+    'max_entries': 100000,   # The oldest ids are forgotten first beyond this
+    'wait_timeout': 30.0,    # Seconds a duplicate waits for the first attempt to finish
+    'max_id_length': 64
+}
+
+class _Submission:
+    __slots__ = ('expires', 'outcome', 'settled')
+
+    def __init__(self, expires):
+        self.expires = expires
+        self.outcome = None   # (score, total_questions, question_ids or None) once stored
+        self.settled = False
+
+class SubmissionLedger:
+    """Remember the outcome of each client submission id, so a retry is answered instead of stored again.
+
+    Ids are kept in arrival order, so expired and surplus ones drop off the
+    front. An id is reserved while its first attempt runs, and a duplicate
+    that arrives meanwhile waits for that attempt. Once an id is forgotten,
+    the unique index on quiz_scores.submission_id still keeps a replay out
+    of the table.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.entries = collections.OrderedDict()
+        self.settled = threading.Condition()
+
+    def begin(self, submission_id):
+        """Reserve an id for its first attempt (returns None), or return the earlier attempt."""
+        now = time.monotonic()
+        with self.settled:
+            while self.entries and (len(self.entries) >= self.config['max_entries']
+                                    or next(iter(self.entries.values())).expires <= now):
+                self.entries.popitem(last=False)
+            entry = self.entries.get(submission_id)
+            if entry is None:
+                self.entries[submission_id] = _Submission(now + self.config['ttl'])
+                return None
+            self.settled.wait_for(lambda: entry.settled, self.config['wait_timeout'])
+        return entry
+
+    def finish(self, submission_id, outcome):
+        """Settle a reserved id. With outcome None the id is released so the client can try again."""
+        with self.settled:
+            entry = self.entries.get(submission_id)
+            if entry is None or entry.settled:
+                return
+            if outcome is None:
+                del self.entries[submission_id]
+            entry.outcome = outcome
+            entry.settled = True
+            self.settled.notify_all()
+
+    def __len__(self):
+        return len(self.entries)
+
+submission_ledger = SubmissionLedger(SUBMISSION_CONFIG)
 
 # Track whether we're using MySQL or SQLite
 using_mysql = False
 
-# Since file storage is troublesome, let's add a memory-only mode
-MEMORY_ONLY_MODE = True
+# Connection pool settings
+POOL_CONFIG = {
+    'mysql_pool_size': 10,        # Maximum number of open MySQL connections
+    'sqlite_pool_size': 8,        # Idle SQLite connections kept for reuse by any thread
+    'acquire_timeout': 5,         # Seconds to wait for a free MySQL connection
+    'health_check_interval': 30,  # Seconds an idle connection is trusted without a ping
+    'breaker_threshold': 3,       # Consecutive MySQL failures before the breaker opens
+    'breaker_cooldown': 30        # Seconds to wait before probing MySQL again
+}
+
+class CircuitBreaker:
+    """Remember that a backend is failing so we don't re-probe it on every request."""
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        """Return True if the backend may be tried right now."""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                # Let a single probe through, then wait another cooldown if it fails
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def trip(self):
+        """Open the breaker immediately, e.g. when the backend is down at startup."""
+        with self.lock:
+            if self.opened_at is None:
+                self.trips += 1
+            self.failures = max(self.failures, self.threshold)
+            self.opened_at = time.monotonic()
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.threshold or self.opened_at is not None:
+                if self.opened_at is None:
+                    self.trips += 1
+                self.opened_at = time.monotonic()
+
+class PooledConnection:
+    """Wrap a pooled connection so that close() hands it back instead of closing it.
+
+    backend is 'mysql' or 'sqlite', for labelling query timings.
+    """
+
+    def __init__(self, conn, release, backend):
+        self._conn = conn
+        self._release = release
+        self.backend = backend
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._release is not None:
+            release, self._release = self._release, None
+            release(self._conn)
+
+class ConnectionPool:
+    """Bounded MySQL pool plus a shared pool of idle SQLite connections.
+
+    SQLite connections are shared between threads rather than kept per
+    thread: Werkzeug's dev server starts a thread per request, so a
+    per-thread connection would be opened (and its PRAGMAs run) every time.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.breaker = CircuitBreaker(config['breaker_threshold'], config['breaker_cooldown'])
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(config['mysql_pool_size'])
+        self.sqlite_idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.last_checked = {}
+        self.stats = {
+            'mysql_created': 0,
+            'mysql_in_use': 0,
+            'mysql_acquired': 0,
+            'mysql_timeouts': 0,
+            'mysql_health_failures': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'sqlite_connections': 0,
+            'sqlite_acquired': 0
+        }
+
+    def _count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def _is_healthy(self, conn):
+        """Ping connections that have been idle longer than the health check interval."""
+        last = self.last_checked.get(id(conn), 0)
+        if time.monotonic() - last < self.config['health_check_interval']:
+            return True
+        try:
+            conn.ping(reconnect=False)
+            self.last_checked[id(conn)] = time.monotonic()
+            return True
+        except Exception:
+            self._count('mysql_health_failures')
+            return False
+
+    def _discard(self, conn):
+        self.last_checked.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def get_mysql(self):
+        """Borrow a MySQL connection, creating one if the pool has spare capacity."""
+        started = time.monotonic()
+        if not self.slots.acquire(timeout=self.config['acquire_timeout']):
+            self._count('mysql_timeouts')
+            raise TimeoutError('Timed out waiting for a pooled MySQL connection')
+        waited = time.monotonic() - started
+        with self.lock:
+            self.stats['wait_time_total'] += waited
+            self.stats['wait_time_max'] = max(self.stats['wait_time_max'], waited)
+
+        try:
+            conn = None
+            while conn is None:
+                try:
+                    conn = self.idle.get_nowait()
+                except queue.Empty:
+                    break
+                if not self._is_healthy(conn):
+                    self._discard(conn)
+                    conn = None
+
+            if conn is None:
+                conn = mysql.connector.connect(**DB_CONFIG)
+                self.last_checked[id(conn)] = time.monotonic()
+                self._count('mysql_created')
+        except Exception:
+            self.slots.release()
+            raise
+
+        self._count('mysql_acquired')
+        self._count('mysql_in_use')
+        return PooledConnection(conn, self._release_mysql, 'mysql')
+
+    def _release_mysql(self, conn):
+        try:
+            # Don't leak an open transaction to the next borrower
+            conn.rollback()
+            self.idle.put(conn)
+        except Exception:
+            self._discard(conn)
+        finally:
+            self._count('mysql_in_use', -1)
+            self.slots.release()
+
+    def get_sqlite(self):
+        """Borrow an idle SQLite connection, opening a new one if none is free."""
+        try:
+            conn = self.sqlite_idle.get_nowait()
+        except queue.Empty:
+            conn = open_sqlite_connection(check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._count('sqlite_connections')
+        self._count('sqlite_acquired')
+        return PooledConnection(conn, self._release_sqlite, 'sqlite')
+
+    def _release_sqlite(self, conn):
+        try:
+            # Don't leak an open transaction to the next borrower
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            return
+        # Keep a bounded number around; a burst beyond that is closed again
+        if self.sqlite_idle.qsize() < self.config['sqlite_pool_size']:
+            self.sqlite_idle.put(conn)
+        else:
+            conn.close()
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+        acquired = stats['mysql_acquired']
+        stats['wait_time_avg'] = stats['wait_time_total'] / acquired if acquired else 0.0
+        stats['mysql_pool_size'] = self.config['mysql_pool_size']
+        stats['mysql_idle'] = self.idle.qsize()
+        stats['sqlite_idle'] = self.sqlite_idle.qsize()
+        stats['breaker_state'] = self.breaker.state
+        stats['breaker_failures'] = self.breaker.failures
+        stats['breaker_trips'] = self.breaker.trips
+        return stats
+
+db_pool = ConnectionPool(POOL_CONFIG)
 
 def get_db_connection():
-    """Create a database connection to either MySQL or SQLite."""
+    """Borrow a pooled connection to either MySQL or SQLite.
+
+    Callers still call conn.close() when done; that returns the connection to the pool.
+    """
     global using_mysql
     
-    # Try MySQL first if available
-    if MYSQL_AVAILABLE:
+    # Try MySQL first if available and the breaker hasn't given up on it
+    if MYSQL_AVAILABLE and db_pool.breaker.allow():
         try:
-            conn = mysql.connector.connect(**DB_CONFIG)
+            conn = db_pool.get_mysql()
+            db_pool.breaker.record_success()
             using_mysql = True
             return conn
         except Exception as e:
-            print(f"Error connecting to MySQL: {e}")
-            print("Falling back to SQLite...")
+            db_pool.breaker.record_failure()
+            log.warning("Error connecting to MySQL, falling back to SQLite: %s", e)
     
     # Fall back to SQLite
     try:
-        conn = sqlite3.connect(SQLITE_DB)
-        conn.row_factory = sqlite3.Row
+        conn = db_pool.get_sqlite()
         using_mysql = False
+        if MYSQL_AVAILABLE:
+            # MySQL failed just now, or the breaker is open after earlier failures
+            fallbacks.inc('mysql_to_sqlite')
         return conn
     except Exception as e:
-        print(f"Error connecting to SQLite: {e}")
+        log.error("Error connecting to SQLite: %s", e)
         return None
 
+# Versioned schema changes applied by init_db. Append new entries; never edit old ones.
+SCHEMA_MIGRATIONS = [
+    {
+        'version': 1,
+        'description': 'Index quiz_scores for the leaderboard query',
+        'mysql': [
+            'CREATE INDEX idx_quiz_scores_rank ON quiz_scores (score DESC, time_taken ASC)'
+        ],
+        'sqlite': [
+            'CREATE INDEX IF NOT EXISTS idx_quiz_scores_rank ON quiz_scores (score DESC, time_taken ASC)'
+        ]
+    },
+    {
+        'version': 2,
+        'description': 'Index quiz_scores for per-player history',
+        'mysql': [
+            'CREATE INDEX idx_quiz_scores_player ON quiz_scores (player_name, date_taken DESC)'
+        ],
+        'sqlite': [
+            'CREATE INDEX IF NOT EXISTS idx_quiz_scores_player ON quiz_scores (player_name, date_taken DESC)'
+        ]
+    },
+    {
+        'version': 3,
+        'description': 'Record which questions each score was graded against',
+        'mysql': [
+            'ALTER TABLE quiz_scores ADD COLUMN question_ids JSON NULL'
+        ],
+        'sqlite': [
+            'ALTER TABLE quiz_scores ADD COLUMN question_ids TEXT'
+        ]
+    },
+    {
+        'version': 4,
+        'description': 'Cover the (date_taken, id) cursor in the per-player index',
+        'mysql': [
+            'CREATE INDEX idx_quiz_scores_player_cursor ON quiz_scores (player_name, date_taken DESC, id DESC)',
+            'DROP INDEX idx_quiz_scores_player ON quiz_scores'
+        ],
+        'sqlite': [
+            'CREATE INDEX IF NOT EXISTS idx_quiz_scores_player_cursor ON quiz_scores (player_name, date_taken DESC, id DESC)',
+            'DROP INDEX IF EXISTS idx_quiz_scores_player'
+        ]
+    },
+    {
+        'version': 5,
+        'description': 'Share the question bank between worker processes',
+        'mysql': [
+            '''CREATE TABLE questions (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                question TEXT NOT NULL,
+                options JSON NOT NULL,
+                correct_answer INT NOT NULL,
+                explanation TEXT,
+                tags JSON NULL
+            )''',
+            'CREATE TABLE question_bank_version (id INT PRIMARY KEY, version BIGINT NOT NULL)',
+            'INSERT INTO question_bank_version (id, version) VALUES (1, 0)'
+        ],
+        'sqlite': [
+            '''CREATE TABLE IF NOT EXISTS questions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                question TEXT NOT NULL,
+                options TEXT NOT NULL,
+                correct_answer INTEGER NOT NULL,
+                explanation TEXT,
+                tags TEXT
+            )''',
+            'CREATE TABLE IF NOT EXISTS question_bank_version (id INTEGER PRIMARY KEY, version INTEGER NOT NULL)',
+            'INSERT OR IGNORE INTO question_bank_version (id, version) VALUES (1, 0)'
+        ]
+    },
+    {
+        'version': 6,
+        'description': 'Store each quiz submission at most once',
+        'mysql': [
+            'ALTER TABLE quiz_scores ADD COLUMN submission_id VARCHAR(64) NULL',
+            'CREATE UNIQUE INDEX idx_quiz_scores_submission ON quiz_scores (submission_id)'
+        ],
+        'sqlite': [
+            'ALTER TABLE quiz_scores ADD COLUMN submission_id TEXT',
+            'CREATE UNIQUE INDEX IF NOT EXISTS idx_quiz_scores_submission ON quiz_scores (submission_id)'
+        ]
+    },
+    {
+        'version': 7,
+        'description': 'Allow an unknown time_taken and rank those scores last on ties',
+        # Functional indexes need MySQL 8.0.13, so MySQL keeps the v1 rank index and sorts
+        # the NULL tiebreak itself; the leaderboard query only runs on a cache refresh
+        'mysql': [
+            'ALTER TABLE quiz_scores MODIFY time_taken INT NULL'
+        ],
+        # SQLite can't relax NOT NULL in place, so copy into a rebuilt table in one transaction
+        'sqlite': [
+            'BEGIN',
+            '''CREATE TABLE quiz_scores_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                player_name TEXT NOT NULL,
+                score INTEGER NOT NULL,
+                total_questions INTEGER NOT NULL,
+                time_taken INTEGER,
+                date_taken TEXT NOT NULL,
+                answers TEXT NOT NULL,
+                question_ids TEXT,
+                submission_id TEXT
+            )''',
+            '''INSERT INTO quiz_scores_new
+                (id, player_name, score, total_questions, time_taken, date_taken, answers, question_ids, submission_id)
+                SELECT id, player_name, score, total_questions, time_taken, date_taken, answers, question_ids, submission_id
+                FROM quiz_scores''',
+            # Keep AUTOINCREMENT from reusing the ids of rows deleted before the rebuild
+            "DELETE FROM sqlite_sequence WHERE name = 'quiz_scores_new'",
+            "INSERT INTO sqlite_sequence (name, seq) SELECT 'quiz_scores_new', seq FROM sqlite_sequence WHERE name = 'quiz_scores'",
+            'DROP TABLE quiz_scores',
+            'ALTER TABLE quiz_scores_new RENAME TO quiz_scores',
+            'CREATE INDEX idx_quiz_scores_rank ON quiz_scores (score DESC, (time_taken IS NULL), time_taken ASC)',
+            'CREATE INDEX idx_quiz_scores_player_cursor ON quiz_scores (player_name, date_taken DESC, id DESC)',
+            'CREATE UNIQUE INDEX idx_quiz_scores_submission ON quiz_scores (submission_id)'
+        ]
+    }
+]
+
+def run_migrations(conn, backend):
+    """Apply any schema migrations this database hasn't seen yet.
+
+    backend is 'mysql' or 'sqlite'. Each migration is recorded in
+    schema_migrations, so running this on every startup is safe.
+    """
+    cursor = conn.cursor()
+    if backend == 'mysql':
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT PRIMARY KEY,
+                description VARCHAR(255) NOT NULL,
+                applied_at DATETIME NOT NULL
+            )
+        ''')
+        placeholder = '%s'
+    else:
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TEXT NOT NULL
+            )
+        ''')
+        placeholder = '?'
+    conn.commit()
+    
+    cursor.execute('SELECT version FROM schema_migrations')
+    applied = {row[0] for row in cursor.fetchall()}
+    
+    for migration in SCHEMA_MIGRATIONS:
+        if migration['version'] in applied:
+            continue
+        log.info("Applying migration %s: %s", migration['version'], migration['description'])
+        for statement in migration[backend]:
+            cursor.execute(statement)
+        cursor.execute(
+            f'INSERT INTO schema_migrations (version, description, applied_at) '
+            f'VALUES ({placeholder}, {placeholder}, {placeholder})',
+            (migration['version'], migration['description'], datetime.now().isoformat())
+        )
+        conn.commit()
+
 def init_db():
     """Initialize the database with required tables."""
     global using_mysql
@@ -157,17 +1751,20 @@ def init_db():
             ''')
             
             conn.commit()
+            run_migrations(conn, 'mysql')
             conn.close()
-            print("MySQL database initialized successfully")
+            log.info("MySQL database initialized successfully")
             using_mysql = True
             return True
         except Exception as e:
-            print(f"Error initializing MySQL: {e}")
-            print("Falling back to SQLite...")
+            # Open the breaker straight away so requests don't re-probe a dead server
+            db_pool.breaker.trip()
+            log.warning("Error initializing MySQL, falling back to SQLite: %s", e)
     
     # Fall back to SQLite
     try:
-        conn = sqlite3.connect(SQLITE_DB)
+        # Switches the file to WAL (persistent) along with the per-connection settings
+        conn = open_sqlite_connection()
         cursor = conn.cursor()
         
         # Create quiz_scores table in SQLite
@@ -184,379 +1781,2300 @@ def init_db():
         ''')
         
         conn.commit()
+        run_migrations(conn, 'sqlite')
         conn.close()
-        print("SQLite database initialized successfully")
+        log.info("SQLite database initialized successfully")
         using_mysql = False
         return True
     except Exception as e:
-        print(f"Error initializing SQLite: {e}")
+        log.error("Error initializing SQLite: %s", e)
+        return False
+
+# Statements for the shared question bank (migration 5)
+QUESTION_SQL = {
+    'all': 'SELECT id, question, options, correct_answer, explanation, tags FROM questions ORDER BY id',
+    'insert': 'INSERT INTO questions (question, options, correct_answer, explanation, tags) VALUES (?, ?, ?, ?, ?)',
+    'insert_with_id': 'INSERT INTO questions (id, question, options, correct_answer, explanation, tags) VALUES (?, ?, ?, ?, ?, ?)',
+    'update': 'UPDATE questions SET question = ?, options = ?, correct_answer = ?, explanation = ?, tags = ? WHERE id = ?',
+    'delete': 'DELETE FROM questions WHERE id = ?',
+    'exists': 'SELECT 1 FROM questions WHERE id = ?',
+    'version': 'SELECT version FROM question_bank_version WHERE id = 1',
+    'bump': 'UPDATE question_bank_version SET version = version + 1 WHERE id = 1',
+    'claim_seed': 'UPDATE question_bank_version SET version = 1 WHERE id = 1 AND version = 0'
+}
+MYSQL_QUESTION_SQL = {name: query.replace('?', '%s') for name, query in QUESTION_SQL.items()}
+
+def question_sql(name, backend):
+    """Return the named question statement with the right placeholders for the current backend."""
+    return MYSQL_QUESTION_SQL[name] if backend == 'mysql' else QUESTION_SQL[name]
+
+# Shared question bank settings
+QUESTION_STORE_CONFIG = {
+    'poll_interval': 5.0  # Seconds between the refresher thread's version checks against the database
+}
+
+class QuestionStore:
+    """Keep the in-memory QuestionBank in step with the questions table.
+
+    The database holds the questions plus a version counter bumped in the
+    same transaction as every change. Changes made here are applied to the
+    bank straight away. A refresher thread checks the counter every
+    poll_interval and reloads if something else changed the table, such
+    as another server sharing MySQL during a redeploy, so requests never
+    wait on the database for it.
+    Without a database the store just edits the local bank.
+    """
+
+    def __init__(self, bank, config):
+        self.bank = bank
+        self.config = config
+        self.lock = threading.Lock()
+        self.enabled = False
+        self.version = 0       # Database version the local bank reflects
+        self.refresher = None
+
+    def start(self, initial_questions=None):
+        """Seed the table if this is a new database, then load the bank from it.
+
+        initial_questions is called only when seeding; if it returns a list,
+        that is imported instead of the bank's current (default) questions.
+        """
+        self.enabled = True
+        try:
+            self._seed(initial_questions)
+            with self.lock:
+                self._reload()
+        except Exception as e:
+            self.enabled = False
+            log.error("Error loading shared question bank, using local questions: %s", e)
+            questions = initial_questions() if initial_questions else None
+            if questions:
+                self.bank.load(questions)
+            return
+        if self.refresher is None:
+            self.refresher = threading.Thread(target=self._refresh, name='question-refresh', daemon=True)
+            self.refresher.start()
+
+    def _refresh(self):
+        while True:
+            time.sleep(self.config['poll_interval'])
+            self.sync()
+
+    @staticmethod
+    def _row_values(question):
+        return (
+            question['question'],
+            json.dumps(question['options']),
+            question['correctAnswer'],
+            question.get('explanation', ''),
+            json.dumps(question['tags']) if 'tags' in question else None
+        )
+
+    @staticmethod
+    def _from_row(row):
+        question_id, text, options, correct_answer, explanation, tags = row
+        if isinstance(options, (bytes, bytearray)):
+            options = options.decode('utf-8')
+        question = {
+            'id': question_id,
+            'question': text,
+            'options': json.loads(options) if isinstance(options, str) else options,
+            'correctAnswer': correct_answer,
+            'explanation': explanation or ''
+        }
+        if tags is not None:
+            if isinstance(tags, (bytes, bytearray)):
+                tags = tags.decode('utf-8')
+            question['tags'] = json.loads(tags) if isinstance(tags, str) else tags
+        return question
+
+    def _seed(self, initial_questions):
+        """Fill a brand new table. Only the first server to get here does it."""
+        conn = get_db_connection()
+        if not conn:
+            raise RuntimeError('No database connection')
+        try:
+            cursor = conn.cursor()
+            cursor.execute(question_sql('claim_seed', conn.backend))
+            if cursor.rowcount != 1:
+                conn.rollback()
+                return
+            questions = initial_questions() if initial_questions else None
+            if questions:
+                # Assigns ids to any legacy questions that lack one
+                self.bank.load(questions)
+            cursor.executemany(question_sql('insert_with_id', conn.backend),
+                               [(q['id'],) + self._row_values(q) for q in self.bank.snapshot()])
+            conn.commit()
+            log.info("Seeded shared question bank with %d questions", len(self.bank))
+        finally:
+            conn.close()
+
+    def _reload(self):
+        """Load the whole bank from the database. Called with the lock held."""
+        conn = get_db_connection()
+        if not conn:
+            return
+        try:
+            started = time.perf_counter()
+            cursor = conn.cursor()
+            while True:
+                cursor.execute(question_sql('version', conn.backend))
+                version = cursor.fetchone()[0]
+                cursor.execute(question_sql('all', conn.backend))
+                questions = [self._from_row(tuple(row)) for row in cursor.fetchall()]
+                cursor.execute(question_sql('version', conn.backend))
+                # A writer slipped in between the reads; read again for a consistent bank
+                if cursor.fetchone()[0] == version:
+                    break
+            conn.commit()
+            db_query_seconds.observe(time.perf_counter() - started, conn.backend, 'question_reload')
+        finally:
+            conn.close()
+        if len(self.bank):
+            self.bank.merge(questions)
+        else:
+            self.bank.load(questions)
+        self.version = version
+
+    def _poll_version(self):
+        conn = get_db_connection()
+        if not conn:
+            return self.version
+        try:
+            started = time.perf_counter()
+            cursor = conn.cursor()
+            cursor.execute(question_sql('version', conn.backend))
+            version = cursor.fetchone()[0]
+            conn.commit()
+            db_query_seconds.observe(time.perf_counter() - started, conn.backend, 'question_version')
+            return version
+        finally:
+            conn.close()
+
+    def sync(self):
+        """Reload if something else changed the table. Run by the refresher thread."""
+        if not self.enabled:
+            return
+        with self.lock:
+            try:
+                if self._poll_version() != self.version:
+                    self._reload()
+            except Exception as e:
+                # Serve the questions we have and try again on the next poll
+                log.error("Error syncing shared question bank: %s", e)
+
+    def _write(self, work):
+        """Run work(cursor, backend) plus the version bump in a transaction. Returns (work's result, new version).
+
+        If work returns None nothing is committed and the version is None.
+        """
+        conn = get_db_connection()
+        if not conn:
+            raise RuntimeError('No database connection')
+        try:
+            started = time.perf_counter()
+            cursor = conn.cursor()
+            result = work(cursor, conn.backend)
+            if result is None:
+                # Closing hands the connection back to the pool, which rolls back
+                return None, None
+            cursor.execute(question_sql('bump', conn.backend))
+            cursor.execute(question_sql('version', conn.backend))
+            version = cursor.fetchone()[0]
+            conn.commit()
+            db_query_seconds.observe(time.perf_counter() - started, conn.backend, 'question_write')
+            return result, version
+        finally:
+            conn.close()
+
+    def _apply(self, version, change):
+        """Apply a committed change locally, or reload if other changes landed first."""
+        with self.lock:
+            if version == self.version + 1:
+                result = change()
+                self.version = version
+            else:
+                self._reload()
+                result = None
+        return result
+
+    def add(self, fields):
+        """Add a question and return it with its assigned id."""
+        if not self.enabled:
+            return self.bank.add(fields)
+        def insert(cursor, backend):
+            cursor.execute(question_sql('insert', backend), self._row_values(fields))
+            return cursor.lastrowid
+        question_id, version = self._write(insert)
+        question = dict(fields, id=question_id)
+        self._apply(version, lambda: self.bank.add(question))
+        return question
+
+    def add_many(self, questions):
+        """Add a list of questions in a single transaction and return them with their ids."""
+        if not self.enabled:
+            return [self.bank.add(fields) for fields in questions]
+        def insert(cursor, backend):
+            added = []
+            statement = question_sql('insert', backend)
+            for fields in questions:
+                cursor.execute(statement, self._row_values(fields))
+                added.append(dict(fields, id=cursor.lastrowid))
+            return added
+        added, version = self._write(insert)
+        self._apply(version, lambda: [self.bank.add(question) for question in added])
+        return added
+
+    def update(self, question_id, changes):
+        """Apply field changes to a question and return the updated question, or None if it's gone.
+
+        The question may be deleted (by another request, or another server) between the
+        caller's lookup and this call, so both the bank and the table are re-checked.
+        """
+        if not self.enabled:
+            return self.bank.update(question_id, changes)
+        with self.lock:
+            current = self.bank.get(question_id)
+            if current is None:
+                return None
+            question = dict(current, **changes)
+        def write(cursor, backend):
+            cursor.execute(question_sql('update', backend), self._row_values(question) + (question_id,))
+            # MySQL's rowcount skips rows whose values didn't change, so look the row up instead
+            cursor.execute(question_sql('exists', backend), (question_id,))
+            return True if cursor.fetchone() else None
+        found, version = self._write(write)
+        if found is None:
+            return None
+        self._apply(version, lambda: self.bank.update(question_id, changes))
+        return question
+
+    def remove(self, question_id):
+        """Delete a question and return it, or None if it's gone."""
+        if not self.enabled:
+            return self.bank.remove(question_id)
+        question = self.bank.get(question_id)
+        if question is None:
+            return None
+        def delete(cursor, backend):
+            cursor.execute(question_sql('delete', backend), (question_id,))
+            return True if cursor.rowcount else None
+        deleted, version = self._write(delete)
+        if deleted is None:
+            return None
+        self._apply(version, lambda: self.bank.remove(question_id))
+        return question
+
+question_store = QuestionStore(question_bank, QUESTION_STORE_CONFIG)
+
+# Points awarded for each correct answer
+POINTS_PER_QUESTION = 10
+
+class GradingEngine:
+    """Grade many submissions at once against an answer-key array.
+
+    The key is a dense array indexed by question id, rebuilt once per
+    question bank version. A batch is a 2-D matrix of answers (one row
+    per submission, -1 for unanswered), so grading is a single vectorised
+    comparison when NumPy is installed. Without NumPy the same rules run
+    in plain Python.
+    """
+
+    # Key value for ids that aren't in the bank; never equal to a valid answer
+    MISSING = -2
+
+    def __init__(self, bank):
+        self.bank = bank
+        self.lock = threading.Lock()
+        self.key = None
+        self.key_version = None
+
+    def answer_key(self):
+        """Return (key_by_id, default_ids) for the current bank version."""
+        if self.key_version != self.bank.version:
+            with self.lock:
+                if self.key_version != self.bank.version:
+                    version = self.bank.version
+                    questions = self.bank.snapshot()
+                    size = max([q['id'] for q in questions] + [0]) + 1
+                    if NUMPY_AVAILABLE:
+                        key_by_id = np.full(size, self.MISSING, dtype=np.int16)
+                        key_by_id[[q['id'] for q in questions]] = [q['correctAnswer'] for q in questions]
+                    else:
+                        key_by_id = [self.MISSING] * size
+                        for q in questions:
+                            key_by_id[q['id']] = q['correctAnswer']
+                    self.key = (key_by_id, [q['id'] for q in questions])
+                    self.key_version = version
+        return self.key
+
+    @staticmethod
+    def _clean(answer):
+        # JSON true is an int to Python, but never an option index
+        return answer if isinstance(answer, int) and not isinstance(answer, bool) and answer >= 0 else -1
+
+    def grade_batch(self, submissions, question_ids=None):
+        """Grade a list of answer lists.
+
+        question_ids is either one list shared by every submission, a list of
+        lists (one per submission), or None to match answers to the bank in
+        order. Returns a dict with 'scores' (one int per submission),
+        'correct' (per-question booleans) and 'bitmaps' (the same booleans
+        packed into bytes, bit i of the row for question i).
+        """
+        key_by_id, default_ids = self.answer_key()
+        if question_ids is None:
+            question_ids = default_ids
+        per_row_ids = bool(question_ids) and isinstance(question_ids[0], (list, tuple))
+        
+        if not submissions:
+            return {'scores': [], 'correct': [], 'bitmaps': []}
+        
+        width = max(len(row) for row in submissions)
+        if not per_row_ids:
+            width = min(width, len(question_ids))
+        
+        if not NUMPY_AVAILABLE:
+            return self._grade_python(submissions, question_ids, per_row_ids, width, key_by_id)
+        
+        answers = np.full((len(submissions), width), -1, dtype=np.int16)
+        ids = np.zeros((len(submissions), width), dtype=np.int64)
+        for r, row in enumerate(submissions):
+            row = row[:width]
+            answers[r, :len(row)] = [self._clean(a) for a in row]
+            row_ids = question_ids[r] if per_row_ids else question_ids
+            row_ids = row_ids[:width]
+            ids[r, :len(row_ids)] = row_ids
+        
+        # Ids beyond the key (or padding) look up a MISSING slot
+        in_range = (ids >= 0) & (ids < len(key_by_id))
+        key = np.where(in_range, key_by_id[np.clip(ids, 0, len(key_by_id) - 1)], self.MISSING)
+        correct = (answers == key) & (answers >= 0)
+        scores = correct.sum(axis=1) * POINTS_PER_QUESTION
+        bitmaps = np.packbits(correct, axis=1, bitorder='little')
+        
+        return {
+            'scores': scores.tolist(),
+            'correct': correct.tolist(),
+            'bitmaps': [row.tobytes() for row in bitmaps]
+        }
+
+    def _grade_python(self, submissions, question_ids, per_row_ids, width, key_by_id):
+        scores, correct_rows, bitmaps = [], [], []
+        for r, row in enumerate(submissions):
+            row_ids = question_ids[r] if per_row_ids else question_ids
+            correct = []
+            for i in range(width):
+                answer = self._clean(row[i]) if i < len(row) else -1
+                question_id = row_ids[i] if i < len(row_ids) else -1
+                expected = key_by_id[question_id] if 0 <= question_id < len(key_by_id) else self.MISSING
+                correct.append(answer >= 0 and answer == expected)
+            packed = bytearray((width + 7) // 8)
+            for i, ok in enumerate(correct):
+                if ok:
+                    packed[i // 8] |= 1 << (i % 8)
+            scores.append(sum(correct) * POINTS_PER_QUESTION)
+            correct_rows.append(correct)
+            bitmaps.append(bytes(packed))
+        return {'scores': scores, 'correct': correct_rows, 'bitmaps': bitmaps}
+
+grading_engine = GradingEngine(question_bank)
+
+def calculate_score(answers, question_ids=None):
+    """Calculate the quiz score based on answers.
+
+    With question_ids, answers[i] is graded against that question; otherwise
+    answers are matched to the bank in order.
+    """
+    return grading_engine.grade_batch([answers], question_ids)['scores'][0]
+
+# Number of entries served by /api/scores and /leaderboard
+LEADERBOARD_SIZE = 10
+
+def rank_key(score, time_taken):
+    """Sort key for the leaderboard order: score DESC, then time_taken ASC with unknown times last."""
+    return (-score, time_taken is None, time_taken or 0)
+
+class Leaderboard:
+    """Top-N scores kept in memory, sorted by score DESC then time_taken ASC.
+
+    Seeded from the database at startup and updated on every submission,
+    so the leaderboard routes never have to query the database.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.keys = []
+        self.entries = []
+        self.counter = 0
+        self.snapshot = ()
+        self.lock = threading.Lock()
+        self.listeners = []  # Called with no arguments whenever the board changes
+
+    def _notify(self):
+        for listener in self.listeners:
+            listener()
+
+    def add(self, entry):
+        """Insert a score entry if it makes the top N. Returns True if the board changed."""
+        with self.lock:
+            self.counter += 1
+            # The counter keeps earlier submissions ahead on exact ties
+            key = rank_key(entry['score'], entry['timeTaken']) + (self.counter,)
+            if len(self.keys) >= self.size and key >= self.keys[-1]:
+                return False
+            position = bisect.bisect(self.keys, key)
+            self.keys.insert(position, key)
+            self.entries.insert(position, entry)
+            del self.keys[self.size:]
+            del self.entries[self.size:]
+            self.snapshot = tuple(self.entries)
+        self._notify()
+        return True
+
+    def replace(self, entries):
+        """Throw away the current board and rebuild it from the given entries."""
+        with self.lock:
+            self.keys = []
+            self.entries = []
+            self.counter = 0
+            self.snapshot = ()
+        for entry in entries:
+            self.add(entry)
+        self._notify()
+
+    def top(self):
+        """Return the current board. Reads are lock-free."""
+        return list(self.snapshot)
+
+leaderboard_cache = Leaderboard(LEADERBOARD_SIZE)
+
+# Live leaderboard push settings
+LEADERBOARD_STREAM_CONFIG = {
+    'min_interval': 1.0,  # At most one push per this many seconds, however many submissions arrive
+    'heartbeat': 15,      # Seconds between keep-alive comments on idle streams
+    'backlog': 64         # Recent diffs kept so briefly stalled clients can catch up
+}
+
+class LeaderboardBroadcaster:
+    """Fan leaderboard changes out to every stream subscriber.
+
+    Changes are coalesced: a single publisher thread wakes at most once per
+    min_interval, diffs the board against what it last published and encodes
+    one SSE message. Subscribers all wait on one shared condition (or an
+    async listener) and send that same pre-encoded message, so the per-client
+    cost is just the write.
+    """
+
+    def __init__(self, board, config):
+        self.board = board
+        self.config = config
+        self.condition = threading.Condition()
+        self.dirty = threading.Event()
+        self.version = 0
+        self.published = tuple(board.top())
+        self.messages = collections.deque(maxlen=config['backlog'])  # (version, encoded message)
+        self.listeners = []  # Extra wake-up callbacks, e.g. for async servers
+        self.subscribers = 0
+        self.thread = None
+
+    def start(self):
+        self.published = tuple(self.board.top())
+        self.board.listeners.append(self.dirty.set)
+        self.thread = threading.Thread(target=self._run, name='leaderboard-broadcast', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            self.dirty.wait()
+            self.dirty.clear()
+            self.publish()
+            # Anything that changes during this pause goes out together in the next push
+            time.sleep(self.config['min_interval'])
+
+    def publish(self):
+        current = tuple(self.board.top())
+        previous = self.published
+        changes = [{'rank': rank + 1, 'entry': entry}
+                   for rank, entry in enumerate(current)
+                   if rank >= len(previous) or previous[rank] != entry]
+        if not changes and len(current) == len(previous):
+            return
+        with self.condition:
+            self.version += 1
+            self.published = current
+            data = json.dumps({'version': self.version, 'size': len(current), 'changes': changes})
+            message = f"id: {self.version}\nevent: diff\ndata: {data}\n\n".encode('utf-8')
+            self.messages.append((self.version, message))
+            self.condition.notify_all()
+        for listener in self.listeners:
+            listener()
+
+    def snapshot_message(self):
+        """Full board as an SSE event, sent to new subscribers and to ones that fell too far behind."""
+        with self.condition:
+            version, board = self.version, self.published
+        data = json.dumps({'version': version, 'entries': list(board)})
+        return version, f"id: {version}\nevent: snapshot\ndata: {data}\n\n".encode('utf-8')
+
+    def messages_since(self, version):
+        """Return (latest version, messages to send) for a subscriber that has seen version."""
+        with self.condition:
+            if self.version == version:
+                return version, []
+            if not self.messages or self.messages[0][0] > version + 1:
+                # The diffs it needs have rotated out; start it over with a snapshot
+                latest, message = self.snapshot_message()
+                return latest, [message]
+            return self.version, [message for v, message in self.messages if v > version]
+
+    def wait(self, version, timeout):
+        """Block until a version newer than version is published or timeout passes."""
+        with self.condition:
+            if self.version == version:
+                self.condition.wait(timeout)
+
+    def stream(self):
+        """SSE byte stream for one subscriber (blocking; one thread per client under WSGI)."""
+        with self.condition:
+            self.subscribers += 1
+        try:
+            version, message = self.snapshot_message()
+            yield message
+            while True:
+                self.wait(version, self.config['heartbeat'])
+                version, messages = self.messages_since(version)
+                if messages:
+                    yield b''.join(messages)
+                else:
+                    yield b': keep-alive\n\n'
+        finally:
+            with self.condition:
+                self.subscribers -= 1
+
+leaderboard_broadcaster = LeaderboardBroadcaster(leaderboard_cache, LEADERBOARD_STREAM_CONFIG)
+
+def load_top_scores(limit):
+    """Read the top scores straight from the database."""
+    scores = []
+    conn = get_db_connection()
+    if not conn:
+        return scores
+    try:
+        cursor = conn.cursor(dictionary=True) if conn.backend == 'mysql' else conn.cursor()
+        query = score_sql('top', conn.backend)
+        
+        started = time.perf_counter()
+        cursor.execute(query, (limit,))
+        rows = cursor.fetchall()
+        db_query_seconds.observe(time.perf_counter() - started, conn.backend, 'top')
+        
+        for score in rows:
+            score = dict(score)
+            # Convert MySQL datetime to string
+            date_taken = score['date_taken']
+            scores.append({
+                'playerName': score['player_name'],
+                'score': score['score'],
+                'totalQuestions': score['total_questions'],
+                'timeTaken': score['time_taken'],
+                'dateTaken': date_taken.isoformat() if hasattr(date_taken, 'isoformat') else date_taken
+            })
+    finally:
+        conn.close()
+    return scores
+
+def refresh_leaderboard():
+    """Rebuild the cached leaderboard from the database."""
+    try:
+        leaderboard_cache.replace(load_top_scores(LEADERBOARD_SIZE))
+        log.info("Leaderboard loaded with %d entries", len(leaderboard_cache.top()))
+    except Exception as e:
+        log.error("Error loading leaderboard from database: %s", e)
+
+def claim_file(base_path, mode, **kwargs):
+    """Open the first of base_path, base_path.1, .2, ... that no other process holds.
+
+    export_scores.py and the benchmarks import server.py too, and must not
+    take over a running server's files. Slot 0 is base_path itself, so the
+    server alone behaves as if there were no slots at all, and a restarted
+    one picks up whichever slot is free (along with anything a previous
+    process left in it). Returns (path, file).
+    """
+    slot = 0
+    while True:
+        path = base_path if slot == 0 else f'{base_path}.{slot}'
+        claimed = open(path, mode, **kwargs)
+        if not FCNTL_AVAILABLE:
+            return path, claimed
+        try:
+            fcntl.flock(claimed.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return path, claimed
+        except OSError:
+            claimed.close()
+            slot += 1
+
+# Write-behind settings for score ingestion
+INGEST_CONFIG = {
+    'batch_size': 200,        # Flush as soon as this many scores are waiting
+    'flush_interval': 0.05,   # Seconds to wait for a batch to fill before flushing anyway
+    'retry_delay': 1.0,       # Seconds to back off after a failed flush
+    'durable': True,          # fsync every accepted score to the append log before acknowledging it
+    'log_path': 'score_ingest.log',
+    'compact_bytes': 1 << 20, # Rewrite the log without written scores once it grows past this
+    'rejected_suffix': '.rejected'  # Scores the database refuses are moved to the log path plus this
+}
+
+def is_record_error(error):
+    """True if a failed write was caused by the values written rather than by the database itself."""
+    kinds = (TypeError, ValueError, KeyError, sqlite3.DataError, sqlite3.IntegrityError,
+             sqlite3.ProgrammingError, sqlite3.InterfaceError)
+    if MYSQL_AVAILABLE:
+        kinds += (mysql.connector.errors.DataError, mysql.connector.errors.IntegrityError,
+                  mysql.connector.errors.ProgrammingError)
+    return isinstance(error, kinds)
+
+class ScoreIngestQueue:
+    """Queue accepted scores and write them to quiz_scores in batches from a background thread.
+
+    With 'durable' on, each score is appended to an fsynced log before it is
+    acknowledged. After a batch commits a checkpoint line is appended, and on
+    startup any scores past the last checkpoint are replayed, so an
+    acknowledged score survives a crash. Scores are queued in log order, so
+    a checkpoint covers every score before it. Once the log passes
+    compact_bytes it is rewritten with just the scores still waiting.
+
+    When a batch fails its scores are retried one at a time. A score the
+    database refuses on its own (a bad value, say) is appended to the
+    rejected file instead of being retried forever in front of the rest.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.pending = []
+        self.in_flight = 0
+        self.seq = 0
+        self.condition = threading.Condition()
+        self.log_lock = threading.Lock()
+        self.log_file = None
+        self.log_path = config['log_path']
+        self.thread = None
+        self.running = False
+        self.rejected_file = None
+        self.stats = {'accepted': 0, 'written': 0, 'batches': 0, 'failures': 0, 'rejected': 0}
+
+    def start(self):
+        """Replay anything left in the log, then start the writer thread."""
+        if self.config['durable']:
+            self.log_file = self._claim_log()
+            self._replay_log()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='score-ingest', daemon=True)
+        self.thread.start()
+
+    def _claim_log(self):
+        """Open the first log file no other process holds.
+
+        Each process needs its own log, or one process's checkpoint would
+        truncate another's unflushed scores.
+        """
+        self.log_path, log_file = claim_file(self.config['log_path'], 'a', encoding='utf-8')
+        return log_file
+
+    def _replay_log(self):
+        path = self.log_path
+        if not os.path.exists(path):
+            return
+        records = []
+        checkpoint = 0
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn final line means that score was never acknowledged
+                    continue
+                if 'checkpoint' in entry:
+                    checkpoint = max(checkpoint, entry['checkpoint'])
+                else:
+                    records.append(entry)
+        # Logs written before scores were queued in seq order may have them out of order
+        replay = sorted((r for r in records if r['seq'] > checkpoint), key=lambda r: r['seq'])
+        self.seq = max([checkpoint] + [r['seq'] for r in records])
+        self.pending.extend(replay)
+        if replay:
+            log.info("Replaying %d unflushed scores from %s", len(replay), path)
+
+    def submit(self, record):
+        """Accept a score for writing. Returns once it is durable (if enabled) and queued."""
+        self.submit_many([record])
+
+    def submit_many(self, records):
+        """Accept several scores with a single log write and fsync."""
+        with self.log_lock:
+            stamped = []
+            for record in records:
+                self.seq += 1
+                stamped.append(dict(record, seq=self.seq))
+            if self.log_file is not None:
+                self.log_file.write(''.join(json.dumps(record) + '\n' for record in stamped))
+                self.log_file.flush()
+                os.fsync(self.log_file.fileno())
+            # Still under the log lock, so pending stays in seq order and a
+            # checkpoint can never cover a lower seq that hasn't been written
+            with self.condition:
+                was_empty = not self.pending
+                self.pending.extend(stamped)
+                self.stats['accepted'] += len(stamped)
+                # Wake the writer to start a batch, and again to cut it short once it is full
+                if was_empty or len(self.pending) >= self.config['batch_size']:
+                    self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending and self.running:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                # Give the batch a moment to fill up unless it is already full
+                if len(self.pending) < self.config['batch_size'] and self.running:
+                    self.condition.wait(self.config['flush_interval'])
+                batch = self.pending[:self.config['batch_size']]
+                del self.pending[:len(batch)]
+                self.in_flight = len(batch)
+
+            if self._write_batch(batch):
+                done = written = len(batch)
+            else:
+                # One bad score fails the whole batch, so find it by writing them singly
+                done, written = self._write_each(batch)
+            with self.condition:
+                # Anything not dealt with goes back in front to be tried again later
+                self.pending[:0] = batch[done:]
+                self.in_flight = 0
+                self.stats['written'] += written
+                if done == len(batch):
+                    self.stats['batches'] += 1
+                else:
+                    self.stats['failures'] += 1
+                self.condition.notify_all()
+            if done:
+                self._checkpoint(batch[done - 1]['seq'])
+            if done < len(batch):
+                time.sleep(self.config['retry_delay'])
+
+    @staticmethod
+    def _insert(conn, records):
+        conn.cursor().executemany(score_sql('insert_once', conn.backend), [(
+            r['player_name'],
+            r['score'],
+            r['total_questions'],
+            r['time_taken'],
+            datetime.fromisoformat(r['date_taken']) if conn.backend == 'mysql' else r['date_taken'],
+            r['answers'],
+            r.get('question_ids'),
+            r.get('submission_id')
+        ) for r in records])
+
+    def _write_batch(self, batch):
+        conn = get_db_connection()
+        if not conn:
+            return False
+        try:
+            started = time.perf_counter()
+            self._insert(conn, batch)
+            conn.commit()
+            db_query_seconds.observe(time.perf_counter() - started, conn.backend, 'insert_batch')
+            log.debug("Wrote batch of %d scores to database", len(batch))
+            return True
+        except Exception as e:
+            log.error("Error writing score batch to database: %s", e)
+            return False
+        finally:
+            conn.close()
+
+    def _write_each(self, batch):
+        """Write a failed batch one score at a time. Returns (scores dealt with, scores written).
+
+        Stops at the first failure that isn't the score's own fault, leaving
+        that score and the rest to be retried.
+        """
+        conn = get_db_connection()
+        if not conn:
+            return 0, 0
+        done = written = 0
+        try:
+            for record in batch:
+                try:
+                    self._insert(conn, [record])
+                    conn.commit()
+                    written += 1
+                except Exception as e:
+                    conn.rollback()
+                    if not is_record_error(e):
+                        log.error("Error writing score to database: %s", e)
+                        break
+                    self._reject(record, e)
+                done += 1
+        except Exception as e:
+            log.error("Error writing scores one at a time: %s", e)
+        finally:
+            conn.close()
+        return done, written
+
+    def _reject(self, record, error):
+        """Move a score the database won't take to the rejected file."""
+        path = self.log_path + self.config['rejected_suffix']
+        if self.rejected_file is None:
+            self.rejected_file = open(path, 'a', encoding='utf-8')
+        self.rejected_file.write(json.dumps(dict(record, error=str(error)), default=str) + '\n')
+        self.rejected_file.flush()
+        os.fsync(self.rejected_file.fileno())
+        with self.condition:
+            self.stats['rejected'] += 1
+        log.error("Moved score %s to %s: %s", record.get('seq'), path, error)
+
+    def _checkpoint(self, seq):
+        """Record that everything up to seq is in the database."""
+        if self.log_file is None:
+            return
+        with self.log_lock:
+            with self.condition:
+                outstanding = list(self.pending)
+            if not outstanding:
+                # Nothing outstanding, so the log can start over
+                self.log_file.seek(0)
+                self.log_file.truncate()
+            elif self.log_file.tell() >= self.config['compact_bytes']:
+                self._compact(seq, outstanding)
+                return
+            self.log_file.write(json.dumps({'checkpoint': seq}) + '\n')
+            self.log_file.flush()
+            os.fsync(self.log_file.fileno())
+
+    def _compact(self, seq, outstanding):
+        """Replace the log with one holding only the scores not yet written. Called with log_lock held.
+
+        The new file is locked before it is renamed into place, so no other
+        process can claim this slot in between.
+        """
+        compact_path = self.log_path + '.compact'
+        compacted = open(compact_path, 'w', encoding='utf-8')
+        if FCNTL_AVAILABLE:
+            fcntl.flock(compacted.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        compacted.write(json.dumps({'checkpoint': seq}) + '\n')
+        compacted.write(''.join(json.dumps(record) + '\n' for record in outstanding))
+        compacted.flush()
+        os.fsync(compacted.fileno())
+        os.replace(compact_path, self.log_path)
+        self.log_file.close()
+        self.log_file = compacted
+
+    def flush(self, timeout=None):
+        """Block until every queued score has been written. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            self.condition.notify_all()
+            while self.pending or self.in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+        return True
+
+    def stop(self):
+        """Flush what is queued and stop the writer thread."""
+        if self.thread is None:
+            return
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.thread.join(timeout=10)
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+        if self.rejected_file is not None:
+            self.rejected_file.close()
+            self.rejected_file = None
+
+    def get_stats(self):
+        with self.condition:
+            stats = dict(self.stats)
+            stats['pending'] = len(self.pending) + self.in_flight
+        return stats
+
+score_ingest = ScoreIngestQueue(INGEST_CONFIG)
+
+def max_score_id():
+    """Return the highest quiz_scores id, or 0 for an empty table."""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT MAX(id) FROM quiz_scores')
+        return cursor.fetchone()[0] or 0
+    finally:
+        conn.close()
+
+def read_score_chunk(cursor, backend, last_id, max_id, limit):
+    """Read up to limit (id, score, time_taken, answers, question_ids) rows with last_id < id <= max_id.
+
+    Keyset pagination on the primary key, so every chunk is an index range scan.
+    """
+    placeholder = '%s' if backend == 'mysql' else '?'
+    cursor.execute(
+        f'SELECT id, score, time_taken, answers, question_ids FROM quiz_scores '
+        f'WHERE id > {placeholder} AND id <= {placeholder} ORDER BY id LIMIT {placeholder}',
+        (last_id, max_id, limit)
+    )
+    return [tuple(row) for row in cursor.fetchall()]
+
+def decode_stored_answers(answers, question_ids, default_ids):
+    """Return (answers, question_ids) for a stored score, or None if it can't be graded.
+
+    Rows stored before quiz sessions existed have no question ids and were
+    graded against the whole bank in order (default_ids).
+    """
+    answers = json.loads(answers) if isinstance(answers, (str, bytes)) else answers
+    if not answers:
+        # Legacy /submit-score rows have no answers
+        return None
+    question_ids = json.loads(question_ids) if isinstance(question_ids, (str, bytes)) else question_ids
+    if not question_ids:
+        if len(answers) != len(default_ids):
+            # Graded against a bank of a different size; the key for it is gone
+            return None
+        question_ids = default_ids
+    return answers, question_ids
+
+# Answer-key re-grade settings
+REGRADE_CONFIG = {
+    'chunk_size': 1000,             # Rows read, graded and updated per transaction
+    'pause_between_chunks': 0.01,   # Seconds to yield to other writers between chunks
+    'state_path': 'regrade_state.json'
+}
+
+class RegradeJob:
+    """Re-score stored quiz_scores rows against the current answer key.
+
+    Rows are read in id order with keyset pagination (WHERE id > last_id),
+    graded a chunk at a time with grading_engine, and changed scores are
+    written back with a bulk UPDATE. Each chunk commits and hands back its
+    connection, so other readers and writers are never blocked for long.
+    Progress is saved after every chunk so an interrupted job can resume.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stop_requested = False
+        self.state = self._load_state()
+
+    def _load_state(self):
+        state = {'status': 'idle'}
+        try:
+            with open(self.config['state_path'], 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('status') == 'running':
+                # The process stopped mid-run; it can be resumed from last_id
+                state['status'] = 'interrupted'
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log.error("Error reading re-grade state: %s", e)
+        return state
+
+    def _save_state(self):
+        path = self.config['state_path']
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, path)
+
+    def progress(self):
+        with self.lock:
+            state = dict(self.state)
+        if state.get('maxId'):
+            state['percent'] = round(100.0 * min(state['lastId'], state['maxId']) / state['maxId'], 1)
+        return state
+
+    def start(self, resume=False):
+        """Start a new run, or resume an interrupted/stopped one. Returns False if already running."""
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return False
+            if not (resume and self.state.get('status') in ('interrupted', 'stopped', 'failed')):
+                self.state = {
+                    'status': 'running',
+                    'lastId': 0,
+                    'maxId': None,
+                    'processed': 0,
+                    'changed': 0,
+                    'skipped': 0,
+                    'startedAt': datetime.now().isoformat(),
+                    'finishedAt': None,
+                    'error': None
+                }
+            self.state['status'] = 'running'
+            self.stop_requested = False
+            self.thread = threading.Thread(target=self._run, name='regrade', daemon=True)
+            self.thread.start()
+        return True
+
+    def stop(self):
+        """Ask a running job to stop after its current chunk."""
+        self.stop_requested = True
+
+    def _run(self):
+        try:
+            # Scores still waiting in the ingest queue are graded at submit time anyway,
+            # but flushing first means the run covers everything accepted so far
+            score_ingest.flush(timeout=30)
+            if self.state['maxId'] is None:
+                self.state['maxId'] = max_score_id()
+            
+            while not self.stop_requested and self.state['lastId'] < self.state['maxId']:
+                if not self._run_chunk():
+                    break
+                self._save_state()
+                time.sleep(self.config['pause_between_chunks'])
+            
+            with self.lock:
+                if self.stop_requested:
+                    self.state['status'] = 'stopped'
+                else:
+                    self.state['status'] = 'completed'
+                    self.state['finishedAt'] = datetime.now().isoformat()
+            refresh_leaderboard()
+        except Exception as e:
+            log.error("Error during re-grade: %s", e)
+            with self.lock:
+                self.state['status'] = 'failed'
+                self.state['error'] = str(e)
+        self._save_state()
+
+    def _run_chunk(self):
+        """Grade one chunk of rows. Returns False when there are no rows left."""
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            rows = read_score_chunk(cursor, conn.backend, self.state['lastId'], self.state['maxId'], self.config['chunk_size'])
+            if not rows:
+                return False
+            
+            default_ids = [q['id'] for q in question_bank.snapshot()]
+            row_ids, submissions, question_ids, old_scores = [], [], [], []
+            skipped = 0
+            for row_id, old_score, time_taken, answers, ids in rows:
+                decoded = decode_stored_answers(answers, ids, default_ids)
+                if decoded is None:
+                    skipped += 1
+                    continue
+                row_ids.append(row_id)
+                submissions.append(decoded[0])
+                question_ids.append(decoded[1])
+                old_scores.append(old_score)
+            
+            updates = []
+            if submissions:
+                scores = grading_engine.grade_batch(submissions, question_ids)['scores']
+                updates = [(new, row_id) for row_id, old, new in zip(row_ids, old_scores, scores) if new != old]
+            if updates:
+                placeholder = '%s' if conn.backend == 'mysql' else '?'
+                cursor.executemany(f'UPDATE quiz_scores SET score = {placeholder} WHERE id = {placeholder}', updates)
+            conn.commit()
+            
+            with self.lock:
+                self.state['lastId'] = rows[-1][0]
+                self.state['processed'] += len(rows)
+                self.state['changed'] += len(updates)
+                self.state['skipped'] += skipped
+            return True
+        finally:
+            conn.close()
+
+regrade_job = RegradeJob(REGRADE_CONFIG)
+
+# Per-question analytics settings
+ANALYTICS_CONFIG = {
+    'rebuild_on_startup': True,  # Backfill the running aggregates from quiz_scores at startup
+    'chunk_size': 5000           # Rows per chunk during a rebuild
+}
+
+# Options per question, as enforced by add_question
+OPTIONS_PER_QUESTION = 4
+
+class ItemAnalytics:
+    """Running item statistics for each question.
+
+    Every graded submission updates a few sums per question, from which we
+    derive the percentage correct, option pick rates, average time and a
+    point-biserial discrimination index (how well getting this question
+    right tracks the taker's overall result). rebuild() recomputes the
+    sums from quiz_scores in vectorised chunks for backfill.
+    """
+
+    # Column order of the per-question aggregate rows
+    FIELDS = ['attempts', 'answered', 'correct', 'sum_result', 'sum_result_sq', 'sum_result_correct', 'time', 'timed']
+
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.submissions = 0
+        self.delta = None
+        self.rebuilding = False
+
+    @staticmethod
+    def _empty():
+        return [0, 0, 0, 0.0, 0.0, 0.0, 0.0, 0] + [0] * OPTIONS_PER_QUESTION
+
+    @classmethod
+    def _apply(cls, stats, question_ids, answers, correct, time_taken):
+        """Add one graded submission to a stats dict."""
+        if not question_ids:
+            return
+        # The taker's overall result as a fraction, so quizzes of any length are comparable
+        result = sum(correct) / len(question_ids)
+        # Submissions without a known time are left out of the time average
+        timed = time_taken is not None
+        time_share = time_taken / len(question_ids) if timed else 0.0
+        for i, question_id in enumerate(question_ids):
+            row = stats.get(question_id)
+            if row is None:
+                row = stats[question_id] = cls._empty()
+            answer = answers[i] if i < len(answers) else None
+            is_correct = i < len(correct) and correct[i]
+            row[0] += 1
+            row[3] += result
+            row[4] += result * result
+            row[6] += time_share
+            row[7] += timed
+            if isinstance(answer, int) and 0 <= answer < OPTIONS_PER_QUESTION:
+                row[1] += 1
+                row[8 + answer] += 1
+            if is_correct:
+                row[2] += 1
+                row[5] += result
+
+    def record(self, question_ids, answers, correct, time_taken):
+        """Update the aggregates with one graded submission."""
+        with self.lock:
+            self._apply(self.stats, question_ids, answers, correct, time_taken)
+            self.submissions += 1
+            if self.delta is not None:
+                # A rebuild is running; remember this so it survives the swap
+                self.delta.append((question_ids, answers, correct, time_taken))
+
+    def rebuild(self):
+        """Recompute every aggregate from quiz_scores, grading against the current answer key."""
+        with self.lock:
+            if self.rebuilding:
+                return False
+            self.rebuilding = True
+            self.delta = []
+        try:
+            # Submissions recorded from here on land in delta; flushing first means
+            # they come after max_id (apart from any written during the flush itself)
+            score_ingest.flush(timeout=30)
+            max_id = max_score_id()
+            stats = {}
+            submissions = 0
+            last_id = 0
+            default_ids = [q['id'] for q in question_bank.snapshot()]
+            while last_id < max_id:
+                conn = get_db_connection()
+                try:
+                    rows = read_score_chunk(conn.cursor(), conn.backend, last_id, max_id, self.config['chunk_size'])
+                finally:
+                    conn.close()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                decoded = [(decode_stored_answers(answers, ids, default_ids), time_taken)
+                           for _, _, time_taken, answers, ids in rows]
+                decoded = [(d[0], d[1], t) for d, t in decoded if d is not None]
+                if decoded:
+                    self._rebuild_chunk(stats, decoded)
+                    submissions += len(decoded)
+            
+            with self.lock:
+                for question_ids, answers, correct, time_taken in self.delta:
+                    self._apply(stats, question_ids, answers, correct, time_taken)
+                self.stats = stats
+                self.submissions = submissions + len(self.delta)
+            log.info("Question analytics rebuilt from %d stored submissions", submissions)
+            return True
+        finally:
+            with self.lock:
+                self.delta = None
+                self.rebuilding = False
+
+    def _rebuild_chunk(self, stats, decoded):
+        answers = [d[0] for d in decoded]
+        question_ids = [d[1] for d in decoded]
+        times = [d[2] for d in decoded]
+        graded = grading_engine.grade_batch(answers, question_ids)
+        
+        if not NUMPY_AVAILABLE:
+            for ids, row_answers, correct, time_taken in zip(question_ids, answers, graded['correct'], times):
+                self._apply(stats, ids, row_answers, correct, time_taken)
+            return
+        
+        # Flatten the chunk into one (question, answer, correct, result, time) entry per cell
+        lengths = np.array([len(ids) for ids in question_ids])
+        width = max(len(row) for row in graded['correct'])
+        correct = np.array([row + [False] * (width - len(row)) for row in graded['correct']], dtype=bool)
+        cell = np.arange(width)[None, :] < lengths[:, None]
+        flat_ids = np.concatenate([np.asarray(ids, dtype=np.int64) for ids in question_ids])
+        flat_answers = np.array([
+            row[i] if i < len(row) and isinstance(row[i], int) else -1
+            for row, ids in zip(answers, question_ids)
+            for i in range(len(ids))
+        ], dtype=np.int64)
+        flat_correct = correct[cell]
+        results = correct.sum(axis=1) / np.maximum(lengths, 1)
+        flat_results = np.repeat(results, lengths)
+        timed = np.array([t is not None for t in times])
+        known = np.array([t if t is not None else 0 for t in times], dtype=float)
+        flat_time = np.repeat(known / np.maximum(lengths, 1), lengths)
+        flat_timed = np.repeat(timed, lengths)
+        
+        # Group by question id with np.add.at on dense arrays
+        unique_ids, slot = np.unique(flat_ids, return_inverse=True)
+        size = len(unique_ids)
+        sums = np.zeros((size, len(self.FIELDS)))
+        np.add.at(sums[:, 0], slot, 1)
+        answered = (flat_answers >= 0) & (flat_answers < OPTIONS_PER_QUESTION)
+        np.add.at(sums[:, 1], slot, answered)
+        np.add.at(sums[:, 2], slot, flat_correct)
+        np.add.at(sums[:, 3], slot, flat_results)
+        np.add.at(sums[:, 4], slot, flat_results ** 2)
+        np.add.at(sums[:, 5], slot, flat_results * flat_correct)
+        np.add.at(sums[:, 6], slot, flat_time)
+        np.add.at(sums[:, 7], slot, flat_timed)
+        options = np.zeros((size, OPTIONS_PER_QUESTION))
+        np.add.at(options, (slot[answered], flat_answers[answered]), 1)
+        
+        for i, question_id in enumerate(unique_ids.tolist()):
+            row = stats.get(question_id)
+            if row is None:
+                row = stats[question_id] = self._empty()
+            for j in range(len(self.FIELDS)):
+                row[j] += sums[i, j].item()
+            for k in range(OPTIONS_PER_QUESTION):
+                row[8 + k] += int(options[i, k])
+        # Counts were summed as floats above; keep them integral
+        for question_id in unique_ids.tolist():
+            row = stats[question_id]
+            row[0], row[1], row[2], row[7] = int(row[0]), int(row[1]), int(row[2]), int(row[7])
+
+    def report(self):
+        """Return derived statistics for every question that has been attempted."""
+        with self.lock:
+            stats = {question_id: list(row) for question_id, row in self.stats.items()}
+            submissions = self.submissions
+            rebuilding = self.rebuilding
+        
+        questions = {}
+        for question_id, row in stats.items():
+            attempts, answered, correct, sum_result, sum_result_sq, sum_result_correct, time_total, timed = row[:8]
+            option_counts = row[8:]
+            discrimination = None
+            if 0 < correct < attempts:
+                # Point-biserial: (M1 - M0) / s * sqrt(p * q)
+                p = correct / attempts
+                mean = sum_result / attempts
+                variance = sum_result_sq / attempts - mean * mean
+                if variance > 1e-12:
+                    mean_correct = sum_result_correct / correct
+                    mean_incorrect = (sum_result - sum_result_correct) / (attempts - correct)
+                    discrimination = round((mean_correct - mean_incorrect) / variance ** 0.5 * (p * (1 - p)) ** 0.5, 3)
+            questions[str(question_id)] = {
+                'attempts': attempts,
+                'answered': answered,
+                'percentCorrect': round(100.0 * correct / attempts, 1) if attempts else None,
+                'discrimination': discrimination,
+                'optionPickRates': [round(count / answered, 3) if answered else 0.0 for count in option_counts],
+                'averageTime': round(time_total / timed, 1) if timed else None
+            }
+        return {'submissions': submissions, 'rebuilding': rebuilding, 'questions': questions}
+
+item_analytics = ItemAnalytics(ANALYTICS_CONFIG)
+
+# Where scores go while no database will take them
+FALLBACK_STORE_CONFIG = {
+    'max_in_memory': 100000,   # Scores kept in memory before the oldest are spilled to disk
+    'spill_chunk': 10000,      # Scores moved to disk (and drained into the database) at a time
+    'spill_path': 'fallback_scores.ndjson',
+    'retry_interval': 30.0     # Seconds between attempts to reach the database again
+}
+
+class FallbackScore:
+    """One score held by the fallback store, in the ingest queue's record format."""
+    __slots__ = ('id', 'player_name', 'score', 'total_questions', 'time_taken', 'date_taken', 'answers', 'question_ids',
+                 'submission_id')
+
+    def __init__(self, score_id, record):
+        self.id = score_id
+        self.player_name = record['player_name']
+        self.score = record['score']
+        self.total_questions = record['total_questions']
+        self.time_taken = record['time_taken']
+        self.date_taken = record['date_taken']
+        self.answers = record['answers']
+        self.question_ids = record.get('question_ids')
+        self.submission_id = record.get('submission_id')
+
+    def record(self):
+        return {name: getattr(self, name) for name in self.__slots__[1:]}
+
+    def row(self):
+        """The columns a player score page shows, as the database would return them."""
+        return (self.id, self.score, self.total_questions, self.time_taken, self.date_taken)
+
+class FallbackScoreStore:
+    """Scores accepted while the database is unavailable.
+
+    Scores get increasing ids and a per-player index of those ids, so a
+    player's page is a binary search away. Past max_in_memory the oldest
+    scores are moved to an append-only spill file (one claimed per process,
+    like the ingest log) and read back by offset when a page needs them.
+    The leaderboard cache is kept up to date by the callers as usual.
+
+    As soon as a score is stored, a background thread starts retrying the
+    database. Once it is reachable, everything held here is handed to the
+    ingest queue and the store empties itself. How far into the spill file
+    has been handed over is kept in a small .drained file next to it, so a
+    restart after a partial drain doesn't hand the same scores over again.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.next_id = 1
+        self.first_id = 1          # Ids below this have been drained
+        self.recent = []           # In-memory scores, ids recent_base upwards
+        self.recent_base = 1
+        self.spill_base = 1        # Id of the first score in the spill file
+        self.offsets = array.array('q')  # Spill file offset of each spilled score
+        self.by_player = {}        # Player name -> array of ids, ascending
+        self.spill_file = None
+        self.spill_path = config['spill_path']
+        self.mark_file = None      # Byte offset in the spill file up to which scores were drained
+        self.recovery = None
+
+    def __len__(self):
+        return self.next_id - self.first_id
+
+    def open(self):
+        """Claim a spill file and take over any scores a previous run left in it."""
+        try:
+            self.spill_path, self.spill_file = claim_file(self.config['spill_path'], 'a+b')
+            # Covered by the spill file's claim
+            mark_path = self.spill_path + '.drained'
+            self.mark_file = open(mark_path, 'r+b' if os.path.exists(mark_path) else 'w+b')
+        except OSError as e:
+            log.error("Fallback spill file unavailable, holding every score in memory: %s", e)
+            if self.spill_file is not None:
+                self.spill_file.close()
+                self.spill_file = None
+            return
+        with self.lock:
+            mark = self.mark_file.read(8)
+            drained = struct.unpack('<Q', mark)[0] if len(mark) == 8 else 0
+            self.spill_file.seek(0)
+            offset = 0
+            for line in self.spill_file:
+                if not line.endswith(b'\n'):
+                    # A torn final line from a crash mid-spill
+                    break
+                if offset >= drained:
+                    entry = FallbackScore(self.next_id, json.loads(line))
+                    self.offsets.append(offset)
+                    self.by_player.setdefault(entry.player_name, array.array('q')).append(entry.id)
+                    self.next_id += 1
+                offset += len(line)
+            if not len(self):
+                # Everything was drained before the restart
+                offset = 0
+                self._mark_drained(0)
+            self.spill_file.truncate(offset)
+            self.recent_base = self.next_id
+        if len(self):
+            log.warning("Recovered %d fallback scores from %s", len(self), self.spill_path)
+            self.start_recovery()
+
+    def add(self, record):
+        """Hold a score until the database is back. Returns its id."""
+        started = time.perf_counter()
+        with self.lock:
+            entry = FallbackScore(self.next_id, record)
+            self.next_id += 1
+            self.recent.append(entry)
+            self.by_player.setdefault(entry.player_name, array.array('q')).append(entry.id)
+            if len(self.recent) > self.config['max_in_memory'] and self.spill_file is not None:
+                self._spill()
+        fallbacks.inc('memory_scores')
+        db_query_seconds.observe(time.perf_counter() - started, 'memory', 'insert')
+        self.start_recovery()
+        return entry.id
+
+    def _spill(self):
+        """Move the oldest in-memory scores to the spill file. Called with the lock held."""
+        chunk = self.recent[:self.config['spill_chunk']]
+        lines = [json.dumps(entry.record()).encode('utf-8') + b'\n' for entry in chunk]
+        self.spill_file.seek(0, os.SEEK_END)
+        offset = self.spill_file.tell()
+        self.spill_file.write(b''.join(lines))
+        self.spill_file.flush()
+        for line in lines:
+            self.offsets.append(offset)
+            offset += len(line)
+        del self.recent[:len(chunk)]
+        self.recent_base += len(chunk)
+        log.warning("Spilled %d fallback scores to %s", len(chunk), self.spill_path)
+
+    def _mark_drained(self, offset):
+        """Record that the spill file is drained up to offset. Called with the lock held."""
+        self.mark_file.seek(0)
+        self.mark_file.write(struct.pack('<Q', offset))
+        self.mark_file.flush()
+        os.fsync(self.mark_file.fileno())
+
+    def _read_spilled(self, first, count):
+        """Read up to count spilled scores starting at id first. Called with the lock held."""
+        self.spill_file.seek(self.offsets[first - self.spill_base])
+        entries = []
+        for score_id in range(first, min(first + count, self.recent_base)):
+            entries.append(FallbackScore(score_id, json.loads(self.spill_file.readline())))
+        return entries
+
+    def _get(self, score_id):
+        if score_id >= self.recent_base:
+            return self.recent[score_id - self.recent_base]
+        return self._read_spilled(score_id, 1)[0]
+
+    def player_rows(self, player_name, after, limit):
+        """Up to limit of a player's score rows, newest first, starting after the cursor."""
+        with self.lock:
+            ids = self.by_player.get(player_name, ())
+            position = len(ids) if after is None else bisect.bisect_left(ids, after[1])
+            rows = []
+            while position > 0 and len(rows) < limit:
+                position -= 1
+                if ids[position] < self.first_id:
+                    break
+                rows.append(self._get(ids[position]).row())
+            return rows
+
+    def top(self, limit):
+        """The best held scores as leaderboard entries. Reads the whole spill file."""
+        key = lambda e: rank_key(e.score, e.time_taken) + (e.id,)
+        with self.lock:
+            best = heapq.nsmallest(limit, self.recent[max(0, self.first_id - self.recent_base):], key=key)
+            first = self.first_id
+            while first < self.recent_base:
+                chunk = self._read_spilled(first, self.config['spill_chunk'])
+                best = heapq.nsmallest(limit, best + chunk, key=key)
+                first += len(chunk)
+        return [{
+            'playerName': e.player_name,
+            'score': e.score,
+            'totalQuestions': e.total_questions,
+            'timeTaken': e.time_taken,
+            'dateTaken': e.date_taken
+        } for e in best]
+
+    def drain(self, ingest):
+        """Hand every held score to the ingest queue, oldest first. Returns True once empty."""
+        with self.lock:
+            drained = len(self)
+            if not drained:
+                return True
+            try:
+                while self.first_id < self.next_id:
+                    if self.first_id < self.recent_base:
+                        chunk = self._read_spilled(self.first_id, self.config['spill_chunk'])
+                        # Reading left the file just past the chunk
+                        drained_to = self.spill_file.tell()
+                    else:
+                        start = self.first_id - self.recent_base
+                        chunk = self.recent[start:start + self.config['spill_chunk']]
+                        drained_to = None
+                    ingest.submit_many([entry.record() for entry in chunk])
+                    # Durable in the ingest log now, so never hand these over twice
+                    self.first_id += len(chunk)
+                    if drained_to is not None:
+                        self._mark_drained(drained_to)
+            except Exception as e:
+                log.error("Error draining fallback scores, will retry: %s", e)
+                return False
+            self.recent = []
+            self.recent_base = self.spill_base = self.next_id
+            self.offsets = array.array('q')
+            self.by_player = {}
+            if self.spill_file is not None:
+                # Truncate before resetting the mark; a crash in between leaves an empty file
+                self.spill_file.truncate(0)
+                self._mark_drained(0)
+        log.info("Drained %d fallback scores into the database", drained)
+        return True
+
+    def start_recovery(self):
+        """Start retrying the database in the background, unless that is already happening."""
+        with self.lock:
+            if self.recovery is not None:
+                return
+            self.recovery = threading.Thread(target=self._recover, name='fallback-recovery', daemon=True)
+            self.recovery.start()
+
+    def _recover(self):
+        while True:
+            time.sleep(self.config['retry_interval'])
+            try:
+                reconnected = not db_initialized and reconnect_database()
+                if db_initialized and self.drain(score_ingest):
+                    if reconnected:
+                        # The cached leaderboard only knew about the held scores; rebuild it from everything
+                        score_ingest.flush(timeout=10)
+                        refresh_leaderboard()
+                    with self.lock:
+                        if not len(self):
+                            self.recovery = None
+                            return
+            except Exception as e:
+                log.error("Error recovering from database outage: %s", e)
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                'held': len(self),
+                'in_memory': len(self.recent) - max(0, self.first_id - self.recent_base),
+                'spilled': max(0, self.recent_base - max(self.first_id, self.spill_base)),
+                'recovering': self.recovery is not None
+            }
+
+fallback_scores = FallbackScoreStore(FALLBACK_STORE_CONFIG)
+
+def reconnect_database():
+    """Bring the database up after a failed startup. Returns True once it is in use."""
+    global db_initialized
+    if not init_db():
         return False
+    score_ingest.start()
+    atexit.register(score_ingest.stop)
+    # Seeds a new questions table from the bank as it stands, edits made during the outage included
+    question_store.start()
+    db_initialized = True
+    log.info("Database available again; leaving in-memory fallback")
+    return True
 
-def calculate_score(answers):
-    """Calculate the quiz score based on answers."""
-    score = 0
-    for i, answer in enumerate(answers):
-        if i < len(QUESTIONS) and answer is not None and answer == QUESTIONS[i]['correctAnswer']:
-            score += 10
-    return score
+quiz_sessions.start()
+atexit.register(quiz_sessions.save)
 
 # Initialize database on startup
 db_initialized = init_db()
-if not db_initialized:
-    print("WARNING: Database initialization failed. Using in-memory storage as fallback.")
-    # Create in-memory storage for scores as last resort
-    in_memory_scores = []
+fallback_scores.open()
+if db_initialized:
+    score_ingest.start()
+    atexit.register(score_ingest.stop)
+    # Scores a previous run spilled during an outage it never recovered from
+    fallback_scores.drain(score_ingest)
+    # Let replayed scores land before the leaderboard is seeded
+    score_ingest.flush(timeout=10)
+    refresh_leaderboard()
+    leaderboard_broadcaster.start()
+    if ANALYTICS_CONFIG['rebuild_on_startup']:
+        threading.Thread(target=item_analytics.rebuild, name='analytics-rebuild', daemon=True).start()
+else:
+    log.warning("Database initialization failed. Using in-memory storage as fallback.")
+    leaderboard_cache.replace(fallback_scores.top(LEADERBOARD_SIZE))
+    leaderboard_broadcaster.start()
+    fallback_scores.start_recovery()
+
+# Scrape-time readings of state the server already keeps
+metrics.register(CallbackMetric('quiz_question_bank_size', 'Questions in the in-memory bank.',
+                                lambda: len(question_bank)))
+metrics.register(CallbackMetric('quiz_leaderboard_cache_entries', 'Entries in the cached leaderboard.',
+                                lambda: len(leaderboard_cache.top())))
+metrics.register(CallbackMetric('quiz_fallback_scores', 'Scores held in memory or spilled to disk because the database was unavailable.',
+                                lambda: len(fallback_scores)))
+metrics.register(CallbackMetric('quiz_quiz_sessions', 'Quiz sessions created but not yet submitted.',
+                                lambda: len(quiz_sessions)))
+metrics.register(CallbackMetric('quiz_score_ingest_pending', 'Accepted scores not yet written to the database.',
+                                lambda: score_ingest.get_stats()['pending']))
+metrics.register(CallbackMetric('quiz_score_ingest_written_total', 'Scores written to the database by the ingest queue.',
+                                lambda: score_ingest.get_stats()['written'], kind='counter'))
+metrics.register(CallbackMetric('quiz_db_pool_connections', 'MySQL pool connections by state.',
+                                lambda: {('in_use',): db_pool.get_stats()['mysql_in_use'],
+                                         ('idle',): db_pool.get_stats()['mysql_idle']}, labels=('state',)))
+metrics.register(CallbackMetric('quiz_db_pool_timeouts_total', 'Requests that timed out waiting for a MySQL connection.',
+                                lambda: db_pool.get_stats()['mysql_timeouts'], kind='counter'))
+metrics.register(CallbackMetric('quiz_db_breaker_open', '1 while the MySQL circuit breaker is open or half-open.',
+                                lambda: int(db_pool.breaker.state != 'closed')))
+metrics.register(CallbackMetric('quiz_db_breaker_trips_total', 'Times the MySQL circuit breaker opened.',
+                                lambda: db_pool.breaker.trips, kind='counter'))
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    if request_profiler.wants(request.headers):
+        g.profile_started = g.request_started
+        request_profiler.begin()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # The rule (e.g. /api/player-scores/<player_name>) keeps the label set small
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        http_request_seconds.observe(time.perf_counter() - started, request.method, route)
+        http_requests.inc(request.method, route, response.status_code)
+    return response
+
+@app.teardown_request
+def finish_request_profile(exc):
+    # Runs after streamed bodies too, so their generation time is included
+    started = g.pop('profile_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        request_profiler.end(request.method, route, time.perf_counter() - started)
+
+def negotiate_question_payload(accepted_encodings):
+    """Pick the pre-encoded question payload for a client. Returns (payload, encoding, etag)."""
+    # Load questions from file if not already loaded (the shared table is authoritative when in use)
+    if len(question_bank) == 0 and not question_store.enabled:
+        load_questions_from_file()
+        
+    # Make sure we always have at least the default questions
+    if len(question_bank) == 0:
+        fallbacks.inc('fallback_questions')
+        question_bank.load(FALLBACK_QUESTIONS)
+    
+    # Serve the pre-encoded body for the current bank version
+    payload = question_payloads.get()
+    if BROTLI_AVAILABLE and 'br' in accepted_encodings:
+        encoding = 'br'
+    elif 'gzip' in accepted_encodings:
+        encoding = 'gzip'
+    else:
+        encoding = 'identity'
+    # Each encoding is a different byte sequence, so it gets its own strong ETag
+    etag = payload['tag'] if encoding == 'identity' else f"{payload['tag']}-{encoding}"
+    return payload, encoding, etag
 
 @app.route('/api/questions', methods=['GET'])
 def get_questions():
     """Get all quiz questions."""
     try:
-        # Load questions from file if not already loaded
-        global QUESTIONS
-        
-        if not QUESTIONS or len(QUESTIONS) == 0:
-            load_questions_from_file()
-            
-        # Make sure we always have at least the default questions
-        if not QUESTIONS or len(QUESTIONS) == 0:
-            # Default questions as fallback
-            QUESTIONS = [
-                {
-                    "id": 1,
-                    "question": "What is the capital of France?",
-                    "options": ["London", "Berlin", "Paris", "Madrid"],
-                    "correctAnswer": 2,
-                    "explanation": "Paris is the capital and largest city of France."
-                },
-                {
-                    "id": 2,
-                    "question": "Which planet is known as the Red Planet?",
-                    "options": ["Venus", "Mars", "Jupiter", "Saturn"],
-                    "correctAnswer": 1,
-                    "explanation": "Mars is called the Red Planet because of its reddish appearance."
-                }
-            ]
+        payload, encoding, etag = negotiate_question_payload(request.accept_encodings)
         
-        return jsonify(QUESTIONS)
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            response = app.response_class(question_payloads.body(payload, encoding), mimetype='application/json')
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        response.headers['Vary'] = 'Accept-Encoding'
+        # Let browsers keep the body but revalidate it on every load
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     except Exception as e:
-        print(f"Error getting questions: {e}")
+        log.error("Error getting questions: %s", e)
+        fallbacks.inc('fallback_questions')
         # Return the error but also provide default questions
-        return jsonify([
-            {
-                "id": 1,
-                "question": "What is the capital of France?",
-                "options": ["London", "Berlin", "Paris", "Madrid"],
-                "correctAnswer": 2,
-                "explanation": "Paris is the capital and largest city of France."
-            },
-            {
-                "id": 2,
-                "question": "Which planet is known as the Red Planet?",
-                "options": ["Venus", "Mars", "Jupiter", "Saturn"],
-                "correctAnswer": 1,
-                "explanation": "Mars is called the Red Planet because of its reddish appearance."
-            }
-        ]), 200  # Still return 200 so the frontend doesn't break
+        return jsonify(FALLBACK_QUESTIONS), 200  # Still return 200 so the frontend doesn't break
+
+@app.route('/api/quiz-session', methods=['POST'])
+def create_quiz_session():
+    """Sample questions for a new quiz and return them without answers."""
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        count = data.get('count', QUIZ_CONFIG['questions_per_quiz'])
+        if not isinstance(count, int) or count < 1:
+            return jsonify({'error': 'count must be a positive integer'}), 400
+        count = min(count, QUIZ_CONFIG['max_questions'])
+        
+        tags = data.get('tags')
+        if tags is not None and (not isinstance(tags, list) or not all(isinstance(t, str) for t in tags)):
+            return jsonify({'error': 'tags must be a list of strings'}), 400
+        
+        questions = question_bank.sample(count, tags)
+        if not questions:
+            return jsonify({'error': 'No questions available'}), 503
+        
+        created = quiz_sessions.create([q['id'] for q in questions])
+        if created is None:
+            return jsonify({'error': 'Too many quizzes in progress, please try again shortly'}), 503
+        session_id, started = created
+        
+        return jsonify({
+            'sessionId': session_id,
+            'startedAt': datetime.fromtimestamp(started).isoformat(),
+            # The timer runs on the server; submissions after this many seconds are refused
+            'timeLimit': QUIZ_CONFIG['time_limit'],
+            'expiresIn': QUIZ_CONFIG['time_limit'],
+            'questions': [{
+                'id': q['id'],
+                'question': q['question'],
+                'options': q['options']
+            } for q in questions]
+        })
+    except Exception as e:
+        log.error("Error creating quiz session: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/grade-batch', methods=['POST'])
+def grade_batch():
+    """Grade many submissions in one call, e.g. a whole class.
+
+    Expects {"submissions": [[answers...], ...]} and optionally
+    "questionIds": one list shared by all submissions, or one list per
+    submission. Each result has the score and a hex correctness bitmap
+    where bit i (least significant first) is question i.
+    """
+    try:
+        data = request.get_json(silent=True)
+        submissions = data.get('submissions') if isinstance(data, dict) else None
+        if not isinstance(submissions, list) or not all(is_answer_list(row) for row in submissions):
+            return jsonify({'error': 'submissions must be a list of answer lists, with null for unanswered'}), 400
+        
+        question_ids = data.get('questionIds')
+        if question_ids is not None:
+            per_row = isinstance(question_ids, list) and bool(question_ids) and isinstance(question_ids[0], list)
+            if per_row:
+                if len(question_ids) != len(submissions) or not all(is_id_list(ids) for ids in question_ids):
+                    return jsonify({'error': 'questionIds must have one list of question ids per submission'}), 400
+            elif not is_id_list(question_ids):
+                return jsonify({'error': 'questionIds must be a list of question ids, or one list per submission'}), 400
+        
+        graded = grading_engine.grade_batch(submissions, question_ids)
+        
+        return jsonify({
+            'results': [{
+                'score': score,
+                'correct': bitmap.hex()
+            } for score, bitmap in zip(graded['scores'], graded['bitmaps'])]
+        })
+    except Exception as e:
+        log.error("Error grading batch: %s", e)
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/api/submit-quiz', methods=['POST'])
 def submit_quiz():
     """Handle quiz submission and score storage."""
+    body, status = process_submission(request.get_json(silent=True))
+    return jsonify(body), status
+
+def process_submission(data):
+    """Grade and store one quiz submission. Returns (response body, HTTP status).
+
+    Shared by the Flask route and the async server in asgi.py. A submission
+    carrying a submissionId is stored at most once; retries get the first
+    attempt's response.
+    """
+    submission_id = data.get('submissionId') if isinstance(data, dict) else None
+    if submission_id is None:
+        body, status, _ = grade_submission(data)
+        return body, status
+    if not isinstance(submission_id, str) or not 0 < len(submission_id) <= SUBMISSION_CONFIG['max_id_length']:
+        return {'error': f"submissionId must be a string of 1 to {SUBMISSION_CONFIG['max_id_length']} characters"}, 400
+    
+    earlier = submission_ledger.begin(submission_id)
+    if earlier is not None:
+        if earlier.outcome is None:
+            return {'error': 'This submission is still being processed, please retry'}, 409
+        duplicate_submissions.inc('memory')
+        return submission_response(*earlier.outcome), 200
+    outcome = None
+    try:
+        body, status, outcome = grade_submission(data, submission_id)
+    finally:
+        # Only a stored score settles the id; anything else leaves it free for a retry
+        submission_ledger.finish(submission_id, outcome)
+    return body, status
+
+def is_answer_list(answers):
+    """True for a list of option indexes, with None for unanswered. Booleans don't count as indexes."""
+    return isinstance(answers, list) and all(
+        answer is None or (isinstance(answer, int) and not isinstance(answer, bool)) for answer in answers)
+
+def is_id_list(ids):
+    """True for a list of integer question ids (booleans excluded)."""
+    return isinstance(ids, list) and all(isinstance(i, int) and not isinstance(i, bool) for i in ids)
+
+def submission_response(score, total_questions, question_ids=None):
+    """The response body for a stored submission, with the answer key for session quizzes."""
+    response = {
+        'score': score,
+        'total': total_questions * POINTS_PER_QUESTION,
+        'message': 'Score saved successfully!'
+    }
+    if question_ids is not None:
+        # Session quizzes are sent without answers, so reveal them now for the review screen
+        response['results'] = []
+        for question_id in question_ids:
+            question = question_bank.get(question_id) or {}
+            response['results'].append({
+                'id': question_id,
+                'correctAnswer': question.get('correctAnswer'),
+                'explanation': question.get('explanation', '')
+            })
+    return response
+
+def find_stored_submission(submission_id):
+    """Return (score, total_questions, question_ids) for a submission already in the database, or None."""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        started = time.perf_counter()
+        cursor = conn.cursor()
+        cursor.execute(score_sql('by_submission', conn.backend), (submission_id,))
+        row = cursor.fetchone()
+        db_query_seconds.observe(time.perf_counter() - started, conn.backend, 'by_submission')
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    score, total_questions, question_ids = row
+    if isinstance(question_ids, (bytes, bytearray)):
+        question_ids = question_ids.decode('utf-8')
+    return score, total_questions, json.loads(question_ids) if question_ids else None
+
+def grade_submission(data, submission_id=None):
+    """Grade and store a submission. Returns (body, status, outcome); outcome is None unless it was stored."""
     try:
-        data = request.get_json()
         if not data:
-            return jsonify({'error': 'No data received'}), 400
+            return {'error': 'No data received'}, 400, None
+        if not isinstance(data, dict):
+            return {'error': 'Expected a JSON object'}, 400, None
 
         # Extract data from request
         player_name = data.get('playerName', 'Anonymous')
         answers = data.get('answers', [])
-        time_taken = data.get('timeTaken', 0)
+        session_id = data.get('sessionId')
+        if not isinstance(player_name, str):
+            return {'error': 'playerName must be a string'}, 400, None
+        if not is_answer_list(answers):
+            return {'error': 'answers must be a list of option indexes, with null for unanswered'}, 400, None
+        
+        if session_id:
+            # Check the answers fit before using up the session, so a malformed attempt can be corrected
+            expected = quiz_sessions.question_count(session_id)
+            if expected is not None and len(answers) != expected:
+                return {
+                    'error': f'Invalid number of answers. Expected {expected}, got {len(answers)}'
+                }, 400, None
+            # Grade against the questions this session was given
+            session = quiz_sessions.pop(session_id)
+            if session is None:
+                # A retry whose first attempt was stored before a restart
+                stored = find_stored_submission(submission_id) if submission_id and db_initialized else None
+                if stored is not None:
+                    duplicate_submissions.inc('database')
+                    return submission_response(*stored), 200, stored
+                return {'error': 'Quiz session not found or expired'}, 400, None
+            if session['late']:
+                return {'error': 'Time limit exceeded'}, 400, None
+            question_ids = session['questionIds']
+            # Measured from the server's clock; the client's timeTaken is ignored
+            time_taken = min(int(session['elapsed']), QUIZ_CONFIG['time_limit'])
+        else:
+            # Grade against one consistent view of the whole bank
+            question_ids = [q['id'] for q in question_bank.snapshot()]
+            # Nothing to time a sessionless quiz by; stored as NULL and ranked last on ties
+            time_taken = None
+        total_questions = len(question_ids)
         
         # Validate answers
-        if len(answers) != len(QUESTIONS):
-            return jsonify({
-                'error': f'Invalid number of answers. Expected {len(QUESTIONS)}, got {len(answers)}'
-            }), 400
+        if len(answers) != total_questions:
+            return {
+                'error': f'Invalid number of answers. Expected {total_questions}, got {len(answers)}'
+            }, 400, None
         
         # Calculate score
-        score = calculate_score(answers)
+        graded = grading_engine.grade_batch([answers], question_ids)
+        score = graded['scores'][0]
         
         # Try to store in database
         success = False
+        current_time = datetime.now().isoformat()
+        
+        record = {
+            'player_name': player_name,
+            'score': score,
+            'total_questions': total_questions,
+            'time_taken': time_taken,
+            'date_taken': current_time,
+            'answers': json.dumps(answers),
+            'question_ids': json.dumps(question_ids),
+            'submission_id': submission_id
+        }
         
         if db_initialized:
             try:
-                conn = get_db_connection()
-                if conn:
-                    cursor = conn.cursor()
-                    
-                    # Different syntax for MySQL vs SQLite
-                    if using_mysql:
-                        query = '''
-                            INSERT INTO quiz_scores 
-                            (player_name, score, total_questions, time_taken, date_taken, answers)
-                            VALUES (%s, %s, %s, %s, %s, %s)
-                        '''
-                    else:
-                        query = '''
-                            INSERT INTO quiz_scores 
-                            (player_name, score, total_questions, time_taken, date_taken, answers)
-                            VALUES (?, ?, ?, ?, ?, ?)
-                        '''
-                    
-                    current_time = datetime.now().isoformat()
-                    
-                    cursor.execute(query, (
-                        player_name,
-                        score,
-                        len(QUESTIONS),
-                        time_taken,
-                        current_time if not using_mysql else datetime.now(),
-                        json.dumps(answers)
-                    ))
-                    
-                    conn.commit()
-                    conn.close()
-                    success = True
-                    print(f"Score saved to database for {player_name}: {score}")
+                # Queued for the background writer; durable once submit() returns
+                score_ingest.submit(record)
+                success = True
+                log.debug("Score queued for database for %s: %s", player_name, score)
             except Exception as e:
-                print(f"Error saving to database: {e}")
-                print("Falling back to in-memory storage")
+                log.error("Error saving to database, falling back to in-memory storage: %s", e)
                 
         # Fall back to in-memory storage if database fails
         if not success:
             try:
-                in_memory_scores.append({
-                    'playerName': player_name,
-                    'score': score,
-                    'totalQuestions': len(QUESTIONS),
-                    'timeTaken': time_taken,
-                    'dateTaken': datetime.now().isoformat(),
-                    'answers': answers
-                })
-                print(f"Score saved to memory for {player_name}: {score}")
+                fallback_scores.add(record)
+                log.debug("Score saved to memory for %s: %s", player_name, score)
                 success = True
             except Exception as e:
-                print(f"Error saving to memory: {e}")
+                log.error("Error saving to memory: %s", e)
         
-        return jsonify({
-            'score': score,
-            'total': len(QUESTIONS) * 10,
-            'message': 'Score saved successfully!'
-        })
+        # Keep the cached leaderboard and item statistics in step with what was stored
+        if success:
+            item_analytics.record(question_ids, answers, graded['correct'][0], time_taken)
+            leaderboard_cache.add({
+                'playerName': player_name,
+                'score': score,
+                'totalQuestions': total_questions,
+                'timeTaken': time_taken,
+                'dateTaken': current_time
+            })
+        
+        outcome = (score, total_questions, question_ids if session_id else None)
+        return submission_response(*outcome), 200, outcome if success else None
         
     except Exception as e:
-        print(f"Error submitting quiz: {e}")
+        log.error("Error submitting quiz: %s", e)
         # Even if saving fails, return the calculated score to the user
         try:
-            return jsonify({
+            return {
                 'score': score if 'score' in locals() else 0,
-                'total': len(QUESTIONS) * 10,
+                'total': len(question_bank) * POINTS_PER_QUESTION,
                 'message': f'Quiz processed, but there was an error saving your score: {str(e)}'
-            })
+            }, 200, None
         except:
-            return jsonify({
+            return {
                 'error': f'Error processing quiz: {str(e)}'
-            }), 500
+            }, 500, None
 
 @app.route('/api/scores', methods=['GET'])
 def get_scores():
     """Get top 10 scores."""
     try:
-        scores = []
+        # Served from the in-memory leaderboard, which every submission keeps current
+        return jsonify(leaderboard_cache.top())
         
-        # Try to get from database first
-        if db_initialized:
-            try:
-                conn = get_db_connection()
-                if conn:
-                    if using_mysql:
-                        cursor = conn.cursor(dictionary=True)
-                    else:
-                        cursor = conn.cursor()
-                    
-                    if using_mysql:
-                        query = '''
-                            SELECT player_name, score, total_questions, time_taken, date_taken
-                            FROM quiz_scores
-                            ORDER BY score DESC, time_taken ASC
-                            LIMIT 10
-                        '''
-                    else:
-                        query = '''
-                            SELECT player_name, score, total_questions, time_taken, date_taken
-                            FROM quiz_scores
-                            ORDER BY score DESC, time_taken ASC
-                            LIMIT 10
-                        '''
-                    
-                    cursor.execute(query)
-                    
-                    if using_mysql:
-                        db_scores = cursor.fetchall()
+    except Exception as e:
+        log.error("Error getting scores: %s", e)
+        return jsonify([]), 500
+
+# Page size for /api/player-scores
+PLAYER_SCORES_PAGE_SIZE = 50
+PLAYER_SCORES_MAX_PAGE_SIZE = 200
+
+def encode_score_cursor(date_taken, score_id):
+    """Turn the (date_taken, id) of the last row on a page into an opaque token."""
+    if hasattr(date_taken, 'isoformat'):
+        date_taken = date_taken.isoformat()
+    raw = json.dumps([date_taken, score_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_score_cursor(token):
+    """Inverse of encode_score_cursor. Raises ValueError for a malformed token."""
+    try:
+        date_taken, score_id = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(date_taken, str) or not isinstance(score_id, int):
+        raise ValueError('Invalid cursor')
+    return date_taken, score_id
+
+def stream_score_page(rows, limit):
+    """Stream up to limit rows as {"scores": [...], "nextCursor": ...} without building a list.
+
+    rows yields (id, score, total_questions, time_taken, date_taken) tuples,
+    at most limit + 1 of them; the extra row only signals another page.
+    """
+    yield '{"scores":['
+    last = None
+    try:
+        for count, (score_id, score, total_questions, time_taken, date_taken) in enumerate(rows):
+            if count == limit:
+                break
+            if hasattr(date_taken, 'isoformat'):
+                date_taken = date_taken.isoformat()
+            item = {
+                'score': score,
+                'totalQuestions': total_questions,
+                'timeTaken': time_taken,
+                'dateTaken': date_taken
+            }
+            yield (',' if count else '') + json.dumps(item)
+            last = (date_taken, score_id)
+        else:
+            # Ran out of rows before the limit, so this is the last page
+            last = None
+    finally:
+        # Hands a database connection back as soon as the page is written
+        rows.close()
+    next_cursor = encode_score_cursor(*last) if last else None
+    yield '],"nextCursor":' + json.dumps(next_cursor) + '}'
+
+def iter_db_rows(conn, cursor):
+    """Yield rows from a cursor in small batches, returning the connection when done."""
+    try:
+        while True:
+            batch = cursor.fetchmany(50)
+            if not batch:
+                break
+            for row in batch:
+                yield tuple(row)
+    finally:
+        conn.close()
+
+def open_player_rows(player_name, after, limit):
+    """Row iterator for one page of a player's scores, from the database or memory."""
+    # Try database first
+    if db_initialized:
+        try:
+            conn = get_db_connection()
+            if conn:
+                try:
+                    started = time.perf_counter()
+                    cursor = conn.cursor()
+                    # One extra row tells us whether there is another page
+                    if after is None:
+                        cursor.execute(score_sql('player_page', conn.backend), (player_name, limit + 1))
                     else:
-                        db_scores = [dict(row) for row in cursor.fetchall()]
-                    
+                        date_taken, score_id = after
+                        cursor.execute(score_sql('player_page_after', conn.backend), (player_name, date_taken, date_taken, score_id, limit + 1))
+                    # Rows are streamed afterwards, so this covers running the query, not reading every row
+                    db_query_seconds.observe(time.perf_counter() - started, conn.backend, 'player_page')
+                except Exception:
                     conn.close()
-                    
-                    # Format scores from database
-                    for score in db_scores:
-                        if using_mysql:
-                            # Convert MySQL datetime to string
-                            score['date_taken'] = score['date_taken'].isoformat() if hasattr(score['date_taken'], 'isoformat') else score['date_taken']
-                        scores.append({
-                            'playerName': score['player_name'] if using_mysql else score['player_name'],
-                            'score': score['score'],
-                            'totalQuestions': score['total_questions'],
-                            'timeTaken': score['time_taken'],
-                            'dateTaken': score['date_taken']
-                        })
-            except Exception as e:
-                print(f"Error getting scores from database: {e}")
+                    raise
+                return iter_db_rows(conn, cursor)
+        except Exception as e:
+            log.error("Error getting player scores from database: %s", e)
+    
+    # Fall back to in-memory if needed
+    fallbacks.inc('memory_player_scores')
+    return (row for row in fallback_scores.player_rows(player_name, after, limit + 1))
+
+@app.route('/api/player-scores/<player_name>', methods=['GET'])
+def get_player_scores(player_name):
+    """Get a page of scores for a specific player, newest first.
+
+    Query parameters: limit (default 50, max 200) and cursor (the
+    nextCursor from the previous page). Returns {"scores": [...],
+    "nextCursor": token or null}.
+    """
+    try:
+        limit = request.args.get('limit', PLAYER_SCORES_PAGE_SIZE, type=int)
+        if limit is None or limit < 1:
+            return jsonify({'error': 'limit must be a positive integer'}), 400
+        limit = min(limit, PLAYER_SCORES_MAX_PAGE_SIZE)
         
-        # Fall back to in-memory if needed
-        if not scores and 'in_memory_scores' in globals():
-            # Sort in-memory scores
-            sorted_scores = sorted(in_memory_scores, key=lambda x: (-x['score'], x['timeTaken']))[:10]
-            scores = sorted_scores
+        after = None
+        if request.args.get('cursor'):
+            try:
+                after = decode_score_cursor(request.args['cursor'])
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
         
-        return jsonify(scores)
+        rows = open_player_rows(player_name, after, limit)
+        return app.response_class(stream_with_context(stream_score_page(rows, limit)), mimetype='application/json')
         
     except Exception as e:
-        print(f"Error getting scores: {e}")
-        return jsonify([]), 500
+        log.error("Error getting player scores: %s", e)
+        return jsonify({'scores': [], 'nextCursor': None}), 500
 
-@app.route('/api/player-scores/<player_name>', methods=['GET'])
-def get_player_scores(player_name):
-    """Get scores for a specific player."""
+# Columns written by the score export, in order
+EXPORT_COLUMNS = ['id', 'player_name', 'score', 'total_questions', 'time_taken', 'date_taken', 'answers', 'question_ids']
+EXPORT_FETCH_SIZE = 1000
+
+def iter_score_export(conn, fmt='csv', date_from=None, date_to=None, player=None):
+    """Yield the quiz_scores table as CSV or NDJSON text, one fetchmany batch at a time.
+
+    date_from is inclusive and date_to exclusive (ISO 8601 strings). The
+    connection is closed (returned to the pool) when the generator finishes.
+    """
     try:
-        player_scores = []
+        placeholder = '%s' if conn.backend == 'mysql' else '?'
+        conditions, params = [], []
+        if date_from:
+            conditions.append(f'date_taken >= {placeholder}')
+            params.append(date_from)
+        if date_to:
+            conditions.append(f'date_taken < {placeholder}')
+            params.append(date_to)
+        if player:
+            conditions.append(f'player_name = {placeholder}')
+            params.append(player)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
         
-        # Try database first
-        if db_initialized:
-            try:
-                conn = get_db_connection()
-                if conn:
-                    if using_mysql:
-                        cursor = conn.cursor(dictionary=True)
-                    else:
-                        cursor = conn.cursor()
-                    
-                    query = '''
-                        SELECT score, total_questions, time_taken, date_taken
-                        FROM quiz_scores
-                        WHERE player_name = ?
-                        ORDER BY date_taken DESC
-                    '''
-                    
-                    if using_mysql:
-                        query = query.replace('?', '%s')
-                    
-                    cursor.execute(query, (player_name,))
-                    
-                    if using_mysql:
-                        db_scores = cursor.fetchall()
-                    else:
-                        db_scores = [dict(row) for row in cursor.fetchall()]
-                    
-                    conn.close()
-                    
-                    # Format player scores from database
-                    for score in db_scores:
-                        if using_mysql:
-                            # Convert MySQL datetime to string
-                            score['date_taken'] = score['date_taken'].isoformat() if hasattr(score['date_taken'], 'isoformat') else score['date_taken']
-                        player_scores.append({
-                            'score': score['score'],
-                            'totalQuestions': score['total_questions'],
-                            'timeTaken': score['time_taken'],
-                            'dateTaken': score['date_taken']
-                        })
-            except Exception as e:
-                print(f"Error getting player scores from database: {e}")
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT {', '.join(EXPORT_COLUMNS)} FROM quiz_scores {where} ORDER BY id", params)
+        
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if fmt == 'csv':
+            writer.writerow(EXPORT_COLUMNS)
+        
+        while True:
+            rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                row = [value.isoformat() if hasattr(value, 'isoformat') else value for value in row]
+                if fmt == 'csv':
+                    writer.writerow(row)
+                else:
+                    record = dict(zip(EXPORT_COLUMNS, row))
+                    # answers and question_ids are stored as JSON text; export them as JSON values
+                    for column in ('answers', 'question_ids'):
+                        if isinstance(record[column], (str, bytes)):
+                            record[column] = json.loads(record[column])
+                    buffer.write(json.dumps(record))
+                    buffer.write('\n')
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        conn.close()
+
+def gzip_stream(chunks):
+    """Compress a stream of text chunks into gzip bytes incrementally."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 writes a gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+@app.route('/api/export/scores', methods=['GET'])
+def export_scores():
+    """Stream every stored score as CSV or NDJSON.
+
+    Query parameters: format (csv or ndjson), from and to (ISO dates,
+    to is exclusive), player, and gzip=1 for a compressed download.
+    """
+    try:
+        fmt = request.args.get('format', 'csv')
+        if fmt not in ('csv', 'ndjson'):
+            return jsonify({'error': 'format must be csv or ndjson'}), 400
         
-        # Fall back to in-memory if needed
-        if not player_scores and 'in_memory_scores' in globals():
-            # Filter and sort in-memory scores for this player
-            player_memory_scores = [s for s in in_memory_scores if s['playerName'] == player_name]
-            sorted_scores = sorted(player_memory_scores, key=lambda x: x['dateTaken'], reverse=True)
-            player_scores = sorted_scores
+        date_from = request.args.get('from')
+        date_to = request.args.get('to')
+        for value in (date_from, date_to):
+            if value:
+                try:
+                    datetime.fromisoformat(value)
+                except ValueError:
+                    return jsonify({'error': f'Invalid date: {value}'}), 400
         
-        return jsonify(player_scores)
+        if not db_initialized:
+            return jsonify({'error': 'Database not available'}), 503
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({'error': 'Database not available'}), 503
         
+        chunks = iter_score_export(conn, fmt, date_from, date_to, request.args.get('player'))
+        filename = f'quiz_scores.{fmt}'
+        mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        if request.args.get('gzip') in ('1', 'true'):
+            chunks = gzip_stream(chunks)
+            filename += '.gz'
+            mimetype = 'application/gzip'
+        
+        response = app.response_class(stream_with_context(chunks), mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+        return response
     except Exception as e:
-        print(f"Error getting player scores: {e}")
-        return jsonify([]), 500
+        log.error("Error exporting scores: %s", e)
+        return jsonify({'error': str(e)}), 500
 
 # Legacy routes for compatibility
 @app.route('/submit-score', methods=['POST'])
 def submit_score():
     try:
-        data = request.json
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
         player_name = data.get("name", "Anonymous")
         score = data.get("score", 0)
+        if not isinstance(player_name, str):
+            return jsonify({'error': 'name must be a string'}), 400
+        if not isinstance(score, int) or isinstance(score, bool):
+            return jsonify({'error': 'score must be an integer'}), 400
         
         # Store score using the same mechanism as the main submit route
         current_time = datetime.now().isoformat()
         
         # Try database first
         success = False
+        record = {
+            'player_name': player_name,
+            'score': score,
+            'total_questions': len(question_bank),
+            'time_taken': 0,  # No time data for legacy submissions
+            'date_taken': current_time,
+            'answers': '[]'  # No answers data for legacy submissions
+        }
         if db_initialized:
             try:
-                conn = get_db_connection()
-                if conn:
-                    cursor = conn.cursor()
-                    
-                    if using_mysql:
-                        query = '''
-                            INSERT INTO quiz_scores 
-                            (player_name, score, total_questions, time_taken, date_taken, answers)
-                            VALUES (%s, %s, %s, %s, %s, %s)
-                        '''
-                    else:
-                        query = '''
-                            INSERT INTO quiz_scores 
-                            (player_name, score, total_questions, time_taken, date_taken, answers)
-                            VALUES (?, ?, ?, ?, ?, ?)
-                        '''
-                    
-                    cursor.execute(query, (
-                        player_name,
-                        score,
-                        len(QUESTIONS),
-                        0,  # No time data for legacy submissions
-                        current_time if not using_mysql else datetime.now(),
-                        '[]'  # No answers data for legacy submissions
-                    ))
-                    
-                    conn.commit()
-                    conn.close()
-                    success = True
+                score_ingest.submit(record)
+                success = True
             except Exception as e:
-                print(f"Error saving legacy score to database: {e}")
+                log.error("Error saving legacy score to database: %s", e)
         
         # Fall back to in-memory
-        if not success and 'in_memory_scores' in globals():
-            in_memory_scores.append({
+        if not success:
+            fallback_scores.add(record)
+            success = True
+        
+        # Keep the cached leaderboard in step with what was stored
+        if success:
+            leaderboard_cache.add({
                 'playerName': player_name,
                 'score': score,
-                'totalQuestions': len(QUESTIONS),
+                'totalQuestions': len(question_bank),
                 'timeTaken': 0,
-                'dateTaken': current_time,
-                'answers': []
+                'dateTaken': current_time
             })
         
         return jsonify({"message": "Score submitted successfully!"})
     except Exception as e:
-        print(f"Error in legacy submit_score: {e}")
+        log.error("Error in legacy submit_score: %s", e)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/leaderboard/stream', methods=['GET'])
+def leaderboard_stream():
+    """Server-Sent Events stream of the top scores.
+
+    Sends a 'snapshot' event with the whole board, then a 'diff' event
+    (changed ranks plus the new board size) whenever it changes, at most
+    once per LEADERBOARD_STREAM_CONFIG['min_interval'] seconds.
+    """
+    response = app.response_class(leaderboard_broadcaster.stream(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop reverse proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/leaderboard', methods=['GET'])
 def leaderboard():
     """Legacy leaderboard route for compatibility."""
     try:
-        # Reuse the scores endpoint but transform to legacy format
-        scores_response = get_scores()
-        scores = scores_response.json if hasattr(scores_response, 'json') else []
+        scores = leaderboard_cache.top()
         
         # Convert to legacy format
         legacy_scores = [{
@@ -566,10 +4084,126 @@ def leaderboard():
         
         return jsonify(legacy_scores)
     except Exception as e:
-        print(f"Error in legacy leaderboard: {e}")
+        log.error("Error in legacy leaderboard: %s", e)
         return jsonify([]), 500
 
-# Static file routes
+@app.route('/api/db-stats', methods=['GET'])
+def db_stats():
+    """Report connection pool usage, wait times and circuit breaker state."""
+    try:
+        stats = db_pool.get_stats()
+        stats['ingest'] = score_ingest.get_stats()
+        stats['fallback'] = fallback_scores.get_stats()
+        stats['using_mysql'] = using_mysql
+        stats['db_initialized'] = db_initialized
+        return jsonify(stats)
+    except Exception as e:
+        log.error("Error getting database stats: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Request latencies, storage timings, fallbacks and sizes in the Prometheus text format."""
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/admin/profiles', methods=['GET'])
+def profile_report():
+    """Sampled request counts per route and the slowest sampled requests with their breakdown."""
+    report = request_profiler.report()
+    report['enabled'] = request_profiler.enabled
+    report['sampleRate'] = PROFILE_CONFIG['sample_rate']
+    report['outputDir'] = os.path.abspath(PROFILE_CONFIG['output_dir'])
+    return jsonify(report)
+
+@app.route('/api/admin/profiles/write', methods=['POST'])
+def write_profiles():
+    """Write the collapsed stacks, flame graphs and slowest.json now instead of on the next interval."""
+    request_profiler.write_files()
+    return jsonify({'outputDir': os.path.abspath(PROFILE_CONFIG['output_dir'])})
+
+@app.route('/api/admin/regrade', methods=['POST'])
+def start_regrade():
+    """Start (or with {"resume": true} resume) re-grading stored scores."""
+    try:
+        if not db_initialized:
+            return jsonify({'error': 'Database not available'}), 503
+        data = request.get_json(silent=True) or {}
+        if not regrade_job.start(resume=bool(data.get('resume'))):
+            return jsonify({'error': 'A re-grade is already running', 'progress': regrade_job.progress()}), 409
+        return jsonify({'message': 'Re-grade started', 'progress': regrade_job.progress()}), 202
+    except Exception as e:
+        log.error("Error starting re-grade: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/regrade', methods=['GET'])
+def regrade_progress():
+    """Report progress of the current or last re-grade."""
+    return jsonify(regrade_job.progress())
+
+@app.route('/api/admin/regrade/stop', methods=['POST'])
+def stop_regrade():
+    """Stop the running re-grade after its current chunk; it can be resumed later."""
+    regrade_job.stop()
+    return jsonify({'message': 'Stop requested', 'progress': regrade_job.progress()})
+
+@app.route('/api/admin/question-stats', methods=['GET'])
+def question_stats():
+    """Per-question difficulty, discrimination, option pick rates and average time."""
+    try:
+        return jsonify(item_analytics.report())
+    except Exception as e:
+        log.error("Error getting question stats: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# Page size for /api/admin/questions/search
+QUESTION_SEARCH_PAGE_SIZE = 20
+QUESTION_SEARCH_MAX_PAGE_SIZE = 100
+
+@app.route('/api/admin/questions/search', methods=['GET'])
+def search_questions():
+    """Ranked full-text search over the question bank.
+
+    Query parameters: q (words to match; the last may be partial), tag
+    (repeatable filter), limit (default 20, max 100) and offset. Returns
+    {"total": n, "results": [question with "score"], "tookMs": ms}.
+    """
+    try:
+        started = time.perf_counter()
+        limit = request.args.get('limit', QUESTION_SEARCH_PAGE_SIZE, type=int)
+        offset = request.args.get('offset', 0, type=int)
+        if limit is None or limit < 1 or offset is None or offset < 0:
+            return jsonify({'error': 'limit must be positive and offset non-negative'}), 400
+        limit = min(limit, QUESTION_SEARCH_MAX_PAGE_SIZE)
+        
+        total, page = question_search.search(request.args.get('q', ''), request.args.getlist('tag'), limit, offset)
+        results = []
+        for score, question_id in page:
+            question = question_bank.get(question_id)
+            if question is not None:
+                results.append(dict(question, score=round(score, 3)))
+        return jsonify({
+            'total': total,
+            'results': results,
+            'tookMs': round((time.perf_counter() - started) * 1000, 2)
+        })
+    except Exception as e:
+        log.error("Error searching questions: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/question-stats/rebuild', methods=['POST'])
+def rebuild_question_stats():
+    """Recompute question statistics from every stored score in the background."""
+    if not db_initialized:
+        return jsonify({'error': 'Database not available'}), 503
+    if item_analytics.rebuilding:
+        return jsonify({'error': 'A rebuild is already running'}), 409
+    threading.Thread(target=item_analytics.rebuild, name='analytics-rebuild', daemon=True).start()
+    return jsonify({'message': 'Rebuild started'}), 202
+
+# Static file routes. The app directory also holds the database, score logs, session state
+# and profiles/, so only the frontend's own top-level files are served from it.
+STATIC_EXTENSIONS = {'.html', '.css', '.js', '.ico', '.png', '.jpg', '.svg'}
+
 @app.route('/')
 def serve_index():
     """Serve the index page."""
@@ -583,108 +4217,93 @@ def serve_quiz():
 @app.route('/<path:path>')
 def serve_static(path):
     """Serve static files."""
+    if '/' in path or os.path.splitext(path)[1].lower() not in STATIC_EXTENSIONS:
+        return jsonify({'error': 'Not found'}), 404
     return send_from_directory('.', path)
 
+def validate_question(data):
+    """Check a new question against the add-question rules. Returns an error message or None."""
+    if not isinstance(data, dict):
+        return 'Question must be a JSON object'
+    
+    required_fields = ['question', 'options', 'correctAnswer']
+    for field in required_fields:
+        if field not in data:
+            return f'Missing required field: {field}'
+    
+    # Validate options array
+    if not isinstance(data['options'], list) or len(data['options']) != 4:
+        return 'Options must be an array with 4 items'
+    
+    # Validate correct answer
+    if not isinstance(data['correctAnswer'], int) or data['correctAnswer'] < 0 or data['correctAnswer'] > 3:
+        return 'Correct answer must be an integer between 0 and 3'
+    
+    # Validate optional tags
+    if 'tags' in data and (not isinstance(data['tags'], list) or not all(isinstance(t, str) for t in data['tags'])):
+        return 'Tags must be an array of strings'
+    return None
+
+def new_question_fields(data):
+    """The stored fields of a validated new question."""
+    return {
+        "question": data['question'],
+        "options": data['options'],
+        "correctAnswer": data['correctAnswer'],
+        "explanation": data.get('explanation', ''),
+        "tags": data.get('tags', [])
+    }
+
 @app.route('/api/add-question', methods=['POST'])
 def add_question():
     """Add a new question to the system."""
     try:
-        global QUESTIONS
-        print("Received question submission request")
+        log.debug("Received question submission request")
         data = request.get_json()
         if not data:
-            print("Error: No data received in request")
+            log.debug("No data received in add-question request")
             return jsonify({'error': 'No data received'}), 400
             
-        print(f"Question data received: {data.get('question')[:30]}...")
+        log.debug("Question data received: %.30s...", data.get('question'))
         
         # Validate question data
-        required_fields = ['question', 'options', 'correctAnswer']
-        for field in required_fields:
-            if field not in data:
-                print(f"Error: Missing required field: {field}")
-                return jsonify({'error': f'Missing required field: {field}'}), 400
-        
-        print("All required fields present")
-        
-        # Validate options array
-        if not isinstance(data['options'], list) or len(data['options']) != 4:
-            print("Error: Options must be an array with 4 items")
-            return jsonify({'error': 'Options must be an array with 4 items'}), 400
-        
-        print("Options validation passed")
-        
-        # Validate correct answer
-        if not isinstance(data['correctAnswer'], int) or data['correctAnswer'] < 0 or data['correctAnswer'] > 3:
-            print("Error: Correct answer must be an integer between 0 and 3")
-            return jsonify({'error': 'Correct answer must be an integer between 0 and 3'}), 400
-        
-        print("Correct answer validation passed")
-        
-        # Generate a unique ID (ensure it's unique, especially if we've deleted questions)
-        next_id = 1
-        if QUESTIONS:
-            # Find the highest existing ID and increment by 1
-            next_id = max([q.get('id', 0) for q in QUESTIONS]) + 1
-        
-        print(f"Generated unique ID: {next_id}")
-        
-        # Create new question object
-        new_question = {
-            "id": next_id,
-            "question": data['question'],
-            "options": data['options'],
-            "correctAnswer": data['correctAnswer'],
-            "explanation": data.get('explanation', '')
-        }
+        error = validate_question(data)
+        if error:
+            log.debug("Rejected question: %s", error)
+            return jsonify({'error': error}), 400
         
-        # Add to questions list
-        QUESTIONS.append(new_question)
-        print(f"Added question to in-memory list. Total questions: {len(QUESTIONS)}")
+        log.debug("Question validation passed")
         
-        # Save to file for persistence
-        save_status = save_questions_to_file()
-        if not save_status:
-            print(f"Warning: Question '{data['question'][:30]}...' added to memory but failed to save to file")
-            # But we'll still return success since the question is in memory
+        # Add to the shared question bank, which assigns the next unique ID
+        new_question = question_store.add(new_question_fields(data))
+        log.info("Added question %s to the question bank. Total questions: %d", new_question['id'], len(question_bank))
         
-        print("Question successfully added")
         return jsonify({
             'message': 'Question added successfully',
             'question': new_question
         })
         
     except Exception as e:
-        import traceback
-        print(f"Error adding question: {e}")
-        print(traceback.format_exc())
+        log.exception("Error adding question: %s", e)
         return jsonify({'error': str(e)}), 500
         
 @app.route('/api/delete-question/<question_id>', methods=['DELETE'])
 def delete_question(question_id):
     """Delete a question by ID."""
     try:
-        # Convert ID to int if it's numeric
+        # Questions are addressed by id only, so a stale or repeated request can't hit another one
         try:
-            question_id = int(question_id)
+            question = question_bank.get(int(question_id))
         except ValueError:
-            pass
-            
-        # Find the question by ID
-        question_index = None
-        for i, question in enumerate(QUESTIONS):
-            if question.get('id') == question_id or i == question_id:
-                question_index = i
-                break
-                
-        if question_index is None:
+            question = None
+        if question is None:
             return jsonify({'error': 'Question not found'}), 404
             
         # Remove the question
-        removed_question = QUESTIONS.pop(question_index)
-        
-        # If you have persistent storage, save changes
-        save_questions_to_file()
+        removed_question = question_store.remove(question['id'])
+        if removed_question is None:
+            # Deleted by another request since the lookup above
+            return jsonify({'error': 'Question not found'}), 404
         
         return jsonify({
             'message': 'Question deleted successfully',
@@ -692,7 +4311,7 @@ def delete_question(question_id):
         })
         
     except Exception as e:
-        print(f"Error deleting question: {e}")
+        log.error("Error deleting question: %s", e)
         return jsonify({'error': str(e)}), 500
         
 @app.route('/api/edit-question/<question_id>', methods=['PUT'])
@@ -703,24 +4322,17 @@ def edit_question(question_id):
         if not data:
             return jsonify({'error': 'No data received'}), 400
             
-        # Convert ID to int if it's numeric
+        # Questions are addressed by id only, so a stale or repeated request can't hit another one
         try:
-            question_id = int(question_id)
+            question = question_bank.get(int(question_id))
         except ValueError:
-            pass
-            
-        # Find the question by ID
-        question_index = None
-        for i, question in enumerate(QUESTIONS):
-            if question.get('id') == question_id or i == question_id:
-                question_index = i
-                break
-                
-        if question_index is None:
+            question = None
+        if question is None:
             return jsonify({'error': 'Question not found'}), 404
             
-        # Update the question fields
-        for field in ['question', 'options', 'correctAnswer', 'explanation']:
+        # Collect and validate the field changes before applying any of them
+        changes = {}
+        for field in ['question', 'options', 'correctAnswer', 'explanation', 'tags']:
             if field in data:
                 # Validate correct answer
                 if field == 'correctAnswer' and (not isinstance(data[field], int) or data[field] < 0 or data[field] > 3):
@@ -730,112 +4342,220 @@ def edit_question(question_id):
                 if field == 'options' and (not isinstance(data[field], list) or len(data[field]) != 4):
                     return jsonify({'error': 'Options must be an array with 4 items'}), 400
                     
-                # Update the field
-                QUESTIONS[question_index][field] = data[field]
+                # Validate tags
+                if field == 'tags' and (not isinstance(data[field], list) or not all(isinstance(t, str) for t in data[field])):
+                    return jsonify({'error': 'Tags must be an array of strings'}), 400
+                    
+                changes[field] = data[field]
         
-        # If you have persistent storage, save changes
-        save_questions_to_file()
+        # Update the question fields
+        updated_question = question_store.update(question['id'], changes)
+        if updated_question is None:
+            # Deleted by another request since the lookup above
+            return jsonify({'error': 'Question not found'}), 404
         
         return jsonify({
             'message': 'Question updated successfully',
-            'question': QUESTIONS[question_index]
+            'question': updated_question,
+            # Stored scores were graded against the old answer; POST /api/admin/regrade fixes them
+            'regradeSuggested': 'correctAnswer' in changes and changes['correctAnswer'] != question['correctAnswer']
         })
         
     except Exception as e:
-        print(f"Error updating question: {e}")
+        log.error("Error updating question: %s", e)
         return jsonify({'error': str(e)}), 500
         
-def save_questions_to_file():
-    """Save questions to a JSON file for persistence."""
-    global MEMORY_ONLY_MODE
-    
-    if MEMORY_ONLY_MODE:
-        print("Running in memory-only mode. Questions not saved to file.")
-        return True
+# Bulk question import/export
+QUESTION_CSV_COLUMNS = ['question', 'option1', 'option2', 'option3', 'option4', 'correctAnswer', 'explanation', 'tags']
+QUESTION_IMPORT_CONFIG = {
+    'max_errors': 1000,      # Per-line errors reported back; the count is always exact
+    'max_records': 200000    # Largest upload accepted in one request
+}
+
+def parse_question_lines(stream, fmt):
+    """Yield (line number, record or None, error or None) for an NDJSON or CSV upload.
+
+    Reads the stream incrementally. CSV uses QUESTION_CSV_COLUMNS as its
+    header, with tags separated by '|'. Records are validated with the same
+    rules as add-question.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'ndjson':
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, f'Invalid JSON: {e}'
+                continue
+            error = validate_question(data)
+            yield line_number, None if error else new_question_fields(data), error
+        return
     
-    try:
-        # Ensure we use an absolute path to the file
-        file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'questions.json')
-        print(f"Attempting to save questions to: {file_path}")
-        
-        # Create directory if needed (though it should already exist)
-        directory = os.path.dirname(file_path)
-        if directory and not os.path.exists(directory):
-            os.makedirs(directory)
-            
-        # Make sure we have write permission
-        try:
-            # Try to create a temporary file to verify write permissions
-            test_file = os.path.join(directory, '.write_test')
-            with open(test_file, 'w') as f:
-                f.write('test')
-            os.remove(test_file)
-        except Exception as perm_error:
-            print(f"Warning: Directory permission test failed: {perm_error}")
-            # Try the user's home directory as a fallback
-            home_dir = os.path.expanduser("~")
-            file_path = os.path.join(home_dir, 'questions.json')
-            print(f"Falling back to home directory: {file_path}")
-            
-        # Actually save the file
-        with open(file_path, 'w') as f:
-            json.dump(QUESTIONS, f, indent=2)
-        print(f"Successfully saved {len(QUESTIONS)} questions to {file_path}")
-        return True
-    except Exception as e:
-        print(f"Error saving questions to file: {e}")
-        # Try a different location as an absolute last resort
+    reader = csv.DictReader(text)
+    missing = [c for c in QUESTION_CSV_COLUMNS[:6] if c not in (reader.fieldnames or [])]
+    if missing:
+        yield 1, None, f"Missing CSV columns: {', '.join(missing)}"
+        return
+    for row in reader:
+        data = {
+            'question': row['question'],
+            'options': [row[c] for c in QUESTION_CSV_COLUMNS[1:5] if row[c] is not None],
+            'explanation': row.get('explanation') or '',
+            'tags': [t for t in (row.get('tags') or '').split('|') if t]
+        }
         try:
-            alt_file_path = os.path.join(os.path.expanduser("~"), 'quiz_questions.json')
-            with open(alt_file_path, 'w') as f:
-                json.dump(QUESTIONS, f, indent=2)
-            print(f"Saved to alternate location: {alt_file_path}")
-            return True
-        except Exception as alt_error:
-            print(f"Also failed to save to alternate location: {alt_error}")
-            return False
+            data['correctAnswer'] = int(row['correctAnswer'])
+        except (TypeError, ValueError):
+            # Let validate_question report it with the usual message
+            data['correctAnswer'] = row['correctAnswer']
+        if data['question'] is None:
+            del data['question']
+        error = validate_question(data)
+        yield reader.line_num, None if error else new_question_fields(data), error
+
+@app.route('/api/import/questions', methods=['POST'])
+def import_questions():
+    """Add many questions from an NDJSON or CSV upload.
+
+    The request body is the raw file. Query parameters: format (ndjson or
+    csv; otherwise taken from the Content-Type) and atomic=1 to import
+    nothing if any line is invalid. Valid lines are inserted in a single
+    transaction; invalid ones are reported as {"line": n, "error": ...}.
+    """
+    try:
+        fmt = request.args.get('format')
+        if fmt is None:
+            fmt = 'csv' if request.mimetype == 'text/csv' else 'ndjson'
+        if fmt not in ('csv', 'ndjson'):
+            return jsonify({'error': 'format must be csv or ndjson'}), 400
+        atomic = request.args.get('atomic') in ('1', 'true')
         
-def load_questions_from_file():
-    """Load questions from a JSON file if it exists."""
-    global QUESTIONS
+        started = time.monotonic()
+        records = []
+        errors = []
+        error_count = 0
+        for line_number, record, error in parse_question_lines(request.stream, fmt):
+            if error:
+                error_count += 1
+                if len(errors) < QUESTION_IMPORT_CONFIG['max_errors']:
+                    errors.append({'line': line_number, 'error': error})
+                continue
+            records.append(record)
+            if len(records) > QUESTION_IMPORT_CONFIG['max_records']:
+                return jsonify({'error': f"Too many questions; the limit is {QUESTION_IMPORT_CONFIG['max_records']} per upload"}), 413
+        
+        if atomic and error_count:
+            return jsonify({'imported': 0, 'errorCount': error_count, 'errors': errors}), 400
+        
+        # Parse first, then write: the transaction only lasts as long as the inserts
+        added = question_store.add_many(records) if records else []
+        elapsed = time.monotonic() - started
+        log.info("Imported %d questions (%d rejected) in %.2fs", len(added), error_count, elapsed)
+        
+        return jsonify({
+            'imported': len(added),
+            'errorCount': error_count,
+            'errors': errors,
+            'firstId': added[0]['id'] if added else None,
+            'lastId': added[-1]['id'] if added else None,
+            'totalQuestions': len(question_bank)
+        })
+    except UnicodeDecodeError:
+        return jsonify({'error': 'Upload must be UTF-8 text'}), 400
+    except Exception as e:
+        log.error("Error importing questions: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+def iter_question_export(questions, fmt='ndjson'):
+    """Yield questions as NDJSON or CSV (QUESTION_CSV_COLUMNS plus id) text in batches."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == 'csv':
+        writer.writerow(['id'] + QUESTION_CSV_COLUMNS)
+    for count, question in enumerate(questions, start=1):
+        if fmt == 'csv':
+            options = list(question['options']) + [''] * (4 - len(question['options']))
+            writer.writerow([question['id'], question['question']] + options[:4] + [
+                question['correctAnswer'], question.get('explanation', ''), '|'.join(question.get('tags') or ())
+            ])
+        else:
+            buffer.write(json.dumps(question))
+            buffer.write('\n')
+        if count % EXPORT_FETCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+@app.route('/api/export/questions', methods=['GET'])
+def export_questions():
+    """Stream the whole question bank as NDJSON or CSV (format=ndjson|csv, gzip=1 to compress)."""
     try:
-        # Try main location first
-        file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'questions.json')
-        if os.path.exists(file_path):
-            print(f"Loading questions from: {file_path}")
+        fmt = request.args.get('format', 'ndjson')
+        if fmt not in ('csv', 'ndjson'):
+            return jsonify({'error': 'format must be csv or ndjson'}), 400
+        
+        # One consistent view of the bank, however long the download takes
+        chunks = iter_question_export(question_bank.snapshot(), fmt)
+        filename = f'questions.{fmt}'
+        mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        if request.args.get('gzip') in ('1', 'true'):
+            chunks = gzip_stream(chunks)
+            filename += '.gz'
+            mimetype = 'application/gzip'
+        
+        response = app.response_class(chunks, mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+        return response
+    except Exception as e:
+        log.error("Error exporting questions: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+def question_file_locations():
+    """Places older versions saved questions.json, most preferred first."""
+    return [
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'questions.json'),
+        os.path.join(os.path.expanduser("~"), 'questions.json'),
+        os.path.join(os.path.expanduser("~"), 'quiz_questions.json')
+    ]
+
+def read_questions_file():
+    """Return the questions from the first legacy JSON file found, or None.
+
+    Questions now live in the questions table; this is only read to import
+    an existing bank the first time the table is set up, or when there is
+    no database at all.
+    """
+    for file_path in question_file_locations():
+        if not os.path.exists(file_path):
+            continue
+        try:
+            log.info("Loading questions from: %s", file_path)
             with open(file_path, 'r') as f:
                 loaded_questions = json.load(f)
-                if loaded_questions and isinstance(loaded_questions, list):
-                    QUESTIONS = loaded_questions
-                    print(f"Loaded {len(QUESTIONS)} questions from file")
-                    return
-                    
-        # If not found, try home directory
-        home_file = os.path.join(os.path.expanduser("~"), 'questions.json')
-        if os.path.exists(home_file):
-            print(f"Loading questions from home directory: {home_file}")
-            with open(home_file, 'r') as f:
-                loaded_questions = json.load(f)
-                if loaded_questions and isinstance(loaded_questions, list):
-                    QUESTIONS = loaded_questions
-                    print(f"Loaded {len(QUESTIONS)} questions from home directory")
-                    return
-                    
-        # Try alternative location
-        alt_file = os.path.join(os.path.expanduser("~"), 'quiz_questions.json')
-        if os.path.exists(alt_file):
-            print(f"Loading questions from alternative location: {alt_file}")
-            with open(alt_file, 'r') as f:
-                loaded_questions = json.load(f)
-                if loaded_questions and isinstance(loaded_questions, list):
-                    QUESTIONS = loaded_questions
-                    print(f"Loaded {len(QUESTIONS)} questions from alternative location")
-                    return
-    except Exception as e:
-        print(f"Error loading questions from file: {e}")
+            if loaded_questions and isinstance(loaded_questions, list):
+                return loaded_questions
+        except Exception as e:
+            log.error("Error loading questions from %s: %s", file_path, e)
+    return None
+
+def load_questions_from_file():
+    """Load the legacy JSON question file into the in-memory bank, if there is one."""
+    loaded_questions = read_questions_file()
+    if loaded_questions:
+        question_bank.load(loaded_questions)
+        log.info("Loaded %d questions from file", len(question_bank))
         
-# Load questions from file on startup
-load_questions_from_file()
+# Load questions on startup: from the questions table, which is seeded from
+# questions.json (or the defaults) the first time; from the file alone without a database
+if db_initialized:
+    question_store.start(read_questions_file)
+else:
+    load_questions_from_file()
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    # The reloader would run all of the startup above again in a child process
+    app.run(debug=os.environ.get('QUIZ_DEBUG') == '1', use_reloader=False)
@@ -0,0 +1,32 @@
+"""Shared setup for the quiz server tests.
+
+Importing server initializes quiz.db, claims its state files and starts its
+background threads in the working directory, so that happens once, in a
+scratch directory, before any test module imports it.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+os.chdir(tempfile.mkdtemp(prefix='quiz-test-'))
+os.environ.setdefault('QUIZ_LOG_LEVEL', 'WARNING')
+import server  # noqa: E402
+
+@pytest.fixture
+def client():
+    return server.app.test_client()
+
+def count_scores(where='1 = 1', params=()):
+    """Rows in quiz_scores matching a condition."""
+    conn = server.get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT COUNT(*) FROM quiz_scores WHERE {where}', params)
+        return cursor.fetchone()[0]
+    finally:
+        conn.close()
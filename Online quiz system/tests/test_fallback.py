@@ -0,0 +1,84 @@
+"""FallbackScoreStore: spilling to disk and draining into the ingest queue across restarts."""
+import pytest
+
+import server
+
+class Ingest:
+    """Collects drained scores; fails every submit after the first `accept` calls."""
+
+    def __init__(self, accept=None):
+        self.accept = accept
+        self.records = []
+
+    def submit_many(self, records):
+        if self.accept is not None:
+            if self.accept == 0:
+                raise OSError('ingest log unavailable')
+            self.accept -= 1
+        self.records.extend(records)
+
+def make_store(tmp_path):
+    # Everything is spilled straight away, two scores to a chunk; recovery never gets to run
+    config = dict(server.FALLBACK_STORE_CONFIG, max_in_memory=0, spill_chunk=2,
+                  spill_path=str(tmp_path / 'fallback.ndjson'), retry_interval=3600)
+    store = server.FallbackScoreStore(config)
+    store.open()
+    return store
+
+def close(store):
+    store.spill_file.close()
+    store.mark_file.close()
+
+def record(player_name):
+    return {
+        'player_name': player_name,
+        'score': 10,
+        'total_questions': 5,
+        'time_taken': 30,
+        'date_taken': '2026-01-01T00:00:00',
+        'answers': '[]'
+    }
+
+@pytest.fixture
+def spilled(tmp_path):
+    store = make_store(tmp_path)
+    for i in range(5):
+        store.add(record(f'spilled-{i}'))
+    assert store.get_stats() == {'held': 5, 'in_memory': 0, 'spilled': 5, 'recovering': True}
+    return store
+
+def test_restart_recovers_every_spilled_score(tmp_path, spilled):
+    close(spilled)
+    restarted = make_store(tmp_path)
+    try:
+        assert len(restarted) == 5
+        assert [row[0] for row in restarted.player_rows('spilled-3', None, 10)] == [4]
+    finally:
+        close(restarted)
+
+def test_restart_after_a_partial_drain_resumes_from_the_mark(tmp_path, spilled):
+    first = Ingest(accept=1)
+    assert not spilled.drain(first)
+    assert [r['player_name'] for r in first.records] == ['spilled-0', 'spilled-1']
+    close(spilled)
+
+    restarted = make_store(tmp_path)
+    try:
+        assert len(restarted) == 3
+        second = Ingest()
+        assert restarted.drain(second)
+        assert [r['player_name'] for r in second.records] == ['spilled-2', 'spilled-3', 'spilled-4']
+        assert len(restarted) == 0
+    finally:
+        close(restarted)
+
+def test_restart_after_a_full_drain_hands_nothing_over_again(tmp_path, spilled):
+    assert spilled.drain(Ingest())
+    close(spilled)
+
+    restarted = make_store(tmp_path)
+    try:
+        assert len(restarted) == 0
+        assert restarted.get_stats()['recovering'] is False
+    finally:
+        close(restarted)
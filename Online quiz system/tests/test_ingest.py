@@ -0,0 +1,140 @@
+"""ScoreIngestQueue: batching, crash replay, compaction, poisoned records and the legacy /submit-score route."""
+import json
+import os
+import time
+
+import server
+from conftest import count_scores
+
+def make_queue(tmp_path, **overrides):
+    config = dict(server.INGEST_CONFIG, log_path=str(tmp_path / 'ingest.log'), retry_delay=0.01, **overrides)
+    return server.ScoreIngestQueue(config)
+
+def record(player_name, score=10):
+    return {
+        'player_name': player_name,
+        'score': score,
+        'total_questions': 5,
+        'time_taken': 30,
+        'date_taken': '2026-01-01T00:00:00',
+        'answers': '[]'
+    }
+
+def write_log(path, lines):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(''.join(lines))
+
+def test_scores_past_the_last_checkpoint_are_replayed(tmp_path):
+    # What a crash leaves behind: two scores written and checkpointed, two acknowledged
+    # but not yet written, and a torn line that was never acknowledged
+    write_log(tmp_path / 'ingest.log', [json.dumps(dict(record('replay-written'), seq=1)) + '\n',
+                                        json.dumps(dict(record('replay-written'), seq=2)) + '\n',
+                                        json.dumps({'checkpoint': 2}) + '\n',
+                                        json.dumps(dict(record('replay-pending'), seq=3)) + '\n',
+                                        json.dumps(dict(record('replay-pending'), seq=4)) + '\n',
+                                        '{"player_name": "replay-torn", "sc'])
+    queue = make_queue(tmp_path)
+    queue.start()
+    try:
+        assert queue.flush(timeout=10)
+        queue.submit(record('replay-after'))
+        assert queue.flush(timeout=10)
+    finally:
+        queue.stop()
+
+    assert count_scores('player_name = ?', ('replay-written',)) == 0
+    assert count_scores('player_name = ?', ('replay-pending',)) == 2
+    assert count_scores('player_name = ?', ('replay-torn',)) == 0
+    assert count_scores('player_name = ?', ('replay-after',)) == 1
+
+def test_log_is_compacted_to_the_scores_still_waiting(tmp_path, monkeypatch):
+    write_log(tmp_path / 'ingest.log', [json.dumps(dict(record('compact'), seq=seq)) + '\n' for seq in range(1, 6)])
+    # Only the first batch reaches the database, so three scores are still waiting at its checkpoint
+    real_connection = server.get_db_connection
+    connections = []
+    def first_batch_only():
+        connections.append(1)
+        return real_connection() if len(connections) == 1 else None
+    monkeypatch.setattr(server, 'get_db_connection', first_batch_only)
+    queue = make_queue(tmp_path, batch_size=2, compact_bytes=1)
+    queue.start()
+    try:
+        deadline = time.monotonic() + 10
+        while True:
+            with open(tmp_path / 'ingest.log', encoding='utf-8') as f:
+                lines = [json.loads(line) for line in f]
+            if lines[0] == {'checkpoint': 2} or time.monotonic() > deadline:
+                break
+            time.sleep(0.01)
+        assert lines[0] == {'checkpoint': 2}
+        assert [line['seq'] for line in lines[1:]] == [3, 4, 5]
+        assert not os.path.exists(str(tmp_path / 'ingest.log') + '.compact')
+
+        monkeypatch.undo()
+        assert queue.flush(timeout=10)
+    finally:
+        queue.stop()
+    assert count_scores('player_name = ?', ('compact',)) == 5
+    # Nothing left to replay, so the log started over from the last checkpoint
+    with open(tmp_path / 'ingest.log', encoding='utf-8') as f:
+        assert [json.loads(line) for line in f] == [{'checkpoint': 5}]
+
+def test_bad_record_is_rejected_without_blocking_the_rest(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.start()
+    try:
+        queue.submit_many([record('ingest-before'), record({'x': 1}), record('ingest-after')])
+        assert queue.flush(timeout=10)
+        queue.submit(record('ingest-later'))
+        assert queue.flush(timeout=10)
+    finally:
+        queue.stop()
+
+    for name in ('ingest-before', 'ingest-after', 'ingest-later'):
+        assert count_scores('player_name = ?', (name,)) == 1
+    stats = queue.get_stats()
+    assert stats['rejected'] == 1
+    assert stats['pending'] == 0
+    with open(str(tmp_path / 'ingest.log') + '.rejected', encoding='utf-8') as f:
+        rejected = [json.loads(line) for line in f]
+    assert [r['player_name'] for r in rejected] == [{'x': 1}]
+    assert 'error' in rejected[0]
+
+def test_rejected_record_is_not_replayed(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.start()
+    queue.submit(record({'x': 1}))
+    assert queue.flush(timeout=10)
+    queue.stop()
+
+    restarted = make_queue(tmp_path)
+    restarted.start()
+    try:
+        assert restarted.get_stats()['accepted'] == 0
+        assert restarted.flush(timeout=10)
+        assert restarted.get_stats()['rejected'] == 0
+    finally:
+        restarted.stop()
+
+def test_unavailable_database_keeps_the_batch(tmp_path, monkeypatch):
+    queue = make_queue(tmp_path)
+    monkeypatch.setattr(server, 'get_db_connection', lambda: None)
+    queue.start()
+    try:
+        queue.submit(record('ingest-outage'))
+        assert not queue.flush(timeout=0.3)
+        assert queue.get_stats()['pending'] == 1
+        assert queue.get_stats()['rejected'] == 0
+        monkeypatch.undo()
+        assert queue.flush(timeout=10)
+    finally:
+        queue.stop()
+    assert count_scores('player_name = ?', ('ingest-outage',)) == 1
+    assert not os.path.exists(str(tmp_path / 'ingest.log') + '.rejected')
+
+def test_submit_score_validates_types(client):
+    assert client.post('/submit-score', json={'name': {'x': 1}, 'score': 10}).status_code == 400
+    assert client.post('/submit-score', json={'name': 'ok', 'score': '10'}).status_code == 400
+    assert client.post('/submit-score', json={'name': 'ok', 'score': True}).status_code == 400
+    assert client.post('/submit-score', json=[1]).status_code == 400
+    assert client.post('/submit-score', json={'name': 'legacy-ok', 'score': 10}).status_code == 200
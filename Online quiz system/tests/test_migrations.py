@@ -0,0 +1,67 @@
+"""Schema migrations: upgrading an old SQLite database to the current schema."""
+import sqlite3
+
+import pytest
+
+import server
+
+# quiz_scores as init_db created it before any migrations existed
+ORIGINAL_SCHEMA = '''
+    CREATE TABLE quiz_scores (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        player_name TEXT NOT NULL,
+        score INTEGER NOT NULL,
+        total_questions INTEGER NOT NULL,
+        time_taken INTEGER NOT NULL,
+        date_taken TEXT NOT NULL,
+        answers TEXT NOT NULL
+    )
+'''
+
+def indexes(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'quiz_scores'")}
+
+def test_upgrade_from_version_1_keeps_scores_and_applies_the_rest(tmp_path, monkeypatch):
+    conn = server.open_sqlite_connection(str(tmp_path / 'old.db'))
+    conn.execute(ORIGINAL_SCHEMA)
+    monkeypatch.setattr(server, 'SCHEMA_MIGRATIONS', server.SCHEMA_MIGRATIONS[:1])
+    server.run_migrations(conn, 'sqlite')
+    conn.executemany(
+        'INSERT INTO quiz_scores (player_name, score, total_questions, time_taken, date_taken, answers) VALUES (?, ?, ?, ?, ?, ?)',
+        [('old-a', 30, 5, 40, '2025-01-01T00:00:00', '[0]'), ('old-b', 20, 5, 50, '2025-01-02T00:00:00', '[1]')]
+    )
+    # A deleted row, so the rebuild in v7 has an AUTOINCREMENT high-water mark to keep
+    conn.execute("INSERT INTO quiz_scores (player_name, score, total_questions, time_taken, date_taken, answers) "
+                 "VALUES ('old-c', 0, 5, 1, '2025-01-03T00:00:00', '[]')")
+    conn.execute("DELETE FROM quiz_scores WHERE player_name = 'old-c'")
+    conn.commit()
+
+    monkeypatch.undo()
+    server.run_migrations(conn, 'sqlite')
+
+    applied = [row[0] for row in conn.execute('SELECT version FROM schema_migrations ORDER BY version')]
+    assert applied == [m['version'] for m in server.SCHEMA_MIGRATIONS]
+    assert conn.execute('SELECT id, player_name, time_taken FROM quiz_scores ORDER BY id').fetchall() == [
+        (1, 'old-a', 40), (2, 'old-b', 50)]
+    assert {'idx_quiz_scores_rank', 'idx_quiz_scores_player_cursor', 'idx_quiz_scores_submission'} <= indexes(conn)
+    assert 'idx_quiz_scores_player' not in indexes(conn)
+
+    # v6 and v7: submission ids are unique, time_taken may be unknown, and ids aren't reused
+    cursor = conn.execute(
+        'INSERT INTO quiz_scores (player_name, score, total_questions, time_taken, date_taken, answers, submission_id) '
+        "VALUES ('new', 10, 5, NULL, '2025-02-01T00:00:00', '[]', 'sub-1')")
+    assert cursor.lastrowid == 4
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute(
+            'INSERT INTO quiz_scores (player_name, score, total_questions, time_taken, date_taken, answers, submission_id) '
+            "VALUES ('new', 10, 5, 1, '2025-02-01T00:00:00', '[]', 'sub-1')")
+    conn.rollback()
+    conn.close()
+
+def test_migrations_are_not_reapplied(tmp_path):
+    conn = server.open_sqlite_connection(str(tmp_path / 'current.db'))
+    conn.execute(ORIGINAL_SCHEMA)
+    server.run_migrations(conn, 'sqlite')
+    server.run_migrations(conn, 'sqlite')
+    assert conn.execute('SELECT COUNT(*) FROM schema_migrations').fetchone()[0] == len(server.SCHEMA_MIGRATIONS)
+    conn.close()
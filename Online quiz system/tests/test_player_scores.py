@@ -0,0 +1,54 @@
+"""/api/player-scores: keyset pagination over (date_taken, id)."""
+import pytest
+
+import server
+
+def store_scores(player_name, dates):
+    """Insert one score per date, in order, and return their scores (which double as labels)."""
+    conn = server.get_db_connection()
+    try:
+        conn.cursor().executemany(
+            'INSERT INTO quiz_scores (player_name, score, total_questions, time_taken, date_taken, answers) '
+            'VALUES (?, ?, 5, 10, ?, ?)',
+            [(player_name, score, date, '[]') for score, date in enumerate(dates)])
+        conn.commit()
+    finally:
+        conn.close()
+    return list(range(len(dates)))
+
+def all_pages(client, player_name, limit):
+    pages = []
+    cursor = None
+    while True:
+        query = {'limit': limit} if cursor is None else {'limit': limit, 'cursor': cursor}
+        body = client.get(f'/api/player-scores/{player_name}', query_string=query).get_json()
+        pages.append([row['score'] for row in body['scores']])
+        cursor = body['nextCursor']
+        if cursor is None:
+            return pages
+
+def test_pages_split_ties_on_date_without_gaps_or_repeats(client):
+    # Three scores share a timestamp, so the id has to break the tie across a page boundary
+    scores = store_scores('pages-ties', ['2026-01-01T00:00:00', '2026-01-02T00:00:00', '2026-01-02T00:00:00',
+                                         '2026-01-02T00:00:00', '2026-01-03T00:00:00'])
+    pages = all_pages(client, 'pages-ties', limit=2)
+    assert pages == [[4, 3], [2, 1], [0]]
+    assert sorted(sum(pages, [])) == scores
+
+def test_exactly_full_last_page_has_no_next_cursor(client):
+    store_scores('pages-even', [f'2026-01-0{day}T00:00:00' for day in range(1, 5)])
+    assert all_pages(client, 'pages-even', limit=2) == [[3, 2], [1, 0]]
+
+def test_unknown_player_gets_an_empty_last_page(client):
+    assert client.get('/api/player-scores/pages-nobody').get_json() == {'scores': [], 'nextCursor': None}
+
+@pytest.mark.parametrize('query', [{'limit': 0}, {'limit': -1}, {'cursor': 'not-a-cursor'},
+                                   {'cursor': server.encode_score_cursor('2026-01-01', 'x')}])
+def test_bad_limit_or_cursor_is_rejected(client, query):
+    assert client.get('/api/player-scores/pages-bad', query_string=query).status_code == 400
+
+def test_limit_is_capped(client):
+    store_scores('pages-cap', ['2026-01-01T00:00:00'] * (server.PLAYER_SCORES_MAX_PAGE_SIZE + 1))
+    body = client.get('/api/player-scores/pages-cap', query_string={'limit': 10000}).get_json()
+    assert len(body['scores']) == server.PLAYER_SCORES_MAX_PAGE_SIZE
+    assert body['nextCursor'] is not None
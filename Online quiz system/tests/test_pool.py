@@ -0,0 +1,95 @@
+"""Connection pool: SQLite connection reuse and the MySQL circuit breaker."""
+import time
+
+import pytest
+
+import server
+
+class FailingMySQL:
+    """Stands in for mysql.connector with a server that refuses every connection."""
+
+    def __init__(self):
+        self.attempts = 0
+        self.connector = self
+
+    def connect(self, **kwargs):
+        self.attempts += 1
+        raise ConnectionRefusedError('MySQL is down')
+
+@pytest.fixture
+def mysql_down(monkeypatch):
+    mysql = FailingMySQL()
+    config = dict(server.POOL_CONFIG, breaker_threshold=2, breaker_cooldown=0.2)
+    monkeypatch.setattr(server, 'MYSQL_AVAILABLE', True)
+    monkeypatch.setattr(server, 'mysql', mysql, raising=False)
+    monkeypatch.setattr(server, 'db_pool', server.ConnectionPool(config))
+    # Hold off the question refresher, so it can't use up the breaker's probe
+    with server.question_store.lock:
+        yield mysql
+
+def test_breaker_opens_after_threshold_and_probes_once_per_cooldown():
+    breaker = server.CircuitBreaker(threshold=2, cooldown=0.1)
+    breaker.record_failure()
+    assert breaker.state == 'closed' and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+
+    time.sleep(0.15)
+    assert breaker.state == 'half-open'
+    assert breaker.allow()
+    # Only one probe gets through per cooldown
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert breaker.trips == 1
+
+    time.sleep(0.15)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.failures == 0
+
+def test_open_breaker_skips_mysql_and_falls_back_to_sqlite(mysql_down):
+    for _ in range(2):
+        conn = server.get_db_connection()
+        assert conn.backend == 'sqlite'
+        conn.close()
+    assert mysql_down.attempts == 2
+    assert server.db_pool.breaker.state == 'open'
+
+    conn = server.get_db_connection()
+    assert conn.backend == 'sqlite'
+    conn.close()
+    assert mysql_down.attempts == 2
+
+    time.sleep(0.25)
+    conn = server.get_db_connection()
+    conn.close()
+    assert mysql_down.attempts == 3
+    assert server.db_pool.get_stats()['breaker_trips'] == 1
+
+def test_failed_connect_gives_its_pool_slot_back(mysql_down):
+    pool = server.ConnectionPool(dict(server.POOL_CONFIG, mysql_pool_size=1, acquire_timeout=0.1))
+    for _ in range(3):
+        with pytest.raises(ConnectionRefusedError):
+            pool.get_mysql()
+    assert pool.get_stats()['mysql_timeouts'] == 0
+    assert pool.get_stats()['mysql_in_use'] == 0
+
+def test_sqlite_connections_are_reused_without_open_transactions():
+    pool = server.ConnectionPool(server.POOL_CONFIG)
+    conn = pool.get_sqlite()
+    raw = conn._conn
+    conn.execute('CREATE TEMP TABLE pool_probe (x INTEGER)')
+    conn.execute('INSERT INTO pool_probe VALUES (1)')
+    assert raw.in_transaction
+    conn.close()
+    # A second close must not hand the connection back twice
+    conn.close()
+
+    again = pool.get_sqlite()
+    assert again._conn is raw
+    assert not raw.in_transaction
+    assert again.execute('SELECT COUNT(*) FROM pool_probe').fetchone()[0] == 0
+    again.close()
+    assert pool.get_stats()['sqlite_connections'] == 1
+    assert pool.get_stats()['sqlite_idle'] == 1
@@ -0,0 +1,52 @@
+"""/api/questions caching headers and the question admin routes."""
+import server
+
+def test_unchanged_questions_revalidate_with_304(client):
+    first = client.get('/api/questions')
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'no-cache'
+
+    again = client.get('/api/questions', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == etag
+
+def test_each_encoding_has_its_own_etag(client):
+    plain = client.get('/api/questions').headers['ETag']
+    gzipped = client.get('/api/questions', headers={'Accept-Encoding': 'gzip'})
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert gzipped.headers['ETag'] != plain
+    # The gzip tag must not validate the identity body, or a proxy could hand out the wrong bytes
+    assert client.get('/api/questions', headers={'If-None-Match': gzipped.headers['ETag']}).status_code == 200
+
+def test_editing_a_question_changes_the_etag(client):
+    etag = client.get('/api/questions').headers['ETag']
+    question = server.question_bank.snapshot()[0]
+    try:
+        edited = client.put(f"/api/edit-question/{question['id']}", json={'explanation': 'etag test'})
+        assert edited.status_code == 200
+        response = client.get('/api/questions', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+    finally:
+        client.put(f"/api/edit-question/{question['id']}", json={'explanation': question.get('explanation', '')})
+
+def test_unknown_question_ids_are_not_found(client):
+    missing = max(q['id'] for q in server.question_bank.snapshot()) + 1000
+    # A list position is not an id, so nothing else may be edited or deleted in its place
+    for question_id in (missing, 'first'):
+        assert client.delete(f'/api/delete-question/{question_id}').status_code == 404
+        assert client.put(f'/api/edit-question/{question_id}', json={'explanation': 'x'}).status_code == 404
+
+def test_deleted_question_is_gone_for_a_repeated_delete(client):
+    added = client.post('/api/add-question', json={
+        'question': 'Which delete test question is this?',
+        'options': ['This one', 'Another', 'Neither', 'Both'],
+        'correctAnswer': 0
+    }).get_json()['question']
+    count = len(server.question_bank)
+
+    assert client.delete(f"/api/delete-question/{added['id']}").status_code == 200
+    assert client.delete(f"/api/delete-question/{added['id']}").status_code == 404
+    assert len(server.question_bank) == count - 1
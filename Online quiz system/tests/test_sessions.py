@@ -0,0 +1,79 @@
+"""QuizSessionStore: expiry, slot reuse and surviving a restart."""
+import time
+
+import server
+
+def make_store(tmp_path, **overrides):
+    config = dict(server.QUIZ_CONFIG, state_path=str(tmp_path / 'sessions.state'), **overrides)
+    return server.QuizSessionStore(config)
+
+def test_session_is_popped_once(tmp_path):
+    store = make_store(tmp_path, max_sessions=4)
+    session_id, _ = store.create([3, 1, 2])
+    assert store.question_count(session_id) == 3
+
+    session = store.pop(session_id)
+    assert session['questionIds'] == [3, 1, 2]
+    assert not session['late']
+    assert store.pop(session_id) is None
+    assert len(store) == 0
+
+def test_expired_session_is_late_until_swept(tmp_path):
+    store = make_store(tmp_path, max_sessions=4, time_limit=0.05, late_grace=0)
+    kept, _ = store.create([1])
+    swept, _ = store.create([2])
+    time.sleep(0.1)
+
+    assert store.pop(kept)['late']
+    assert store.sweep() == 1
+    assert store.pop(swept) is None
+    assert len(store) == 0
+
+def test_full_slab_reuses_expired_slots_and_old_ids_stay_dead(tmp_path):
+    store = make_store(tmp_path, max_sessions=2, time_limit=0.05, late_grace=0)
+    old = [store.create([i])[0] for i in range(2)]
+    assert store.create([9]) is None
+
+    time.sleep(0.1)
+    new_id, _ = store.create([9])
+    assert len(store) == 1
+    # The new session sits in one of the old slots, but neither old id reaches it
+    assert store._decode(new_id)[0] in {store._decode(session_id)[0] for session_id in old}
+    assert all(store.pop(session_id) is None for session_id in old)
+    assert store.pop(new_id)['questionIds'] == [9]
+
+def test_live_sessions_survive_a_restart(tmp_path):
+    store = make_store(tmp_path, max_sessions=8)
+    store.load()
+    live, _ = store.create([4, 5])
+    submitted, _ = store.create([6])
+    store.pop(submitted)
+    store.save()
+    store.state_file.close()
+
+    restarted = make_store(tmp_path, max_sessions=8)
+    restarted.load()
+    try:
+        assert len(restarted) == 1
+        assert restarted.pop(submitted) is None
+        assert restarted.pop(live)['questionIds'] == [4, 5]
+        # The restored slot is free again afterwards
+        assert len(restarted.free) == 8
+    finally:
+        restarted.state_file.close()
+
+def test_expired_sessions_are_not_restored(tmp_path):
+    store = make_store(tmp_path, max_sessions=2, time_limit=0.05, late_grace=0)
+    store.load()
+    session_id, _ = store.create([1])
+    store.save()
+    store.state_file.close()
+    time.sleep(0.1)
+
+    restarted = make_store(tmp_path, max_sessions=2, time_limit=0.05, late_grace=0)
+    restarted.load()
+    try:
+        assert len(restarted) == 0
+        assert restarted.pop(session_id) is None
+    finally:
+        restarted.state_file.close()
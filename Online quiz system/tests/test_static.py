@@ -0,0 +1,16 @@
+"""The static route serves the frontend and nothing else from the app directory."""
+import pytest
+
+@pytest.mark.parametrize('path', ['style.css', 'script.js', 'admin.html'])
+def test_frontend_files_are_served(client, path):
+    response = client.get(f'/{path}')
+    assert response.status_code == 200
+    response.close()
+
+@pytest.mark.parametrize('path', [
+    'quiz.db', 'score_ingest.log', 'score_ingest.log.rejected', 'fallback_scores.ndjson',
+    'fallback_scores.ndjson.drained', 'quiz_sessions.state', 'regrade_state.json',
+    'server.py', 'profiles/slowest.json', 'profiles/submit_quiz.svg'
+])
+def test_data_and_state_files_are_not_served(client, path):
+    assert client.get(f'/{path}').status_code == 404
@@ -0,0 +1,73 @@
+"""Quiz submissions: what gets stored and counted, and retries by submissionId."""
+import server
+from conftest import count_scores
+
+def sessionless_answers():
+    return [0] * len(server.question_bank.snapshot())
+
+def test_analytics_count_a_submission_once(client):
+    before = server.item_analytics.submissions
+    payload = {'playerName': 'analytics-once', 'answers': sessionless_answers(), 'submissionId': 'analytics-once-1'}
+    assert client.post('/api/submit-quiz', json=payload).status_code == 200
+    assert client.post('/api/submit-quiz', json=payload).status_code == 200
+    assert server.item_analytics.submissions == before + 1
+
+def test_analytics_skip_a_submission_that_was_not_stored(client, monkeypatch):
+    def fail(record):
+        raise OSError('disk full')
+    monkeypatch.setattr(server.score_ingest, 'submit', fail)
+    monkeypatch.setattr(server.fallback_scores, 'add', fail)
+    before = server.item_analytics.submissions
+
+    response = client.post('/api/submit-quiz', json={'playerName': 'analytics-lost', 'answers': sessionless_answers()})
+
+    assert response.status_code == 200
+    assert server.item_analytics.submissions == before
+
+def start_session(client, count=3):
+    session = client.post('/api/quiz-session', json={'count': count}).get_json()
+    return session['sessionId'], [None] * len(session['questions'])
+
+def test_retried_submission_is_stored_once(client):
+    session_id, answers = start_session(client)
+    payload = {'playerName': 'retry-once', 'answers': answers, 'sessionId': session_id, 'submissionId': 'retry-once-1'}
+
+    first = client.post('/api/submit-quiz', json=payload)
+    second = client.post('/api/submit-quiz', json=payload)
+
+    assert first.status_code == second.status_code == 200
+    assert second.get_json() == first.get_json()
+    assert len(first.get_json()['results']) == len(answers)
+    assert server.score_ingest.flush(timeout=10)
+    assert count_scores('submission_id = ?', ('retry-once-1',)) == 1
+
+def test_retry_after_a_restart_is_answered_from_the_database(client):
+    session_id, answers = start_session(client)
+    payload = {'playerName': 'retry-restart', 'answers': answers, 'sessionId': session_id, 'submissionId': 'retry-restart-1'}
+    first = client.post('/api/submit-quiz', json=payload).get_json()
+    assert server.score_ingest.flush(timeout=10)
+
+    # A restart forgets the ledger; the session was used up by the first attempt
+    server.submission_ledger.entries.clear()
+    retry = client.post('/api/submit-quiz', json=payload)
+
+    assert retry.status_code == 200
+    assert retry.get_json() == first
+    assert count_scores('submission_id = ?', ('retry-restart-1',)) == 1
+
+def test_rejected_attempt_leaves_the_id_free_for_a_corrected_retry(client):
+    session_id, answers = start_session(client)
+    payload = {'playerName': 'retry-fixed', 'answers': answers + [None], 'sessionId': session_id,
+               'submissionId': 'retry-fixed-1'}
+    assert client.post('/api/submit-quiz', json=payload).status_code == 400
+
+    payload['answers'] = answers
+    assert client.post('/api/submit-quiz', json=payload).status_code == 200
+    assert server.score_ingest.flush(timeout=10)
+    assert count_scores('submission_id = ?', ('retry-fixed-1',)) == 1
+
+def test_submission_id_must_be_a_short_string(client):
+    answers = sessionless_answers()
+    assert client.post('/api/submit-quiz', json={'answers': answers, 'submissionId': 5}).status_code == 400
+    assert client.post('/api/submit-quiz', json={'answers': answers, 'submissionId': ''}).status_code == 400
+    assert client.post('/api/submit-quiz', json={'answers': answers, 'submissionId': 'x' * 65}).status_code == 400